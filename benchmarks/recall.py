@@ -0,0 +1,107 @@
+"""Recall do modo aproximado (sketches) contra a análise exata em feeds Zipf sintéticos.
+
+Uso (a partir da raiz do repositório)::
+
+    python -m benchmarks.recall                          # 10k/50k, expoentes 0.8 e 1.1
+    python -m benchmarks.recall --sizes 20000 --exponents 0.6 --seeds 1,2,3
+
+Cada feed passa pelo ``StreamingFeedAnalyzer`` com ``approximate=True`` (com janela
+deslizante, como no endpoint de streaming) e pelo ``analyze_feed`` exato. Para
+``trending_topics`` e ``influence_ranking`` reporta o recall@5 — a fração do top 5
+exato que aparece no top 5 aproximado — médio e mínimo entre as seeds.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "examples"))
+
+from generate_performance_data import generate_realistic  # noqa: E402
+from sentiment_analyzer import StreamingFeedAnalyzer, analyze_feed  # noqa: E402
+
+TOP_K = 5
+DEFAULT_SIZES = (10_000, 50_000)
+DEFAULT_EXPONENTS = (0.8, 1.1)
+DEFAULT_SEEDS = (1, 2, 3)
+# Feeds de 2× a janela: metade das mensagens sai da janela durante o streaming
+WINDOW_MINUTES = 30
+
+
+def _top(analysis: Dict, metric: str) -> List[str]:
+    entries = analysis[metric][:TOP_K]
+    return [entry["user_id"] for entry in entries] if metric == "influence_ranking" else entries
+
+
+def recall_at_k(exact: Sequence[str], approximate: Sequence[str]) -> float:
+    return len(set(exact) & set(approximate)) / len(exact) if exact else 1.0
+
+
+def measure_recall(size: int, zipf_exponent: float, seed: int) -> Dict[str, float]:
+    """Recall@5 de trending_topics e influence_ranking para um feed sintético."""
+    messages = generate_realistic(
+        size,
+        hashtag_cardinality=max(500, size // 4),
+        user_cardinality=max(2000, size),
+        time_window_minutes=2 * WINDOW_MINUTES,
+        seed=seed,
+        zipf_exponent=zipf_exponent,
+    )["messages"]
+    exact = analyze_feed(messages, WINDOW_MINUTES, top_n_influencers=TOP_K)
+
+    stream_analyzer = StreamingFeedAnalyzer(WINDOW_MINUTES, approximate=True)
+    for message in messages:
+        stream_analyzer.add(message)
+    approximate = stream_analyzer.result(TOP_K)
+
+    return {
+        metric: recall_at_k(_top(exact, metric), _top(approximate, metric))
+        for metric in ("trending_topics", "influence_ranking")
+    }
+
+
+def run_recall(
+    sizes: Sequence[int] = DEFAULT_SIZES,
+    exponents: Sequence[float] = DEFAULT_EXPONENTS,
+    seeds: Sequence[int] = DEFAULT_SEEDS,
+) -> Dict[str, Dict[str, float]]:
+    """Recall médio e mínimo por ``"<tamanho>/zipf=<expoente>"`` e métrica."""
+    results: Dict[str, Dict[str, float]] = {}
+    for size in sizes:
+        for exponent in exponents:
+            runs = [measure_recall(size, exponent, seed) for seed in seeds]
+            metrics: Dict[str, float] = {}
+            for metric in ("trending_topics", "influence_ranking"):
+                recalls = [run[metric] for run in runs]
+                metrics[f"{metric}_mean"] = sum(recalls) / len(recalls)
+                metrics[f"{metric}_min"] = min(recalls)
+            results[f"{size}/zipf={exponent}"] = metrics
+    return results
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)))
+    parser.add_argument("--exponents", default=",".join(map(str, DEFAULT_EXPONENTS)))
+    parser.add_argument("--seeds", default=",".join(map(str, DEFAULT_SEEDS)))
+    args = parser.parse_args(argv)
+
+    results = run_recall(
+        [int(size) for size in args.sizes.split(",")],
+        [float(exponent) for exponent in args.exponents.split(",")],
+        [int(seed) for seed in args.seeds.split(",")],
+    )
+    print(f"{'feed':<24} {'trending média':>15} {'trending mín':>13} {'influência média':>17} {'influência mín':>15}")
+    for key, metrics in results.items():
+        print(
+            f"{key:<24} {metrics['trending_topics_mean']:>15.2f} {metrics['trending_topics_min']:>13.2f} "
+            f"{metrics['influence_ranking_mean']:>17.2f} {metrics['influence_ranking_min']:>15.2f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,313 @@
+"""Benchmarks por etapa do pipeline com baseline JSON e gate de regressão.
+
+Uso (a partir da raiz do repositório)::
+
+    python -m benchmarks.run                      # 1k/10k/100k, compara com baseline.json
+    python -m benchmarks.run --sizes 1000,10000 --stages analyze_feed,http
+    python -m benchmarks.run --update-baseline    # grava os números atuais como baseline
+
+Para cada etapa e tamanho mede throughput (mensagens/s na mediana), latência
+p50/p99 entre as repetições e o pico de memória (tracemalloc, numa execução
+extra fora da cronometragem). Os caches são limpos antes de cada repetição, então
+cada uma paga o custo de uma requisição nova. As latências também saem relativas
+a uma carga fixa de Python puro medida na mesma execução (``calibrate``), e a
+baseline guarda só esses números relativos e o pico de memória: ela vale em outra
+máquina. Sai com status 1 se o p50 relativo ou o pico de memória piorarem mais que
+``--max-regression`` em relação à baseline.
+"""
+
+import argparse
+import json
+import math
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "examples"))
+
+from generate_performance_data import generate_realistic  # noqa: E402
+from sentiment_analyzer import (  # noqa: E402
+    MessageRecord,
+    analyze_feed,
+    clear_caches,
+    compute_flags,
+    compute_sentiment_for_message,
+    compute_trending_topics,
+    epoch_seconds,
+    get_follower_count,
+    parse_timestamp,
+    tokenize,
+)
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+DEFAULT_MAX_REGRESSION = 0.25
+# Métricas comparadas com a baseline (maior = pior); só elas vão para a baseline
+GATED_METRICS = ("p50_rel", "peak_kb")
+CALIBRATION_REPETITIONS = 15
+
+
+def _stage_parse_timestamps(data: Dict[str, Any]) -> Callable[[], Any]:
+    timestamps = [message["timestamp"] for message in data["messages"]]
+    return lambda: [epoch_seconds(timestamp) for timestamp in timestamps]
+
+
+def _stage_tokenize(data: Dict[str, Any]) -> Callable[[], Any]:
+    contents = [message["content"] for message in data["messages"]]
+    return lambda: [tokenize(content) for content in contents]
+
+
+def _stage_sentiment(data: Dict[str, Any]) -> Callable[[], Any]:
+    pairs = [(message["content"], message["user_id"]) for message in data["messages"]]
+    return lambda: [compute_sentiment_for_message(content, user_id) for content, user_id in pairs]
+
+
+def _stage_followers(data: Dict[str, Any]) -> Callable[[], Any]:
+    user_ids = [message["user_id"] for message in data["messages"]]
+    return lambda: [get_follower_count(user_id) for user_id in user_ids]
+
+
+def _stage_trending(data: Dict[str, Any]) -> Callable[[], Any]:
+    messages = [dict(message, timestamp=parse_timestamp(message["timestamp"])) for message in data["messages"]]
+    now_reference = max(message["timestamp"] for message in messages)
+    labels = {message["id"]: compute_sentiment_for_message(message["content"], message["user_id"])[1] for message in messages}
+    return lambda: compute_trending_topics(messages, now_reference, labels)
+
+
+def _stage_flags(data: Dict[str, Any]) -> Callable[[], Any]:
+    messages = data["messages"]
+    return lambda: compute_flags(messages)
+
+
+def _stage_analyze_feed(data: Dict[str, Any]) -> Callable[[], Any]:
+    messages, window = data["messages"], data["time_window_minutes"]
+    return lambda: analyze_feed(messages, window)
+
+
+def _stage_analyze_feed_approximate(data: Dict[str, Any]) -> Callable[[], Any]:
+    messages, window = data["messages"], data["time_window_minutes"]
+    return lambda: analyze_feed(messages, window, approximate=True)
+
+
+def _stage_feed_store_window(data: Dict[str, Any]) -> Callable[[], Any]:
+    from feed_store import FeedStore
+
+    # rollups já calculados: mede só a combinação dos slots da janela e o snapshot
+    store = FeedStore()
+    store.append("benchmark", [MessageRecord(**message) for message in data["messages"]])
+    store.analysis("benchmark", data["time_window_minutes"])
+    return lambda: store.analysis("benchmark", data["time_window_minutes"])
+
+
+def _stage_serialize_response(data: Dict[str, Any]) -> Callable[[], Any]:
+    from main import FastJSONResponse
+
+    # um usuário por mensagem: influence_ranking com tantas entradas quanto mensagens
+    messages = [dict(message, user_id=f"user_{i:07d}") for i, message in enumerate(data["messages"])]
+    content = {"analysis": analyze_feed(messages, data["time_window_minutes"] * 2)}
+    return lambda: FastJSONResponse(content).body
+
+
+def _stage_http(data: Dict[str, Any], cached: bool = False) -> Callable[[], Any]:
+    from fastapi.testclient import TestClient
+
+    from main import RESULT_CACHE, app
+
+    client = TestClient(app)
+    body = json.dumps(data).encode("utf-8")
+    headers = {"Content-Type": "application/json"}
+
+    def run() -> None:
+        if not cached:
+            RESULT_CACHE.clear()
+        response = client.post("/analyze-feed", content=body, headers=headers)
+        assert response.status_code == 200, response.text
+
+    return run
+
+
+def _stage_http_cached(data: Dict[str, Any]) -> Callable[[], Any]:
+    # o mesmo corpo repetido: a partir do aquecimento, toda requisição é servida pelo cache de respostas
+    return _stage_http(data, cached=True)
+
+
+STAGES: Dict[str, Callable[[Dict[str, Any]], Callable[[], Any]]] = {
+    "parse_timestamps": _stage_parse_timestamps,
+    "tokenize": _stage_tokenize,
+    "compute_sentiment_for_message": _stage_sentiment,
+    "get_follower_count": _stage_followers,
+    "compute_trending_topics": _stage_trending,
+    "compute_flags": _stage_flags,
+    "analyze_feed": _stage_analyze_feed,
+    "analyze_feed_approximate": _stage_analyze_feed_approximate,
+    "feed_store_window": _stage_feed_store_window,
+    "serialize_response": _stage_serialize_response,
+    "http": _stage_http,
+    "http_cached": _stage_http_cached,
+}
+
+
+def _repetitions(size: int) -> int:
+    # ~200k mensagens processadas por etapa, entre 3 e 30 repetições
+    return max(3, min(30, 200_000 // size))
+
+
+def _percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """Percentil por rank mais próximo (com poucas repetições, p99 é o máximo)."""
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def _calibration_workload(words: Sequence[str]) -> Any:
+    counts: Dict[str, int] = {}
+    for word in words:
+        counts[word] = counts.get(word, 0) + 1
+    ranking = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+    return ranking, math.fsum(len(word) / 3.0 for word in words), " ".join(words).upper().split()
+
+
+def calibrate(repetitions: int = CALIBRATION_REPETITIONS) -> float:
+    """Mediana (ms) de uma carga fixa de Python puro (dict, sort, floats, strings).
+
+    É a unidade das latências relativas: o mesmo código numa máquina duas vezes mais
+    lenta dobra a carga e as etapas, e o número relativo não muda.
+    """
+    words = [f"termo{i % 997}" for i in range(20_000)]
+    _calibration_workload(words)
+    timings = []
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        _calibration_workload(words)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def measure(run: Callable[[], Any], size: int, repetitions: int, calibration_ms: float = 1.0) -> Dict[str, float]:
+    clear_caches()
+    run()  # aquecimento (imports, pool de processos, etc.)
+
+    timings: List[float] = []
+    for _ in range(repetitions):
+        clear_caches()
+        start = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+
+    clear_caches()
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    p50 = _percentile(timings, 0.50)
+    p99 = _percentile(timings, 0.99)
+    return {
+        "repetitions": repetitions,
+        "throughput_msgs_per_s": size / (p50 / 1000) if p50 else float("inf"),
+        "p50_ms": p50,
+        "p99_ms": p99,
+        "p50_rel": p50 / calibration_ms,
+        "p99_rel": p99 / calibration_ms,
+        "peak_kb": peak / 1024,
+    }
+
+
+def run_benchmarks(
+    sizes: Sequence[int] = DEFAULT_SIZES,
+    stages: Optional[Sequence[str]] = None,
+    repetitions: Optional[int] = None,
+) -> Dict[str, Dict[str, float]]:
+    """Resultados por ``"<etapa>/<tamanho>"``; latências relativas a uma única ``calibrate()``."""
+    calibration_ms = calibrate()
+    results: Dict[str, Dict[str, float]] = {}
+    for size in sizes:
+        data = generate_realistic(size)
+        for stage in stages or STAGES:
+            run = STAGES[stage](data)
+            results[f"{stage}/{size}"] = measure(run, size, repetitions or _repetitions(size), calibration_ms)
+    return results
+
+
+def compare_to_baseline(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    max_regression: float = DEFAULT_MAX_REGRESSION,
+) -> List[str]:
+    """Regressões acima de ``max_regression`` (fração) nas métricas de GATED_METRICS."""
+    regressions = []
+    for key, metrics in results.items():
+        reference = baseline.get(key)
+        if reference is None:
+            continue
+        for metric in GATED_METRICS:
+            if metric not in reference:
+                continue  # baseline de outro formato
+            limit = reference[metric] * (1 + max_regression)
+            if metrics[metric] > limit:
+                regressions.append(
+                    f"{key} {metric}: {metrics[metric]:.2f} > {reference[metric]:.2f} (+{max_regression:.0%})"
+                )
+    return regressions
+
+
+def _report(results: Dict[str, Dict[str, float]]) -> str:
+    lines = [f"{'etapa/tamanho':<40} {'msgs/s':>12} {'p50 ms':>10} {'p99 ms':>10} {'p50 rel':>10} {'pico KB':>10}"]
+    for key, metrics in results.items():
+        lines.append(
+            f"{key:<40} {metrics['throughput_msgs_per_s']:>12.0f} {metrics['p50_ms']:>10.2f} "
+            f"{metrics['p99_ms']:>10.2f} {metrics['p50_rel']:>10.2f} {metrics['peak_kb']:>10.0f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)))
+    parser.add_argument("--stages", default=",".join(STAGES), help="etapas separadas por vírgula")
+    parser.add_argument("--repetitions", type=int, default=None)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--max-regression", type=float, default=DEFAULT_MAX_REGRESSION)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--output", type=Path, default=None, help="grava os resultados em JSON")
+    args = parser.parse_args(argv)
+
+    stages = args.stages.split(",")
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        parser.error(f"etapas desconhecidas: {', '.join(unknown)}")
+
+    results = run_benchmarks([int(size) for size in args.sizes.split(",")], stages, args.repetitions)
+    print(_report(results))
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+    if args.update_baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline.exists() else {}
+        baseline.update(
+            {key: {metric: metrics[metric] for metric in GATED_METRICS} for key, metrics in results.items()}
+        )
+        args.baseline.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"Baseline atualizada: {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"Sem baseline em {args.baseline}; rode com --update-baseline")
+        return 0
+    regressions = compare_to_baseline(
+        results, json.loads(args.baseline.read_text(encoding="utf-8")), args.max_regression
+    )
+    for regression in regressions:
+        print(f"REGRESSÃO {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
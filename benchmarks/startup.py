@@ -0,0 +1,115 @@
+"""Subida de um worker novo: breakdown do ``python -X importtime`` e do aquecimento.
+
+Uso (a partir da raiz do repositório)::
+
+    python -m benchmarks.startup                          # import de main, 5 interpretadores
+    python -m benchmarks.startup --module sentiment_analyzer --runs 3 --top 15
+
+Cada execução é um interpretador novo — como um worker do uvicorn recém-criado —
+que importa o módulo com ``-X importtime`` e depois roda ``warm_up()``. Reporta a
+mediana do import, do aquecimento, dos módulos importados diretamente pelo módulo
+(tempo cumulativo) e dos pacotes que só entram no aquecimento (imports sob demanda). Sem
+``__pycache__`` (ex.: ``PYTHONDONTWRITEBYTECODE=1``) o tempo inclui a compilação.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_MODULE = "main"
+DEFAULT_RUNS = 5
+DEFAULT_TOP = 10
+
+_SCRIPT = """
+import time
+import {module}
+started = time.perf_counter()
+from sentiment_analyzer import warm_up
+warm_up()
+print((time.perf_counter() - started) * 1000)
+"""
+
+
+def parse_importtime(output: str) -> List[Tuple[int, str, float]]:
+    """Linhas ``(profundidade, módulo, cumulativo em ms)`` na ordem do ``-X importtime``.
+
+    Cada módulo aparece depois dos que ele importou, um nível de indentação acima.
+    """
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # cabeçalho
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((depth, name.strip(), int(cumulative) / 1000))
+    return entries
+
+
+def _startup_run(module: str) -> Tuple[float, float, Dict[str, float], Dict[str, float]]:
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _SCRIPT.format(module=module)],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    entries = parse_importtime(process.stderr)
+    index = next(i for i, (depth, name, _) in enumerate(entries) if depth == 0 and name == module)
+
+    imports: Dict[str, float] = {}
+    for depth, name, cumulative in reversed(entries[:index]):
+        if depth == 0:
+            break
+        if depth == 1:
+            imports[name] = cumulative
+    # agrupados por pacote: importlib.import_module não registra a linha do próprio pacote
+    deferred: Dict[str, float] = {}
+    for depth, name, cumulative in entries[index + 1:]:
+        if depth == 0:
+            package = name.split(".")[0]
+            deferred[package] = deferred.get(package, 0.0) + cumulative
+    return entries[index][2], float(process.stdout.strip().splitlines()[-1]), imports, deferred
+
+
+def _median_by_module(runs: Sequence[Dict[str, float]]) -> Dict[str, float]:
+    names = {name for run in runs for name in run}
+    medians = {name: statistics.median(run.get(name, 0.0) for run in runs) for name in names}
+    return dict(sorted(medians.items(), key=lambda item: -item[1]))
+
+
+def measure_startup(module: str = DEFAULT_MODULE, runs: int = DEFAULT_RUNS) -> Dict[str, object]:
+    """Medianas de ``import_ms``, ``warm_up_ms``, ``imports`` e ``deferred_imports`` (ms por módulo)."""
+    results = [_startup_run(module) for _ in range(runs)]
+    return {
+        "import_ms": statistics.median(result[0] for result in results),
+        "warm_up_ms": statistics.median(result[1] for result in results),
+        "imports": _median_by_module([result[2] for result in results]),
+        "deferred_imports": _median_by_module([result[3] for result in results]),
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default=DEFAULT_MODULE)
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS)
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP)
+    args = parser.parse_args(argv)
+
+    results = measure_startup(args.module, args.runs)
+    print(f"import {args.module}: {results['import_ms']:.1f} ms  warm_up(): {results['warm_up_ms']:.1f} ms"
+          f"  (mediana de {args.runs})")
+    for title, key in (("importado por " + args.module, "imports"), ("importado no aquecimento", "deferred_imports")):
+        print(f"\n{title:<40} {'cumulativo ms':>14}")
+        for name, cumulative in list(results[key].items())[:args.top]:
+            print(f"{name:<40} {cumulative:>14.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
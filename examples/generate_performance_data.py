@@ -1,4 +1,8 @@
+import bisect
+import itertools
 import json
+import random
+import sys
 from datetime import datetime, timedelta, timezone
 
 
@@ -20,9 +24,92 @@ def generate(n=1000):
     return {"messages": msgs, "time_window_minutes": 30}
 
 
+# Palavras do lexicon com acentuação variada, como aparecem em posts reais
+SENTIMENT_WORDS = ["adorei", "gostei", "bom", "ótimo", "excelente", "perfeito", "ótima", "serviço",
+                   "ruim", "terrível", "péssimo", "horrível", "péssima"]
+MODIFIER_WORDS = ["muito", "super", "não", "nao"]
+
+
+class _Zipf:
+    """Amostragem de ranks 0..size-1 com P(rank) ~ 1 / (rank + 1) ** exponent."""
+
+    def __init__(self, size, exponent=1.1):
+        self.cumulative = list(itertools.accumulate(1.0 / (rank + 1) ** exponent for rank in range(size)))
+
+    def sample(self, rng):
+        return bisect.bisect_left(self.cumulative, rng.random() * self.cumulative[-1])
+
+
+def generate_realistic(
+    n=1000,
+    *,
+    vocabulary_size=5000,
+    hashtag_cardinality=500,
+    user_cardinality=2000,
+    duplicate_ratio=0.2,
+    time_window_minutes=30,
+    seed=42,
+    zipf_exponent=1.1,
+):
+    """Feed com distribuições próximas das de produção.
+
+    Vocabulário, hashtags e usuários seguem Zipf com expoente ``zipf_exponent`` (poucos
+    muito frequentes, cauda longa; menor = cauda mais pesada); ``duplicate_ratio`` das
+    mensagens repete um conteúdo anterior (reposts); ~5% dos timestamps caem fora da
+    janela e engajamento tem cauda pesada.
+    """
+    rng = random.Random(seed)
+    vocabulary = _Zipf(vocabulary_size, zipf_exponent)
+    hashtags = _Zipf(hashtag_cardinality, zipf_exponent)
+    users = _Zipf(user_cardinality, zipf_exponent)
+    now = datetime(2025, 9, 10, 11, 0, 0, tzinfo=timezone.utc)
+    window_seconds = time_window_minutes * 60
+
+    contents = []
+    msgs = []
+    for i in range(n):
+        if contents and rng.random() < duplicate_ratio:
+            # repost: conteúdos mais antigos (e populares) são repetidos com mais frequência
+            content = contents[users.sample(rng) % len(contents)]
+        else:
+            words = []
+            for _ in range(rng.randint(3, 20)):
+                roll = rng.random()
+                if roll < 0.15:
+                    words.append(rng.choice(SENTIMENT_WORDS))
+                elif roll < 0.22:
+                    words.append(rng.choice(MODIFIER_WORDS))
+                else:
+                    words.append(f"palavra{vocabulary.sample(rng)}")
+            content = " ".join(words)[:280]
+            contents.append(content)
+
+        user_rank = users.sample(rng)
+        user_id = f"user_mbras_{user_rank:05d}" if user_rank % 97 == 0 else f"user_{user_rank:05d}"
+        offset = rng.randrange(window_seconds + window_seconds // 20)
+        views = int(rng.paretovariate(1.2) * 50)
+        reactions = min(views, int(rng.expovariate(1 / 15)))
+        msgs.append({
+            "id": f"perf_{i:07d}",
+            "content": content,
+            "timestamp": (now - timedelta(seconds=offset)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "user_id": user_id,
+            "hashtags": [f"#tag{hashtags.sample(rng)}" for _ in range(rng.choice((0, 1, 1, 2, 3)))],
+            "reactions": reactions,
+            "shares": min(reactions, int(rng.expovariate(1 / 3))),
+            "views": views,
+        })
+    return {"messages": msgs, "time_window_minutes": time_window_minutes}
+
+
 if __name__ == "__main__":
-    data = generate(1000)
-    with open("performance_test_1000.json", "w", encoding="utf-8") as f:
+    # python generate_performance_data.py [n] [--realistic]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    n = int(args[0]) if args else 1000
+    if "--realistic" in sys.argv:
+        data, path = generate_realistic(n), f"performance_realistic_{n}.json"
+    else:
+        data, path = generate(n), f"performance_test_{n}.json"
+    with open(path, "w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False)
-    print("Wrote examples/performance_test_1000.json")
-
+    print(f"Wrote examples/{path}")
@@ -0,0 +1,349 @@
+import bisect
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sentiment_analyzer import (
+    FeedAnalyzer,
+    MessageRecord,
+    PartialAggregate,
+    StageTimings,
+    epoch_seconds,
+    get_lexicon,
+    refresh_lexicon,
+)
+
+
+
+# CONFIGURAÇÃO
+# Quanto histórico cada feed guarda; também é a maior janela aceita na análise
+DEFAULT_RETENTION_MINUTES = int(os.getenv("PULSECORE_FEED_RETENTION_MINUTES", "1440"))
+# Minutos por bloco de rollups: janelas longas combinam blocos inteiros e só os minutos das pontas
+BLOCK_MINUTES = 60
+
+
+
+# ROLLUPS POR MINUTO
+class _MinuteBucket:
+    """Mensagens de um minuto do feed e o agregado (rollup) delas.
+
+    As mensagens ficam ordenadas por (timestamp, ordem de chegada). O rollup é um
+    ``PartialAggregate`` com seqs a partir de 0, recalculado só quando o minuto
+    recebe mensagens novas ou o lexicon muda. Os registros completos (conteúdo
+    incluído) ficam no balde durante toda a retenção: são eles que o minuto da borda
+    refiltra e que o rollup repontua quando o lexicon muda.
+    """
+
+    __slots__ = ("minute", "keys", "records", "_rollup", "_lexicon")
+
+    def __init__(self, minute: int) -> None:
+        self.minute = minute
+        self.keys: List[Tuple[int, int]] = []
+        self.records: List[MessageRecord] = []
+        self._rollup: Optional[PartialAggregate] = None
+        self._lexicon: Any = None
+
+    def add(self, arrival: int, record: MessageRecord) -> None:
+        key = (record.timestamp, arrival)
+        index = bisect.bisect_right(self.keys, key)
+        self.keys.insert(index, key)
+        self.records.insert(index, record)
+        self._rollup = None
+
+    def discard_head(self, count: int) -> None:
+        del self.keys[:count]
+        del self.records[:count]
+        self._rollup = None
+
+    def rollup(self, timings: Optional[StageTimings] = None) -> PartialAggregate:
+        lexicon = get_lexicon()
+        if self._rollup is None or self._lexicon is not lexicon:
+            self._rollup = _aggregate(self.records, timings)
+            self._lexicon = lexicon
+        return self._rollup
+
+
+def _aggregate(records: Iterable[MessageRecord], timings: Optional[StageTimings] = None) -> PartialAggregate:
+    analyzer = FeedAnalyzer(timings=timings)
+    analyzer.ingest(records)
+    return analyzer.partial()
+
+
+class _Feed:
+    """Anel de minutos do feed: o minuto ``m`` ocupa ``slots[m % len(slots)]``.
+
+    Com um slot por minuto da retenção (mais o minuto do corte), um minuto só
+    reaproveita o slot de outro que já saiu da retenção. ``blocks`` guarda, por
+    bloco de ``BLOCK_MINUTES`` minutos, os rollups deles já combinados (com o
+    lexicon usado); um minuto que muda descarta o bloco dele.
+    """
+
+    __slots__ = ("slots", "blocks", "oldest_minute", "latest_timestamp", "next_arrival", "message_count")
+
+    def __init__(self, retention_minutes: int) -> None:
+        self.slots: List[Optional[_MinuteBucket]] = [None] * (retention_minutes + 1)
+        self.blocks: Dict[int, Tuple[Any, PartialAggregate]] = {}
+        # nenhum minuto anterior a este tem mensagens
+        self.oldest_minute: Optional[int] = None
+        self.latest_timestamp: Optional[int] = None
+        self.next_arrival = 0
+        self.message_count = 0
+
+    def bucket(self, minute: int) -> Optional[_MinuteBucket]:
+        bucket = self.slots[minute % len(self.slots)]
+        return bucket if bucket is not None and bucket.minute == minute else None
+
+    def buckets(self) -> Iterator[_MinuteBucket]:
+        return (bucket for bucket in self.slots if bucket is not None)
+
+    def block_rollup(self, block: int, timings: Optional[StageTimings] = None) -> PartialAggregate:
+        """Rollups dos minutos do bloco combinados em ordem, refeitos só se o bloco mudou."""
+        lexicon = get_lexicon()
+        cached = self.blocks.get(block)
+        if cached is not None and cached[0] is lexicon:
+            return cached[1]
+        rollup = PartialAggregate()
+        for minute in range(block * BLOCK_MINUTES, (block + 1) * BLOCK_MINUTES):
+            bucket = self.bucket(minute)
+            if bucket is not None:
+                rollup.merge(bucket.rollup(timings), seq_offset=rollup.message_count)
+        self.blocks[block] = (lexicon, rollup)
+        return rollup
+
+
+
+# STORE EM MEMÓRIA
+class FeedStore:
+    """Feeds recebidos aos poucos, analisados sem reenviar nem repontuar mensagens.
+
+    Cada mensagem é validada e pontuada uma vez, no rollup do seu minuto (mesmo
+    chegando atrasada); a análise de uma janela combina os blocos de minutos
+    inteiros que ela cobre, os rollups dos minutos restantes e só refiltra mensagem
+    a mensagem o minuto da borda. O resultado é o de ``analyze_feed`` sobre as
+    mensagens do feed ordenadas por timestamp (empates pela ordem de chegada).
+    Mensagens mais antigas que ``retention_minutes`` antes da mais recente são
+    descartadas.
+    """
+
+    def __init__(self, retention_minutes: int = DEFAULT_RETENTION_MINUTES) -> None:
+        self.retention_minutes = retention_minutes
+        self._feeds: Dict[str, _Feed] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, feed_id: str) -> bool:
+        return feed_id in self._feeds
+
+    def message_count(self, feed_id: str) -> int:
+        feed = self._feeds.get(feed_id)
+        return feed.message_count if feed is not None else 0
+
+    def append(self, feed_id: str, records: Iterable[MessageRecord]) -> int:
+        """Adiciona mensagens ao feed (criado na primeira aceita); retorna quantas foram aceitas."""
+        records = [record._replace(timestamp=epoch_seconds(record.timestamp)) for record in records]
+        with self._lock:
+            feed = self._feeds.get(feed_id) or _Feed(self.retention_minutes)
+            accepted = self._insert(feed, records)
+            if not accepted:
+                # o feed só passa a existir com alguma mensagem: sem ela não há janela a analisar
+                return 0
+            self._feeds[feed_id] = feed
+            self._persist(feed_id, accepted)
+            cutoff = self._enforce_retention(feed)
+            if cutoff is not None:
+                self._discard_before(feed_id, cutoff)
+        return len(accepted)
+
+    def _insert(self, feed: _Feed, records: List[MessageRecord]) -> List[Tuple[int, MessageRecord]]:
+        cutoff = self._cutoff(feed)
+        size = len(feed.slots)
+        accepted = []
+        for record in records:
+            arrival = feed.next_arrival
+            feed.next_arrival += 1
+            if cutoff is not None and record.timestamp < cutoff:
+                continue
+            minute = record.timestamp // 60
+            bucket = feed.slots[minute % size]
+            if bucket is None or bucket.minute != minute:
+                if bucket is not None:
+                    # minuto de uma volta anterior do anel, já fora da retenção
+                    feed.message_count -= len(bucket.records)
+                    feed.blocks.pop(bucket.minute // BLOCK_MINUTES, None)
+                bucket = feed.slots[minute % size] = _MinuteBucket(minute)
+            bucket.add(arrival, record)
+            feed.blocks.pop(minute // BLOCK_MINUTES, None)
+            feed.message_count += 1
+            if feed.oldest_minute is None or minute < feed.oldest_minute:
+                feed.oldest_minute = minute
+            if feed.latest_timestamp is None or record.timestamp > feed.latest_timestamp:
+                feed.latest_timestamp = record.timestamp
+                cutoff = self._cutoff(feed)
+            accepted.append((arrival, record))
+        return accepted
+
+    def _cutoff(self, feed: _Feed) -> Optional[int]:
+        if feed.latest_timestamp is None:
+            return None
+        return feed.latest_timestamp - self.retention_minutes * 60
+
+    def _enforce_retention(self, feed: _Feed) -> Optional[int]:
+        """Remove do feed as mensagens fora da retenção; retorna o corte se algo saiu."""
+        cutoff = self._cutoff(feed)
+        if cutoff is None or feed.oldest_minute * 60 >= cutoff:
+            return None
+
+        cutoff_minute = cutoff // 60
+        size = len(feed.slots)
+        # minutos inteiros antes do corte; depois de um salto maior que o anel, uma volta basta
+        for minute in range(max(feed.oldest_minute, cutoff_minute - size), cutoff_minute):
+            bucket = feed.slots[minute % size]
+            if bucket is not None and bucket.minute < cutoff_minute:
+                feed.message_count -= len(bucket.records)
+                feed.slots[minute % size] = None
+        feed.oldest_minute = cutoff_minute
+        for block in [block for block in feed.blocks if block <= cutoff_minute // BLOCK_MINUTES]:
+            del feed.blocks[block]
+
+        # o minuto do corte fica, só com as mensagens a partir dele
+        bucket = feed.bucket(cutoff_minute)
+        if bucket is not None and bucket.keys[0][0] < cutoff:
+            start = bisect.bisect_left(bucket.keys, (cutoff, -1))
+            feed.message_count -= start
+            if start == len(bucket.keys):
+                feed.slots[cutoff_minute % size] = None
+            else:
+                bucket.discard_head(start)
+        return cutoff
+
+    def analysis(
+        self,
+        feed_id: str,
+        window_minutes: int,
+        top_n_influencers: Optional[int] = None,
+        backend: Optional[str] = None,
+        timings: Optional[StageTimings] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Mesmo dicionário de ``analyze_feed`` para a janela; None se o feed não existe.
+
+        ``timings`` recebe a duração de cada etapa, incluindo a dos rollups refeitos.
+        """
+        if window_minutes > self.retention_minutes:
+            raise ValueError(f"Janela maior que a retenção do feed ({self.retention_minutes} minutos)")
+
+        started = time.perf_counter_ns()
+        refresh_lexicon()
+        with self._lock:
+            feed = self._feeds.get(feed_id)
+            if feed is None:
+                return None
+
+            lower_bound = feed.latest_timestamp - window_minutes * 60
+            last_minute = feed.latest_timestamp // 60
+            merged = PartialAggregate()
+            minute = lower_bound // 60
+            while minute <= last_minute:
+                if minute % BLOCK_MINUTES == 0 and minute * 60 >= lower_bound and minute + BLOCK_MINUTES <= last_minute:
+                    # bloco inteiro dentro da janela e anterior ao minuto mais recente
+                    merged.merge(feed.block_rollup(minute // BLOCK_MINUTES, timings), seq_offset=merged.message_count)
+                    minute += BLOCK_MINUTES
+                    continue
+                bucket = feed.bucket(minute)
+                minute += 1
+                if bucket is None:
+                    continue
+                if bucket.minute * 60 < lower_bound:
+                    # minuto da borda: só as mensagens dentro da janela
+                    start = bisect.bisect_left(bucket.keys, (lower_bound, -1))
+                    part = _aggregate(bucket.records[start:], timings)
+                else:
+                    part = bucket.rollup(timings)
+                merged.merge(part, seq_offset=merged.message_count)
+
+        result = merged.snapshot(top_n_influencers, backend, timings)
+        result["processing_time_ms"] = (time.perf_counter_ns() - started) / 1e6
+        return result
+
+    def close(self) -> None:
+        pass
+
+    # Pontos de extensão para persistência
+    def _persist(self, feed_id: str, accepted: List[Tuple[int, MessageRecord]]) -> None:
+        pass
+
+    def _discard_before(self, feed_id: str, cutoff: int) -> None:
+        pass
+
+
+
+# PERSISTÊNCIA EM SQLITE
+class SQLiteFeedStore(FeedStore):
+    """``FeedStore`` que grava as mensagens num arquivo SQLite e as recarrega ao abrir.
+
+    Só as mensagens são persistidas; os rollups são refeitos sob demanda.
+    """
+
+    def __init__(self, path: str, retention_minutes: int = DEFAULT_RETENTION_MINUTES) -> None:
+        super().__init__(retention_minutes)
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS messages (
+                feed_id TEXT NOT NULL,
+                arrival INTEGER NOT NULL,
+                id TEXT NOT NULL,
+                content TEXT NOT NULL,
+                timestamp INTEGER NOT NULL,
+                user_id TEXT NOT NULL,
+                hashtags TEXT NOT NULL,
+                reactions INTEGER NOT NULL,
+                shares INTEGER NOT NULL,
+                views INTEGER NOT NULL,
+                PRIMARY KEY (feed_id, arrival)
+            );
+            CREATE INDEX IF NOT EXISTS messages_by_time ON messages (feed_id, timestamp);
+            """
+        )
+        self._load()
+
+    def _load(self) -> None:
+        rows = self._connection.execute(
+            "SELECT feed_id, arrival, id, content, timestamp, user_id, hashtags, reactions, shares, views"
+            " FROM messages ORDER BY feed_id, arrival"
+        )
+        for feed_id, arrival, *fields in rows:
+            feed = self._feeds.get(feed_id) or _Feed(self.retention_minutes)
+            feed.next_arrival = arrival
+            fields[4] = json.loads(fields[4])
+            if self._insert(feed, [MessageRecord(*fields)]):
+                self._feeds[feed_id] = feed
+        for feed in self._feeds.values():
+            self._enforce_retention(feed)
+
+    def _persist(self, feed_id: str, accepted: List[Tuple[int, MessageRecord]]) -> None:
+        with self._connection:
+            self._connection.executemany(
+                "INSERT INTO messages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (feed_id, arrival, record.id, record.content, record.timestamp, record.user_id,
+                     json.dumps(record.hashtags), record.reactions, record.shares, record.views)
+                    for arrival, record in accepted
+                ],
+            )
+
+    def _discard_before(self, feed_id: str, cutoff: int) -> None:
+        with self._connection:
+            self._connection.execute("DELETE FROM messages WHERE feed_id = ? AND timestamp < ?", (feed_id, cutoff))
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+def open_feed_store(path: Optional[str] = None, retention_minutes: int = DEFAULT_RETENTION_MINUTES) -> FeedStore:
+    """SQLite em ``path`` quando informado, senão só em memória."""
+    if path:
+        return SQLiteFeedStore(path, retention_minutes)
+    return FeedStore(retention_minutes)
@@ -1,10 +1,53 @@
-from fastapi import FastAPI 
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field
+import asyncio
+import bisect
+import functools
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import BrokenExecutor
+from fastapi import FastAPI, Query, Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, Field, ValidationError
 from datetime import datetime
-from typing import List, Any
+from typing import TYPE_CHECKING, AsyncIterator, Callable, List, Any, Optional, Tuple
 
-from sentiment_analyzer import analyze_feed
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson é opcional
+    orjson = None
+
+from feed_store import open_feed_store
+from sentiment_analyzer import (
+    STAGES,
+    MessageBatch,
+    MessageRecord,
+    StageTimings,
+    LRUCache,
+    StreamingFeedAnalyzer,
+    analyze_feed,
+    analyze_feed_timed,
+    analyze_feeds,
+    create_process_pool,
+    epoch_seconds,
+    get_lexicon,
+    parse_epoch,
+    refresh_lexicon,
+    warm_up,
+    with_lexicon_version,
+)
+
+if TYPE_CHECKING:
+    # o pool só é importado (com multiprocessing) quando criado
+    from concurrent.futures import ProcessPoolExecutor
+
+
+# Faixa das colunas int64 (array "q") do MessageBatch: contadores fora dela são 422, não OverflowError
+INT64_MIN, INT64_MAX = -2 ** 63, 2 ** 63 - 1
 
 
 class Message(BaseModel):
@@ -13,22 +56,272 @@ class Message(BaseModel):
     timestamp: datetime
     user_id: str = Field(..., alias="user_id")
     hashtags: List[str]
-    reactions: int
-    shares: int
-    views: int
+    reactions: int = Field(..., ge=INT64_MIN, le=INT64_MAX)
+    shares: int = Field(..., ge=INT64_MIN, le=INT64_MAX)
+    views: int = Field(..., ge=INT64_MIN, le=INT64_MAX)
 
 
 class AnalyzeRequest(BaseModel):
-    messages: List[Message]
-    time_window_minutes: int
+    # Cada mensagem é validada por _message_record (caminho rápido + Message)
+    messages: List[Any]
+    time_window_minutes: int = Field(..., ge=1)
+    # Limita o tamanho de influence_ranking (None = todos os usuários)
+    top_n_influencers: Optional[int] = Field(None, ge=1)
+
+
+class FeedRequest(BaseModel):
+    feed_id: str
+    messages: List[Any]
+    time_window_minutes: int = Field(..., ge=1)
+    top_n_influencers: Optional[int] = Field(None, ge=1)
+
+
+class AppendRequest(BaseModel):
+    messages: List[Any]
+
+
+NDJSON_MEDIA_TYPES = {"application/x-ndjson", "application/ndjson"}
+
+# Formato documentado das mensagens; o que não casa passa pela validação completa do pydantic
+USER_ID_PATTERN = re.compile(r"user_[a-z0-9_]{3,}", re.IGNORECASE)
+TIMESTAMP_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}Z", re.ASCII)
+MAX_CONTENT_LENGTH = 280
+
+
+# Pool de processos para o trabalho de CPU; PULSECORE_WORKERS=0 analisa no próprio processo
+ANALYSIS_WORKERS = int(os.getenv("PULSECORE_WORKERS", os.cpu_count() or 1))
+# Feeds menores que isso são analisados inline: o IPC custaria mais que a análise
+OFFLOAD_MIN_MESSAGES = 500
+# Feeds por tarefa enviada ao pool, para amortizar o pickling
+FEEDS_PER_TASK = 8
+
+_executor: Optional["ProcessPoolExecutor"] = None
+
+
+def get_executor() -> Optional["ProcessPoolExecutor"]:
+    global _executor
+    if _executor is None and ANALYSIS_WORKERS > 0:
+        _executor = create_process_pool(ANALYSIS_WORKERS)
+    return _executor
+
+
+def _discard_executor(broken: "ProcessPoolExecutor") -> None:
+    """Descarta um pool quebrado; o próximo ``get_executor()`` cria outro."""
+    global _executor
+    if _executor is broken:
+        _executor = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
+
+
+# Cache de respostas do /analyze-feed: a análise é determinística para o mesmo feed e lexicon.
+# PULSECORE_RESULT_CACHE_TTL=0 desliga o cache.
+RESULT_CACHE_TTL_SECONDS = float(os.getenv("PULSECORE_RESULT_CACHE_TTL", "30"))
+RESULT_CACHE = LRUCache(max_entries=1024, max_bytes=int(os.getenv("PULSECORE_RESULT_CACHE_MB", "64")) * 1024 * 1024)
+# Custo estimado de um apelido: digest do corpo bruto -> ETag da resposta
+_ALIAS_ENTRY_BYTES = 128
+# Entradas: ETag -> (expira em, ETag, corpo) e apelidos. Sem hits/misses do LRU, que contam os apelidos.
+RESULT_CACHE_REQUESTS = {"hit": 0, "miss": 0}
+
+
+# Métricas por etapa; PULSECORE_METRICS=0 desliga a instrumentação (processing_time_ms continua real)
+METRICS_ENABLED = os.getenv("PULSECORE_METRICS", "1") != "0"
+# Com este header, a resposta traz a duração de cada etapa em Server-Timing
+DEBUG_TIMINGS_HEADER = "x-debug-timings"
+# Limites superiores (segundos) dos buckets dos histogramas
+METRIC_BUCKETS_SECONDS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Histogram:
+    __slots__ = ("bucket_counts", "count", "sum")
+
+    def __init__(self) -> None:
+        # um contador por bucket (o último é +Inf); acumulados só na exposição
+        self.bucket_counts = [0] * (len(METRIC_BUCKETS_SECONDS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.bucket_counts[bisect.bisect_left(METRIC_BUCKETS_SECONDS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def exposition(self, name: str, labels: str = "") -> List[str]:
+        prefix = labels + "," if labels else ""
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(METRIC_BUCKETS_SECONDS + ("+Inf",), self.bucket_counts):
+            cumulative += bucket_count
+            lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {self.sum!r}")
+        lines.append(f"{name}_count{suffix} {self.count}")
+        return lines
+
+
+ANALYSIS_HISTOGRAM = _Histogram()
+STAGE_HISTOGRAMS = {stage: _Histogram() for stage in STAGES}
+
+
+def _record_timings(analysis: dict, stage_ms: Optional[dict]) -> None:
+    if not METRICS_ENABLED or stage_ms is None:
+        return
+    ANALYSIS_HISTOGRAM.observe(analysis["processing_time_ms"] / 1000)
+    for stage, duration_ms in stage_ms.items():
+        STAGE_HISTOGRAMS[stage].observe(duration_ms / 1000)
+
+
+def _wants_timings(request: Request) -> bool:
+    return request.headers.get(DEBUG_TIMINGS_HEADER, "").lower() in {"1", "true"}
+
+
+def _server_timing(analysis: dict, stage_ms: dict) -> str:
+    entries = [f"{stage};dur={duration_ms:.3f}" for stage, duration_ms in stage_ms.items()]
+    entries.append(f"total;dur={analysis['processing_time_ms']:.3f}")
+    return ", ".join(entries)
+
+
+def render_metrics() -> str:
+    """Histogramas acumulados desde o início do processo, no formato texto do Prometheus."""
+    lines = [
+        "# HELP pulsecore_analysis_duration_seconds Tempo total de processamento de cada análise.",
+        "# TYPE pulsecore_analysis_duration_seconds histogram",
+    ]
+    lines += ANALYSIS_HISTOGRAM.exposition("pulsecore_analysis_duration_seconds")
+    lines += [
+        "# HELP pulsecore_stage_duration_seconds Tempo de cada etapa da análise.",
+        "# TYPE pulsecore_stage_duration_seconds histogram",
+    ]
+    for stage, histogram in STAGE_HISTOGRAMS.items():
+        lines += histogram.exposition("pulsecore_stage_duration_seconds", f'stage="{stage}"')
+
+    hits, misses = RESULT_CACHE_REQUESTS["hit"], RESULT_CACHE_REQUESTS["miss"]
+    lines += [
+        "# HELP pulsecore_result_cache_requests_total Requisições do /analyze-feed por resultado no cache de respostas.",
+        "# TYPE pulsecore_result_cache_requests_total counter",
+        f'pulsecore_result_cache_requests_total{{result="hit"}} {hits}',
+        f'pulsecore_result_cache_requests_total{{result="miss"}} {misses}',
+        "# HELP pulsecore_result_cache_hit_ratio Fração das requisições do /analyze-feed servidas pelo cache.",
+        "# TYPE pulsecore_result_cache_hit_ratio gauge",
+        f"pulsecore_result_cache_hit_ratio {hits / (hits + misses) if hits + misses else 0.0!r}",
+        "# HELP pulsecore_result_cache_bytes Bytes estimados das respostas em cache.",
+        "# TYPE pulsecore_result_cache_bytes gauge",
+        f"pulsecore_result_cache_bytes {RESULT_CACHE.stats()['bytes']}",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+# JSON rápido: orjson quando instalado, senão a stdlib
+def json_loads(data: bytes) -> Any:
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # NaN, inteiros acima de 64 bits, surrogates soltos: a stdlib decide
+            pass
+    return json.loads(data)
+
+
+# Respostas já serializadas, sem passar pelo jsonable_encoder do FastAPI
+FastJSONResponse = ORJSONResponse if orjson is not None else JSONResponse
+
+
+class _FastJSONRequest(Request):
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            self._json = json_loads(await self.body())
+        return self._json
+
+
+class FastJSONRoute(APIRoute):
+    """Rota que decodifica corpos JSON com ``json_loads``."""
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            return await handler(_FastJSONRequest(request.scope, request.receive))
+
+        return route_handler
 
 
 app = FastAPI()
+app.router.route_class = FastJSONRoute
+app.add_event_handler("shutdown", shutdown_executor)
 
 
-@app.post("/analyze-feed")
-async def analyze_feed_endpoint(request: AnalyzeRequest) -> Any:
-    if request.time_window_minutes == 123:
+# Aquecimento na subida (lexicon, NumPy, processos do pool); /ready responde 503 até ele terminar
+_warm_up_task: Optional["asyncio.Task[None]"] = None
+_warm = False
+_warm_lock = threading.Lock()
+
+
+def _ensure_warm() -> None:
+    """Aquece este processo uma única vez; chamadas concorrentes esperam a que está em curso."""
+    global _warm
+    with _warm_lock:
+        if not _warm:
+            warm_up()
+            _warm = True
+
+
+async def _warm_up() -> None:
+    executor = get_executor()
+    if executor is not None:
+        # uma tarefa por worker sobe todos os processos; cada um se aquece no initializer
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(executor, os.getpid) for _ in range(ANALYSIS_WORKERS)))
+    await asyncio.to_thread(_ensure_warm)
+
+
+async def start_warm_up() -> None:
+    global _warm_up_task
+    _warm_up_task = asyncio.create_task(_warm_up())
+
+
+app.add_event_handler("startup", start_warm_up)
+
+
+async def _warmed_up() -> None:
+    """Segura a análise até o aquecimento terminar.
+
+    Sem evento de startup (ex.: ``TestClient`` fora de ``with``) quem aquece é a primeira análise.
+    """
+    if not _warm:
+        await asyncio.to_thread(_ensure_warm)
+
+
+# Feeds mantidos pelo servidor (POST /feeds/{feed_id}/messages); SQLite se configurado
+FEED_STORE = open_feed_store(os.getenv("PULSECORE_FEED_DB"))
+app.add_event_handler("shutdown", FEED_STORE.close)
+
+
+async def _run_analysis(function: Any, *args: Any, **kwargs: Any) -> Any:
+    """Executa ``function`` no pool (sem bloquear o event loop) ou inline sem pool.
+
+    Um worker que morre (OOM, sinal) quebra o pool inteiro: ele é trocado por um novo e a
+    tarefa tenta de novo uma vez; se o pool novo também quebrar, a análise roda inline.
+    """
+    call = functools.partial(function, *args, **kwargs)
+    for _ in range(2):
+        executor = get_executor()
+        if executor is None:
+            break
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, call)
+        except BrokenExecutor:
+            _discard_executor(executor)
+    return call()
+
+
+def _unsupported_time_window(time_window_minutes: int) -> Optional[JSONResponse]:
+    if time_window_minutes == 123:
         return JSONResponse(
             status_code=422,
             content={
@@ -36,15 +329,343 @@ async def analyze_feed_endpoint(request: AnalyzeRequest) -> Any:
                 "code": "UNSUPPORTED_TIME_WINDOW",
             },
         )
+    return None
+
+
+def _is_count(value: Any) -> bool:
+    return type(value) is int and 0 <= value <= INT64_MAX
+
+
+def _fast_message_record(raw: Any) -> Optional[MessageRecord]:
+    """Valida sem pydantic uma mensagem no formato documentado; None se precisar do caminho completo."""
+    if type(raw) is not dict:
+        return None
+    try:
+        message_id, content, timestamp = raw["id"], raw["content"], raw["timestamp"]
+        user_id, hashtags = raw["user_id"], raw["hashtags"]
+        reactions, shares, views = raw["reactions"], raw["shares"], raw["views"]
+    except KeyError:
+        return None
+
+    if not (
+        type(message_id) is str
+        and type(content) is str
+        and len(content) <= MAX_CONTENT_LENGTH
+        and type(user_id) is str
+        and USER_ID_PATTERN.fullmatch(user_id)
+        and type(timestamp) is str
+        and TIMESTAMP_PATTERN.fullmatch(timestamp)
+        and type(hashtags) is list
+        and all(type(hashtag) is str and hashtag.startswith("#") for hashtag in hashtags)
+        and _is_count(reactions)
+        and _is_count(shares)
+        and _is_count(views)
+    ):
+        return None
+
+    try:
+        epoch = parse_epoch(timestamp)
+    except ValueError:
+        return None
+
+    return MessageRecord(message_id, content, epoch, user_id, hashtags, reactions, shares, views)
+
+
+def _message_record(raw: Any, loc: Tuple[Any, ...]) -> MessageRecord:
+    record = _fast_message_record(raw)
+    if record is not None:
+        return record
+
+    try:
+        message = Message.model_validate(raw) if hasattr(Message, "model_validate") else Message.parse_obj(raw)
+    except ValidationError as exc:
+        raise RequestValidationError(
+            [dict(error, loc=loc + tuple(error["loc"])) for error in exc.errors()]
+        ) from None
+    return MessageRecord(
+        message.id, message.content, message.timestamp, message.user_id,
+        message.hashtags, message.reactions, message.shares, message.views,
+    )
+
+
+async def _iter_ndjson_lines(request: Request) -> AsyncIterator[Tuple[int, bytes]]:
+    """Linhas não vazias do corpo, lidas conforme os chunks chegam.
+
+    Só o chunk novo é dividido; os pedaços de uma linha que atravessa vários chunks
+    são juntados uma vez, quando ela termina — cada byte é copiado O(1) vezes.
+    """
+    pending: List[bytes] = []
+    line_number = 0
+    async for chunk in request.stream():
+        lines = chunk.split(b"\n")
+        if len(lines) == 1:
+            pending.append(chunk)
+            continue
+        pending.append(lines[0])
+        lines[0] = b"".join(pending)
+        pending = [lines.pop()]
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield line_number, line
+    line = b"".join(pending)
+    if line.strip():
+        yield line_number + 1, line
+
+
+def _feed_fingerprint(
+    messages: List[MessageRecord], time_window_minutes: int, top_n_influencers: Optional[int], lexicon_version: str
+) -> str:
+    """Digest dos campos validados: o mesmo para o mesmo feed, qualquer que seja a formatação do JSON."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((time_window_minutes, top_n_influencers, lexicon_version)).encode())
+    for record in messages:
+        digest.update(repr(record._replace(timestamp=epoch_seconds(record.timestamp))).encode())
+    return digest.hexdigest()
+
+
+def _cached_response(key: Any) -> Optional[Tuple[str, bytes]]:
+    """(etag, corpo) em cache para ``key``, seguindo apelidos; None se ausente ou expirado."""
+    entry = RESULT_CACHE.get(key)
+    if type(entry) is str:
+        entry = RESULT_CACHE.get(entry)
+    if entry is None or entry[0] < time.monotonic():
+        return None
+    return entry[1], entry[2]
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # comparação fraca (RFC 9110): W/"x" e "x" representam a mesma resposta
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag.removeprefix("W/") in {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+
+
+def _cache_response(http_request: Request, etag: str, body: Optional[bytes]) -> Response:
+    RESULT_CACHE_REQUESTS["hit"] += 1
+    if _etag_matches(http_request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(body, media_type="application/json", headers={"ETag": etag})
+
+
+def _feed_etag(messages: List[MessageRecord], request: AnalyzeRequest, lexicon_version: str) -> str:
+    fingerprint = _feed_fingerprint(messages, request.time_window_minutes, request.top_n_influencers, lexicon_version)
+    return f'W/"{fingerprint}"'
+
+
+def _cached_feed_response(http_request: Request, etag: str, raw_key: Any) -> Optional[Response]:
+    """Resposta para o feed já validado, se está em cache ou o cliente já a tem; senão conta o miss."""
+    cached = _cached_response(etag)
+    if cached is not None:
+        RESULT_CACHE.put(raw_key, etag, _ALIAS_ENTRY_BYTES)
+        return _cache_response(http_request, *cached)
+    if _etag_matches(http_request.headers.get("if-none-match"), etag):
+        # o cliente já tem esta resposta, mesmo que ela tenha saído do cache
+        RESULT_CACHE_REQUESTS["hit"] += 1
+        return Response(status_code=304, headers={"ETag": etag})
+    RESULT_CACHE_REQUESTS["miss"] += 1
+    return None
+
+
+def _store_response(response: Response, etag: str, raw_key: Any) -> None:
+    expires_at = time.monotonic() + RESULT_CACHE_TTL_SECONDS
+    RESULT_CACHE.put(etag, (expires_at, etag, response.body), len(response.body))
+    RESULT_CACHE.put(raw_key, etag, _ALIAS_ENTRY_BYTES)
+    response.headers["ETag"] = etag
+
+
+@app.post("/analyze-feed")
+async def analyze_feed_endpoint(request: AnalyzeRequest, http_request: Request) -> Any:
+    error_response = _unsupported_time_window(request.time_window_minutes)
+    if error_response is not None:
+        return error_response
+
+    debug_timings = _wants_timings(http_request)
+    # Server-Timing descreve uma análise de verdade: com o header de debug o cache não é usado
+    use_cache = RESULT_CACHE_TTL_SECONDS > 0 and not debug_timings
+    await _warmed_up()
+    if use_cache:
+        refresh_lexicon()
+        lexicon_version = get_lexicon().version
+        # Mesmos bytes: nem revalida as mensagens
+        body_digest = hashlib.blake2b(await http_request.body(), digest_size=16).digest()
+        raw_key = ("raw", body_digest, lexicon_version)
+        cached = _cached_response(raw_key)
+        if cached is not None:
+            return _cache_response(http_request, *cached)
 
     messages = [
-        m.model_dump() if hasattr(m, "model_dump") else m.dict()
-        for m in request.messages
+        _message_record(raw, ("body", "messages", index))
+        for index, raw in enumerate(request.messages)
     ]
 
-    analysis = analyze_feed(
-        messages=messages,
-        time_window_minutes=request.time_window_minutes,
-    )
+    if use_cache:
+        etag = _feed_etag(messages, request, lexicon_version)
+        cached = _cached_feed_response(http_request, etag, raw_key)
+        if cached is not None:
+            return cached
+
+    timed = METRICS_ENABLED or debug_timings
+    function = analyze_feed_timed if timed else analyze_feed
+    # A versão do lexicon vem de quem analisou: um worker do pool pode estar com outro
+    if len(messages) >= OFFLOAD_MIN_MESSAGES:
+        # O lote colunar atravessa o limite do processo bem mais barato que os registros
+        outcome, used_version = await _run_analysis(
+            with_lexicon_version,
+            function,
+            MessageBatch.from_messages(messages),
+            request.time_window_minutes,
+            top_n_influencers=request.top_n_influencers,
+        )
+    else:
+        outcome, used_version = with_lexicon_version(
+            function,
+            messages,
+            request.time_window_minutes,
+            top_n_influencers=request.top_n_influencers,
+        )
+    analysis, stage_ms = outcome if timed else (outcome, None)
+
+    _record_timings(analysis, stage_ms)
+    response = FastJSONResponse({"analysis": analysis})
+    if debug_timings:
+        response.headers["Server-Timing"] = _server_timing(analysis, stage_ms)
+    # lexicon trocado no meio da análise: sem versão, a resposta não é guardada
+    if use_cache and used_version is not None:
+        if used_version != lexicon_version:
+            etag, raw_key = _feed_etag(messages, request, used_version), ("raw", body_digest, used_version)
+        _store_response(response, etag, raw_key)
+    return response
+
+
+@app.post("/analyze-feeds")
+async def analyze_feeds_endpoint(feeds: List[FeedRequest]) -> Any:
+    """Analisa vários feeds independentes em paralelo; resultados por feed_id."""
+    feed_ids = [feed.feed_id for feed in feeds]
+    if len(set(feed_ids)) != len(feed_ids):
+        return JSONResponse(
+            status_code=422,
+            content={"error": "feed_id repetido na requisição", "code": "DUPLICATE_FEED_ID"},
+        )
+
+    await _warmed_up()
+    results: dict = {}
+    jobs = []
+    for index, feed in enumerate(feeds):
+        error_response = _unsupported_time_window(feed.time_window_minutes)
+        if error_response is not None:
+            results[feed.feed_id] = json.loads(error_response.body)
+            continue
+        batch = MessageBatch.from_messages(
+            _message_record(raw, ("body", index, "messages", message_index))
+            for message_index, raw in enumerate(feed.messages)
+        )
+        jobs.append((feed.feed_id, batch, feed.time_window_minutes, feed.top_n_influencers))
+
+    chunks = [jobs[start:start + FEEDS_PER_TASK] for start in range(0, len(jobs), FEEDS_PER_TASK)]
+    for chunk_results in await asyncio.gather(*(_run_analysis(analyze_feeds, chunk) for chunk in chunks)):
+        for feed_id, analysis, stage_ms in chunk_results:
+            _record_timings(analysis, stage_ms)
+            results[feed_id] = {"analysis": analysis}
+
+    # Mantém a ordem dos feeds da requisição
+    return FastJSONResponse({"results": {feed_id: results[feed_id] for feed_id in feed_ids}})
+
+
+@app.post("/analyze-feed/stream")
+async def analyze_feed_stream_endpoint(
+    request: Request,
+    time_window_minutes: int = Query(..., ge=1),
+    top_n_influencers: Optional[int] = Query(None, ge=1),
+    approximate: bool = Query(False),
+) -> Any:
+    """Mesma análise de /analyze-feed, com uma mensagem JSON por linha (NDJSON).
+
+    ``approximate`` troca os mapas exatos de hashtags e usuários por sketches de tamanho fixo.
+    """
+    error_response = _unsupported_time_window(time_window_minutes)
+    if error_response is not None:
+        return error_response
+
+    media_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if media_type not in NDJSON_MEDIA_TYPES:
+        return JSONResponse(
+            status_code=415,
+            content={"error": "Envie as mensagens como application/x-ndjson", "code": "UNSUPPORTED_MEDIA_TYPE"},
+        )
+
+    await _warmed_up()
+    debug_timings = _wants_timings(request)
+    timings = StageTimings() if METRICS_ENABLED or debug_timings else None
+    stream_analyzer = StreamingFeedAnalyzer(time_window_minutes, timings=timings, approximate=approximate)
+    async for line_number, line in _iter_ndjson_lines(request):
+        try:
+            stream_analyzer.add(_message_record(json_loads(line), ("body", line_number)))
+        except (RequestValidationError, ValueError):
+            return JSONResponse(
+                status_code=400,
+                content={"error": f"Mensagem inválida na linha {line_number}", "code": "INVALID_MESSAGE"},
+            )
+
+    analysis = stream_analyzer.result(top_n_influencers)
+    stage_ms = timings.as_ms() if timings is not None else None
+    _record_timings(analysis, stage_ms)
+    response = FastJSONResponse({"analysis": analysis})
+    if debug_timings:
+        response.headers["Server-Timing"] = _server_timing(analysis, stage_ms)
+    return response
+
+
+@app.post("/feeds/{feed_id}/messages")
+async def append_feed_messages_endpoint(feed_id: str, request: AppendRequest) -> Any:
+    """Acrescenta mensagens a um feed mantido pelo servidor."""
+    records = [
+        _message_record(raw, ("body", "messages", index))
+        for index, raw in enumerate(request.messages)
+    ]
+    accepted = await asyncio.to_thread(FEED_STORE.append, feed_id, records)
+    return {"feed_id": feed_id, "accepted": accepted, "message_count": FEED_STORE.message_count(feed_id)}
+
+
+@app.get("/feeds/{feed_id}/analysis")
+async def feed_analysis_endpoint(
+    feed_id: str,
+    window: int = Query(..., ge=1),
+    top_n_influencers: Optional[int] = Query(None, ge=1),
+) -> Any:
+    """Análise da janela de ``window`` minutos de um feed mantido pelo servidor."""
+    error_response = _unsupported_time_window(window)
+    if error_response is not None:
+        return error_response
+    if window > FEED_STORE.retention_minutes:
+        return JSONResponse(
+            status_code=422,
+            content={
+                "error": f"Janela maior que a retenção do feed ({FEED_STORE.retention_minutes} minutos)",
+                "code": "WINDOW_EXCEEDS_RETENTION",
+            },
+        )
+
+    await _warmed_up()
+    timings = StageTimings() if METRICS_ENABLED else None
+    analysis = await asyncio.to_thread(FEED_STORE.analysis, feed_id, window, top_n_influencers, timings=timings)
+    if analysis is None:
+        return JSONResponse(status_code=404, content={"error": "Feed não encontrado", "code": "FEED_NOT_FOUND"})
+    _record_timings(analysis, timings.as_ms() if timings is not None else None)
+    return FastJSONResponse({"analysis": analysis})
+
+
+@app.get("/metrics")
+async def metrics_endpoint() -> PlainTextResponse:
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 
-    return {"analysis": analysis}
+@app.get("/ready")
+async def ready_endpoint() -> Any:
+    if _warm_up_task is None or not _warm_up_task.done():
+        return JSONResponse(status_code=503, content={"status": "warming_up"})
+    if _warm_up_task.cancelled() or _warm_up_task.exception() is not None:
+        return JSONResponse(status_code=503, content={"status": "warm_up_failed"})
+    return {"status": "ready"}
@@ -1,9 +1,44 @@
+import calendar
 import hashlib
+import heapq
+import importlib
+import importlib.util
 import math
+import os
+import re
+import sys
+import threading
+import time
 import unicodedata
-from collections import defaultdict, Counter
-from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List, Tuple
+from array import array
+from collections import defaultdict, Counter, OrderedDict
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from concurrent.futures import BrokenExecutor
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, TypedDict
+
+if TYPE_CHECKING:
+    # o pool só é importado (com multiprocessing) quando criado
+    from concurrent.futures import ProcessPoolExecutor
+
+
+
+# IMPORTS SOB DEMANDA
+class _LazyModule:
+    """Módulo importado no primeiro acesso a um atributo, que então assume o nome global."""
+
+    def __init__(self, module_name: str, global_name: str) -> None:
+        self._module_name = module_name
+        self._global_name = global_name
+
+    def __getattr__(self, attribute: str) -> Any:
+        module = importlib.import_module(self._module_name)
+        globals()[self._global_name] = module
+        return getattr(module, attribute)
+
+
+# NumPy é opcional e o import custa ~60 ms: só entra no primeiro uso do backend
+np: Any = _LazyModule("numpy", "np") if importlib.util.find_spec("numpy") is not None else None
 
 
 
@@ -25,82 +60,511 @@ SPECIAL_META_TRIGGER = "teste tecnico mbras"
 
 
 
+# CACHES LIMITADOS
+class LRUCache:
+    """Cache LRU limitado por número de entradas e por bytes estimados."""
+
+    def __init__(self, max_entries: int, max_bytes: int) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[Any, Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key: Any, value: Any, size: int) -> None:
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+        with self._lock:
+            previous = self._data.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._data[key] = (value, size)
+            self._bytes += size
+            self._evict()
+
+    def _evict(self) -> None:
+        while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+            _, (_, size) = self._data.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+
+    def configure(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None) -> None:
+        """Ajusta os limites, descartando as entradas mais antigas se necessário."""
+        with self._lock:
+            if max_entries is not None:
+                self.max_entries = max_entries
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self) -> None:
+        """Esvazia o cache e zera os contadores."""
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+# Resultado de scan_content por conteúdo (independente do usuário)
+SCAN_CACHE = LRUCache(max_entries=4096, max_bytes=4 * 1024 * 1024)
+# normalize_text para textos não-ASCII (os ASCII custam só um lower())
+NORMALIZE_CACHE = LRUCache(max_entries=8192, max_bytes=1024 * 1024)
+# get_follower_count por user_id
+FOLLOWER_CACHE = LRUCache(max_entries=65536, max_bytes=8 * 1024 * 1024)
+# Epoch do minuto por prefixo "YYYY-MM-DDTHH:MM" (rajadas repetem o mesmo minuto).
+# Dict simples: um lookup no LRUCache custaria mais que o próprio parse do prefixo.
+MINUTE_EPOCH_CACHE: Dict[str, int] = {}
+MINUTE_EPOCH_CACHE_SIZE = 4096
+
+
+def clear_caches() -> None:
+    SCAN_CACHE.clear()
+    NORMALIZE_CACHE.clear()
+    FOLLOWER_CACHE.clear()
+    MINUTE_EPOCH_CACHE.clear()
+
+
+def cache_stats() -> Dict[str, Dict[str, int]]:
+    return {
+        "scan": SCAN_CACHE.stats(),
+        "normalize": NORMALIZE_CACHE.stats(),
+        "followers": FOLLOWER_CACHE.stats(),
+    }
+
+
+
+# INSTRUMENTAÇÃO POR ETAPA
+STAGES = ("parse", "window", "sentiment", "flags", "engagement", "influence", "trending", "anomaly")
+
+
+class _Span:
+    __slots__ = ("_durations", "_stage", "_start")
+
+    def __init__(self, durations: Dict[str, int], stage: str) -> None:
+        self._durations = durations
+        self._stage = stage
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter_ns()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._durations[self._stage] += time.perf_counter_ns() - self._start
+
+
+class StageTimings:
+    """Tempo acumulado (ns, ``perf_counter_ns``) de cada etapa da análise."""
+
+    __slots__ = ("durations_ns",)
+
+    def __init__(self) -> None:
+        self.durations_ns = dict.fromkeys(STAGES, 0)
+
+    def span(self, stage: str) -> Any:
+        return _Span(self.durations_ns, stage)
+
+    def merge(self, other: "StageTimings") -> None:
+        for stage, duration in other.durations_ns.items():
+            self.durations_ns[stage] += duration
+
+    def as_ms(self) -> Dict[str, float]:
+        return {stage: duration / 1e6 for stage, duration in self.durations_ns.items()}
+
+
+class _NullTimings(StageTimings):
+    """Instrumentação desligada: cada span é um context manager vazio compartilhado."""
+
+    __slots__ = ()
+    _NULL_SPAN = nullcontext()
+
+    def span(self, stage: str) -> Any:
+        return self._NULL_SPAN
+
+    def merge(self, other: StageTimings) -> None:
+        pass
+
+
+NULL_TIMINGS = _NullTimings()
+
+
+
 # FUNÇÕES UTILITÁRIAS
-def normalize_text(text: str) -> str:
-    """Remove acentuação e converte para lowercase ASCII."""
+def _normalize_uncached(text: str) -> str:
+    if text.isascii():
+        return text.lower()
     normalized = unicodedata.normalize("NFKD", text)
     return normalized.encode("ascii", "ignore").decode("ascii").lower()
 
 
-def tokenize(text: str) -> List[str]:
-    """Tokenização simples preservando hashtags e underscores."""
-    tokens = []
-    current_token_chars = []
+def normalize_text(text: str) -> str:
+    """Remove acentuação e converte para lowercase ASCII."""
+    if text.isascii():
+        return text.lower()
 
-    for character in text:
-        if character.isalnum() or character in {"#", "_"}:
-            current_token_chars.append(character)
-        else:
-            if current_token_chars:
-                tokens.append("".join(current_token_chars))
-                current_token_chars = []
-    if current_token_chars:
-        tokens.append("".join(current_token_chars))
+    cached = NORMALIZE_CACHE.get(text)
+    if cached is not None:
+        return cached
 
-    return tokens
+    result = _normalize_uncached(text)
+    NORMALIZE_CACHE.put(text, result, sys.getsizeof(text) + sys.getsizeof(result))
+    return result
 
 
+# Equivale a str.isalnum() ou '#'/'_' caractere a caractere
+_TOKEN_PATTERN = re.compile(r"[\w#]+")
 
-# ANÁLISE DE SENTIMENTO POR MENSAGEM
-def compute_sentiment_for_message(content: str, user_id: str) -> Tuple[float, str]:
-    tokens = tokenize(content)
-    if not tokens:
-        return 0.0, "neutral"
 
-    normalized_tokens = [normalize_text(token) for token in tokens]
-    normalized_content = normalize_text(content)
-    
-    if normalized_content == normalize_text(SPECIAL_META_TRIGGER):
-        return 0.0, "meta"
+def tokenize(text: str) -> List[str]:
+    """Tokenização simples preservando hashtags e underscores."""
+    return _TOKEN_PATTERN.findall(text)
 
-    sentiment_hits: List[Tuple[int, float]] = []
 
-    for index, token in enumerate(normalized_tokens):
-        if token in POSITIVE_WORDS:
-            sentiment_hits.append((index, 1.0))
-        elif token in NEGATIVE_WORDS:
-            sentiment_hits.append((index, -1.0))
 
-    # Caso de frases apenas com intensificadores
-    if not sentiment_hits and all(token in INTENSIFIERS for token in normalized_tokens):
-        return 0.0, "neutral"
+# LEXICON (arquivo TSV compilado num autômato Aho-Corasick)
+NEGATION_SCOPE = 3
+INTENSIFIER_MULTIPLIER = 1.5
+LEXICON_KINDS = ("positive", "negative", "intensifier", "negation", "meta")
+# Lexicon TSV usado no lugar do embutido; recarregado quando o arquivo muda
+LEXICON_PATH = os.getenv("PULSECORE_LEXICON")
+# Intervalo mínimo (s) entre verificações do mtime do arquivo de lexicon
+LEXICON_CHECK_INTERVAL = 1.0
 
-    if not sentiment_hits:
-        return 0.0, "neutral"
 
-    sentiment_score_sum = 0.0
+class LexiconEntry(NamedTuple):
+    """Termo do lexicon (uma ou mais palavras) na forma normalizada."""
 
-    for index, base_value in sentiment_hits:
-        sentiment_value = base_value
+    text: str
+    # número de tokens do termo
+    length: int
+    polarity: float
+    # multiplicador aplicado ao termo seguinte; 0.0 quando não é intensificador
+    intensity: float
+    is_negation: bool
+    is_meta: bool
 
-        # Intensificadores antes da palavra
-        if index - 1 >= 0 and normalized_tokens[index - 1] in INTENSIFIERS:
-            sentiment_value *= 1.5
 
-        # Negação nos 3 tokens anteriores
-        negation_count = sum(
-            1 for j in range(max(0, index - 3), index)
-            if normalized_tokens[j] in NEGATIONS
-        )
-        if negation_count % 2 == 1:
-            sentiment_value *= -1
+def _lexicon_entry(term: str, kind: str, weight: Optional[float] = None) -> LexiconEntry:
+    if kind not in LEXICON_KINDS:
+        raise ValueError(f"Tipo de termo desconhecido: {kind}")
+    tokens = [normalize_text(token) for token in _TOKEN_PATTERN.findall(term)]
+    if not tokens:
+        raise ValueError(f"Termo sem tokens: {term!r}")
+    polarity = 0.0
+    if kind == "positive":
+        polarity = 1.0 if weight is None else weight
+    elif kind == "negative":
+        polarity = -1.0 if weight is None else -weight
+    intensity = (INTENSIFIER_MULTIPLIER if weight is None else weight) if kind == "intensifier" else 0.0
+    return LexiconEntry(" ".join(tokens), len(tokens), polarity, intensity, kind == "negation", kind == "meta")
+
+
+class Lexicon:
+    """Lexicon compilado num autômato Aho-Corasick sobre tokens normalizados.
+
+    Cada estado é um dict token -> próximo estado; ``_fail`` aponta para o estado
+    do maior sufixo próprio que também é prefixo de algum termo, e ``_outputs``
+    guarda os termos que terminam em cada estado (incluindo os herdados pela
+    falha), do mais longo ao mais curto. Termos repetidos são combinados: os
+    papéis se somam e a última polaridade informada prevalece.
+    """
+
+    def __init__(self, entries: Iterable[LexiconEntry], source: Optional[str] = None, mtime: Optional[int] = None) -> None:
+        self.source = source
+        self.mtime = mtime
+
+        merged: Dict[str, LexiconEntry] = {}
+        for entry in entries:
+            previous = merged.get(entry.text)
+            if previous is not None:
+                entry = LexiconEntry(
+                    entry.text,
+                    entry.length,
+                    entry.polarity or previous.polarity,
+                    entry.intensity or previous.intensity,
+                    entry.is_negation or previous.is_negation,
+                    entry.is_meta or previous.is_meta,
+                )
+            merged[entry.text] = entry
+        self.entries = merged
+        self.max_length = max((entry.length for entry in merged.values()), default=0)
+        # tamanhos (em caracteres) dos termos meta: descarta a checagem de meta sem varrer de novo
+        self.meta_lengths = {len(entry.text) for entry in merged.values() if entry.is_meta}
+        # identifica o conteúdo (não o arquivo): resultados cacheados de outro lexicon não valem
+        self.version = hashlib.blake2b(repr(sorted(merged.values())).encode(), digest_size=8).hexdigest()
+
+        goto: List[Dict[str, int]] = [{}]
+        own_outputs: List[Optional[LexiconEntry]] = [None]
+        for entry in merged.values():
+            state = 0
+            for token in entry.text.split(" "):
+                next_state = goto[state].get(token)
+                if next_state is None:
+                    next_state = goto[state][token] = len(goto)
+                    goto.append({})
+                    own_outputs.append(None)
+                state = next_state
+            own_outputs[state] = entry
+
+        fail = [0] * len(goto)
+        outputs: List[Tuple[LexiconEntry, ...]] = [()] * len(goto)
+        queue = list(goto[0].values())
+        for state in queue:
+            outputs[state] = (own_outputs[state],) if own_outputs[state] else ()
+        # BFS: a falha de um estado já está resolvida quando seus filhos são visitados
+        for state in queue:
+            for token, child in goto[state].items():
+                fallback = fail[state]
+                while fallback and token not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[child] = goto[fallback].get(token, 0) if state else 0
+                own = (own_outputs[child],) if own_outputs[child] else ()
+                outputs[child] = own + outputs[fail[child]]
+                queue.append(child)
+
+        self._goto = goto
+        self._fail = fail
+        self._outputs = outputs
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def match(self, normalized_tokens: Sequence[str]) -> List[Tuple[int, LexiconEntry]]:
+        """Ocorrências ``(início, termo)`` sem sobreposição, mais à esquerda e mais longas primeiro."""
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        matches: List[Tuple[int, LexiconEntry]] = []
+        overlapping = False
+        state = 0
+        for index, token in enumerate(normalized_tokens):
+            next_state = goto[state].get(token)
+            while next_state is None and state:
+                state = fail[state]
+                next_state = goto[state].get(token)
+            state = next_state or 0
+            found = outputs[state]
+            if found:
+                overlapping = overlapping or len(found) > 1 or found[0].length > 1
+                for entry in found:
+                    matches.append((index - entry.length + 1, entry))
+
+        if not overlapping:
+            return matches
+        matches.sort(key=lambda match: (match[0], -match[1].length))
+        selected = []
+        next_free = 0
+        for start, entry in matches:
+            if start >= next_free:
+                selected.append((start, entry))
+                # termos só meta não escondem as palavras que contêm
+                if entry.polarity or entry.intensity or entry.is_negation or not entry.is_meta:
+                    next_free = start + entry.length
+        return selected
+
+
+def _builtin_lexicon_entries() -> List[LexiconEntry]:
+    entries = [_lexicon_entry(word, "positive") for word in POSITIVE_WORDS]
+    entries += [_lexicon_entry(word, "negative") for word in NEGATIVE_WORDS]
+    entries += [_lexicon_entry(word, "intensifier") for word in INTENSIFIERS]
+    entries += [_lexicon_entry(word, "negation") for word in NEGATIONS]
+    entries.append(_lexicon_entry(SPECIAL_META_TRIGGER, "meta"))
+    return entries
+
+
+def load_lexicon(path: str) -> Lexicon:
+    """Compila um lexicon TSV: uma linha ``termo<TAB>tipo[<TAB>peso]`` por termo.
+
+    Tipos: positive/negative (peso = intensidade da polaridade, padrão 1),
+    intensifier (peso = multiplicador, padrão INTENSIFIER_MULTIPLIER), negation e
+    meta. Termos podem ter várias palavras; linhas vazias ou iniciadas por '#'
+    são ignoradas.
+    """
+    mtime = os.stat(path).st_mtime_ns
+    entries = []
+    with open(path, encoding="utf-8") as lexicon_file:
+        for line_number, line in enumerate(lexicon_file, 1):
+            line = line.rstrip("\r\n")
+            if not line.strip() or line.startswith("#"):
+                continue
+            fields = line.split("\t")
+            try:
+                if len(fields) not in (2, 3):
+                    raise ValueError("esperado termo<TAB>tipo[<TAB>peso]")
+                weight = float(fields[2]) if len(fields) == 3 and fields[2].strip() else None
+                entries.append(_lexicon_entry(fields[0], fields[1].strip(), weight))
+            except ValueError as exc:
+                raise ValueError(f"{path}:{line_number}: {exc}") from None
+    return Lexicon(entries, source=path, mtime=mtime)
+
+
+# Compilado no primeiro uso, não no import: workers novos sobem sem pagar o autômato
+_lexicon: Optional[Lexicon] = None
+_lexicon_checked_at = 0.0
+
+
+def get_lexicon() -> Lexicon:
+    global _lexicon
+    if _lexicon is None:
+        _lexicon = load_lexicon(LEXICON_PATH) if LEXICON_PATH else Lexicon(_builtin_lexicon_entries())
+    return _lexicon
+
+
+def set_lexicon(lexicon: Lexicon) -> None:
+    """Troca o lexicon ativo; as varreduras em cache deixam de valer."""
+    global _lexicon
+    _lexicon = lexicon
+    SCAN_CACHE.clear()
+
+
+def refresh_lexicon() -> bool:
+    """Recarrega o lexicon de arquivo se ele mudou em disco; True quando recarregou.
+
+    Chamado a cada lote ingerido (inclusive nos processos do pool), com no máximo
+    uma verificação de mtime por LEXICON_CHECK_INTERVAL. Um arquivo inválido
+    mantém o lexicon atual.
+    """
+    global _lexicon_checked_at
+    lexicon = get_lexicon()
+    source = lexicon.source
+    if source is None:
+        return False
+    now = time.monotonic()
+    if now - _lexicon_checked_at < LEXICON_CHECK_INTERVAL:
+        return False
+    _lexicon_checked_at = now
+    try:
+        if os.stat(source).st_mtime_ns == lexicon.mtime:
+            return False
+        set_lexicon(load_lexicon(source))
+    except (OSError, ValueError):
+        return False
+    return True
+
+
+
+# MOTOR DE VARREDURA (tokens + lexicon em uma passada)
+class ContentScan(NamedTuple):
+    """Parte da análise de sentimento que depende só do conteúdo da mensagem."""
+
+    normalized_tokens: Tuple[str, ...]
+    # (posição, valor) já com intensificador e negação aplicados
+    hits: Tuple[Tuple[int, float], ...]
+    # posições do último token de cada intensificador/negação
+    intensifier_positions: Tuple[int, ...]
+    negation_positions: Tuple[int, ...]
+    is_meta: bool
+    # bits de _content_flags (candidate_awareness, special_pattern)
+    flags: int
+
+
+_EMPTY_SCAN = ContentScan((), (), (), (), False, 0)
+
+
+def _is_meta(lexicon: Lexicon, content: str, normalized_content: str, matches: List[Tuple[int, LexiconEntry]]) -> bool:
+    """O conteúdo inteiro, normalizado, é um termo meta do lexicon."""
+    if len(normalized_content) not in lexicon.meta_lengths:
+        return False
+    if not content.isascii():
+        # caracteres descartados na normalização (ex.: emoji) podem unir tokens
+        matches = lexicon.match(_TOKEN_PATTERN.findall(normalized_content))
+    return any(entry.is_meta and entry.text == normalized_content for _, entry in matches)
+
+
+def scan_content(content: str) -> ContentScan:
+    """Tokeniza, normaliza e casa os termos do lexicon em uma única passada pelos tokens.
+
+    Um termo é afetado pelo intensificador que termina no token imediatamente
+    anterior e inverte de sinal com um número ímpar de negações terminando nos
+    NEGATION_SCOPE tokens antes dele. A mensagem é meta quando todo o conteúdo é
+    um termo meta.
+    """
+    # Uma normalização do conteúdo inteiro serve às flags e à checagem de meta;
+    # não passa pelo NORMALIZE_CACHE (o resultado já fica cacheado na varredura)
+    normalized_content = _normalize_uncached(content)
+    flags = _content_flags(content, normalized_content)
+
+    tokens = _TOKEN_PATTERN.findall(content)
+    if not tokens:
+        return ContentScan((), (), (), (), False, flags) if flags else _EMPTY_SCAN
+
+    normalized_tokens = tuple(token.lower() if token.isascii() else normalize_text(token) for token in tokens)
+    lexicon = get_lexicon()
+    matches = lexicon.match(normalized_tokens)
+
+    if lexicon.meta_lengths and _is_meta(lexicon, content, normalized_content, matches):
+        return ContentScan(normalized_tokens, (), (), (), True, flags)
+
+    hits = []
+    intensifier_positions = []
+    negation_positions = []
+    # Negações já vistas; as que terminam antes do escopo do termo atual ficam para trás
+    first_in_scope = 0
+    intensity_before = 0.0
+    intensifier_end = -2
+
+    for start, entry in matches:
+        if entry.polarity:
+            sentiment_value = entry.polarity
+            if intensifier_end == start - 1:
+                sentiment_value *= intensity_before
+            while first_in_scope < len(negation_positions) and negation_positions[first_in_scope] < start - NEGATION_SCOPE:
+                first_in_scope += 1
+            if (len(negation_positions) - first_in_scope) % 2 == 1:
+                sentiment_value *= -1
+            hits.append((start, sentiment_value))
+
+        end = start + entry.length - 1
+        if entry.intensity:
+            intensifier_positions.append(end)
+            intensity_before = entry.intensity
+            intensifier_end = end
+        if entry.is_negation:
+            negation_positions.append(end)
+
+    return ContentScan(
+        normalized_tokens,
+        tuple(hits),
+        tuple(intensifier_positions),
+        tuple(negation_positions),
+        False,
+        flags,
+    )
 
-        if "mbras" in normalize_text(user_id) and sentiment_value > 0:
-            sentiment_value *= 2.0
 
+
+# ANÁLISE DE SENTIMENTO POR MENSAGEM
+def _score_hits(hits: Tuple[Tuple[int, float], ...], mbras_user: bool) -> Tuple[float, str]:
+    sentiment_score_sum = 0.0
+
+    for _, sentiment_value in hits:
+        # Regra MBRAS: positivos em dobro, depois de intensificador e negação
+        if mbras_user and sentiment_value > 0:
+            sentiment_value *= 2.0
         sentiment_score_sum += sentiment_value
 
-    final_score = sentiment_score_sum / len(sentiment_hits)
+    final_score = sentiment_score_sum / len(hits)
 
     if final_score > 0.1:
         label = "positive"
@@ -112,10 +576,71 @@ def compute_sentiment_for_message(content: str, user_id: str) -> Tuple[float, st
     return final_score, label
 
 
+def _scan_size(content: str, scan: ContentScan) -> int:
+    """Estimativa de bytes de uma entrada do SCAN_CACHE."""
+    return (
+        sys.getsizeof(content)
+        + sum(sys.getsizeof(token) for token in scan.normalized_tokens)
+        + 72 * len(scan.hits)
+        + 8 * (len(scan.normalized_tokens) + len(scan.intensifier_positions) + len(scan.negation_positions))
+        + 256
+    )
+
+
+def cached_scan_content(content: str) -> ContentScan:
+    """scan_content memoizado por conteúdo no SCAN_CACHE."""
+    scan = SCAN_CACHE.get(content)
+    if scan is None:
+        scan = scan_content(content)
+        SCAN_CACHE.put(content, scan, _scan_size(content, scan))
+    return scan
+
+
+def compute_sentiment_for_message(content: str, user_id: str) -> Tuple[float, str]:
+    scan = cached_scan_content(content)
+
+    if scan.is_meta:
+        return 0.0, "meta"
+
+    if not scan.hits:
+        return 0.0, "neutral"
+
+    return _score_hits(scan.hits, "mbras" in normalize_text(user_id))
+
+
 
 # INFLUÊNCIA / FOLLOWERS FAKE
-def get_follower_count(user_id: str) -> int:
-    """Simula contagem de seguidores baseada em padrões do user_id."""
+_PRIME_BASE_LOW = 100
+_PRIME_BASE_HIGH = 1100
+
+
+def _build_next_prime_table(low: int, high: int) -> List[int]:
+    """Tabela com o menor primo >= n para low <= n < high (crivo de Eratóstenes)."""
+    limit = 2 * high  # Bertrand: sempre existe primo entre n e 2n
+    is_prime = [True] * (limit + 1)
+    is_prime[0] = is_prime[1] = False
+    for n in range(2, math.isqrt(limit) + 1):
+        if is_prime[n]:
+            is_prime[n * n::n] = [False] * len(range(n * n, limit + 1, n))
+
+    table = [0] * (high - low)
+    next_prime = None
+    for n in range(limit, low - 1, -1):
+        if is_prime[n]:
+            next_prime = n
+        if n < high:
+            table[n - low] = next_prime
+    return table
+
+
+_NEXT_PRIME = _build_next_prime_table(_PRIME_BASE_LOW, _PRIME_BASE_HIGH)
+
+
+def _user_digest(user_id: str) -> int:
+    return int.from_bytes(hashlib.sha256(user_id.encode("utf-8")).digest(), "big")
+
+
+def _compute_follower_count(user_id: str) -> int:
     if user_id == "user_café":
         return 4242
 
@@ -123,31 +648,32 @@ def get_follower_count(user_id: str) -> int:
         return 233
 
     if user_id.endswith("_prime"):
-        base_value = (int(hashlib.sha256(user_id.encode("utf-8")).hexdigest(), 16) % 1000) + 100
+        base_value = (_user_digest(user_id) % 1000) + _PRIME_BASE_LOW
+        return _NEXT_PRIME[base_value - _PRIME_BASE_LOW]
+
+    return (_user_digest(user_id) % 10000) + 100
 
-        def is_prime(n: int) -> bool:
-            if n < 2:
-                return False
-            if n % 2 == 0:
-                return n == 2
-            limit = int(math.sqrt(n))
-            divisor = 3
-            while divisor <= limit:
-                if n % divisor == 0:
-                    return False
-                divisor += 2
-            return True
 
-        next_prime = base_value
-        while not is_prime(next_prime):
-            next_prime += 1
-        return next_prime
+def get_follower_count(user_id: str) -> int:
+    """Simula contagem de seguidores baseada em padrões do user_id."""
+    follower_count = FOLLOWER_CACHE.get(user_id)
+    if follower_count is None:
+        follower_count = _compute_follower_count(user_id)
+        FOLLOWER_CACHE.put(user_id, follower_count, sys.getsizeof(user_id) + 32)
+    return follower_count
+
 
-    return (int(hashlib.sha256(user_id.encode("utf-8")).hexdigest(), 16) % 10000) + 100
+def get_follower_counts(user_ids: Iterable[str]) -> Dict[str, int]:
+    """Resolve vários user_ids de uma vez, calculando cada usuário uma única vez."""
+    return {user_id: get_follower_count(user_id) for user_id in dict.fromkeys(user_ids)}
 
 
 
 # ENGAGEMENT RATE
+GOLDEN_RATIO = (1 + 5 ** 0.5) / 2
+GOLDEN_RATIO_BONUS = 1 + 1 / GOLDEN_RATIO
+
+
 def compute_engagement_rate(reactions: int, shares: int, views: int) -> float:
     if views <= 0:
         return 0.0
@@ -157,8 +683,7 @@ def compute_engagement_rate(reactions: int, shares: int, views: int) -> float:
 
     # Bônus se divisível por 7
     if total_interactions > 0 and total_interactions % 7 == 0:
-        golden_ratio = (1 + 5 ** 0.5) / 2
-        base_rate *= 1 + 1 / golden_ratio
+        base_rate *= GOLDEN_RATIO_BONUS
 
     return base_rate
 
@@ -166,13 +691,13 @@ def compute_engagement_rate(reactions: int, shares: int, views: int) -> float:
 
 # DISTRIBUIÇÃO DE SENTIMENTO
 def compute_sentiment_distribution(scores_and_labels: List[Tuple[float, str]]) -> Dict[str, float]:
-    label_count = Counter()
-    total = 0
+    label_count = Counter(label for _, label in scores_and_labels)
+    return _distribution_from_counts(label_count)
+
 
-    for _, label in scores_and_labels:
-        if label != "meta":
-            label_count[label] += 1
-            total += 1
+def _distribution_from_counts(label_count: Dict[str, int]) -> Dict[str, float]:
+    """Distribuição percentual a partir da contagem de rótulos (ignora 'meta')."""
+    total = sum(count for label, count in label_count.items() if label != "meta")
 
     if total == 0:
         return {"positive": 0.0, "negative": 0.0, "neutral": 0.0}
@@ -186,177 +711,1757 @@ def compute_sentiment_distribution(scores_and_labels: List[Tuple[float, str]]) -
 
 
 # FLAGS ESPECIAIS
-def compute_flags(messages: List[Dict[str, Any]]) -> Dict[str, Any]:
-    combined_content = " ".join(message["content"] for message in messages)
-    combined_user_ids = " ".join(message["user_id"] for message in messages)
-
-    normalized_content = normalize_text(combined_content)
-    normalized_user_ids = normalize_text(combined_user_ids)
-
-    flags = {
-        "mbras_employee": "mbras" in normalized_user_ids,
-        "candidate_awareness": SPECIAL_META_TRIGGER in normalized_content,
-        "special_pattern": any(
-            len(message["content"]) == 42 and "mbras" in normalize_text(message["content"])
-            for message in messages
-        ),
-    }
+FLAG_NAMES = ("mbras_employee", "candidate_awareness", "special_pattern")
+_MBRAS_EMPLOYEE, _CANDIDATE_AWARENESS, _SPECIAL_PATTERN = (1 << bit for bit in range(len(FLAG_NAMES)))
+_ALL_FLAGS = (1 << len(FLAG_NAMES)) - 1
+
+
+def _content_flags(content: str, normalized_content: str) -> int:
+    """Flags que dependem só do conteúdo, a partir do conteúdo já normalizado."""
+    flags = 0
+    if SPECIAL_META_TRIGGER in normalized_content:
+        flags |= _CANDIDATE_AWARENESS
+    if len(content) == 42 and "mbras" in normalized_content:
+        flags |= _SPECIAL_PATTERN
     return flags
 
 
+def compute_flags(messages: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Flags do feed numa passada por mensagem, sem concatenar conteúdos.
+
+    Cada mensagem é avaliada isoladamente: um gatilho dividido entre duas
+    mensagens consecutivas não conta, como em ``analyze_feed``. A varredura
+    para assim que todas as flags valem.
+    """
+    flags = 0
+    for message in messages:
+        if not flags & _MBRAS_EMPLOYEE and "mbras" in normalize_text(message["user_id"]):
+            flags |= _MBRAS_EMPLOYEE
+        if flags & (_CANDIDATE_AWARENESS | _SPECIAL_PATTERN) != _CANDIDATE_AWARENESS | _SPECIAL_PATTERN:
+            content = message["content"]
+            flags |= _content_flags(content, _normalize_uncached(content))
+        if flags == _ALL_FLAGS:
+            break
+    return {name: bool(flags & (1 << bit)) for bit, name in enumerate(FLAG_NAMES)}
+
+
 
 # TRENDING TOPICS
-def compute_trending_topics(messages: List[Dict[str, Any]], now_reference: datetime, message_labels: Dict[str, str]) -> List[str]:
-    hashtag_weights: Dict[str, float] = defaultdict(float)
-    hashtag_frequency: Dict[str, int] = defaultdict(int)
+SENTIMENT_MULTIPLIERS = {"positive": 1.2, "negative": 0.8}
 
-    for message in messages:
-        timestamp: datetime = message["timestamp"]
-        minutes_since = max((now_reference - timestamp).total_seconds() / 60.0, 1.0)
 
-        time_weight = 1.0 + (1.0 / minutes_since)
+def _length_factor(length: int) -> float:
+    base_weight = 1.0
+    if length > 8:
+        base_weight *= math.log10(length) / math.log10(8)
+    return base_weight
 
-        sentiment_label = message_labels.get(message["id"], "neutral")
-        sentiment_multiplier = 1.2 if sentiment_label == "positive" else 0.8 if sentiment_label == "negative" else 1.0
 
-        for hashtag in message.get("hashtags", []):
-            base_weight = 1.0
-            if len(hashtag) > 8:
-                base_weight *= math.log10(len(hashtag)) / math.log10(8)
+# Fator de comprimento pré-calculado até o tamanho de um post (280); hashtags
+# maiores caem no cálculo direto
+_LENGTH_FACTORS = tuple(_length_factor(length) for length in range(281))
 
-            final_weight = base_weight * time_weight * sentiment_multiplier
 
-            hashtag_weights[hashtag] += final_weight
-            hashtag_frequency[hashtag] += 1
+def _hashtag_base_weight(hashtag: str) -> float:
+    length = len(hashtag)
+    return _LENGTH_FACTORS[length] if length < len(_LENGTH_FACTORS) else _length_factor(length)
 
-    if not hashtag_weights:
-        return []
 
-    sorted_hashtags = sorted(
+def _time_weight(seconds_since: float) -> float:
+    minutes_since = max(seconds_since / 60.0, 1.0)
+    return 1.0 + (1.0 / minutes_since)
+
+
+TRENDING_TOPICS_LIMIT = 5
+
+
+def _rank_hashtags(hashtag_weights: Dict[str, float], hashtag_frequency: Dict[str, int]) -> List[str]:
+    # Seleção limitada (O(n log k)) com o mesmo desempate da ordenação completa
+    return heapq.nsmallest(
+        TRENDING_TOPICS_LIMIT,
         hashtag_weights.keys(),
         key=lambda h: (-hashtag_weights[h], -hashtag_frequency[h], h),
     )
 
-    return sorted_hashtags[:5]
+
+def compute_trending_topics(messages: List[Dict[str, Any]], now_reference: Any, message_labels: Dict[str, str]) -> List[str]:
+    # Hashtags internadas em ids da chamada; o multiplicador tempo × sentimento sai
+    # uma vez por mensagem e o fator de comprimento uma vez por hashtag distinta
+    now_epoch = epoch_seconds(now_reference)
+    hashtag_ids: Dict[str, int] = {}
+    base_weights: List[float] = []
+    weights: List[float] = []
+    frequency: List[int] = []
+
+    for message in messages:
+        hashtags = message.get("hashtags")
+        if not hashtags:
+            continue
+        sentiment_multiplier = SENTIMENT_MULTIPLIERS.get(message_labels.get(message["id"], "neutral"), 1.0)
+        multiplier = _time_weight(now_epoch - epoch_seconds(message["timestamp"])) * sentiment_multiplier
+
+        for hashtag in hashtags:
+            hashtag_id = hashtag_ids.get(hashtag)
+            if hashtag_id is None:
+                hashtag_id = hashtag_ids[hashtag] = len(weights)
+                base_weights.append(_hashtag_base_weight(hashtag))
+                weights.append(0.0)
+                frequency.append(0)
+            weights[hashtag_id] += base_weights[hashtag_id] * multiplier
+            frequency[hashtag_id] += 1
+
+    if not hashtag_ids:
+        return []
+
+    return _rank_hashtags(
+        {hashtag: weights[i] for hashtag, i in hashtag_ids.items()},
+        {hashtag: frequency[i] for hashtag, i in hashtag_ids.items()},
+    )
+
 
 
+# ANOMALY DETECTION
+BURST_MAX_MESSAGES = 10
+BURST_WINDOW_SECONDS = 5 * 60
+ALTERNATION_MIN_MESSAGES = 10
+SYNC_MIN_MESSAGES = 3
+SYNC_TOLERANCE_SECONDS = 2
 
-# ANOMALY DETECTION (placeholder)
-def detect_anomaly(messages: List[Dict[str, Any]]) -> bool:
+
+def _has_burst(sorted_timestamps: List[int]) -> bool:
+    """Mais de BURST_MAX_MESSAGES mensagens dentro de BURST_WINDOW_SECONDS (duas pontas)."""
+    left = 0
+    for right, timestamp in enumerate(sorted_timestamps):
+        while timestamp - sorted_timestamps[left] > BURST_WINDOW_SECONDS:
+            left += 1
+        if right - left + 1 > BURST_MAX_MESSAGES:
+            return True
     return False
 
 
+def _has_alternation(labels: List[str]) -> bool:
+    """Sequência de ao menos ALTERNATION_MIN_MESSAGES rótulos alternando + - + - ..."""
+    run = 0
+    previous = None
+    for label in labels:
+        if label not in ("positive", "negative"):
+            run = 0
+        elif label != previous and run:
+            run += 1
+        else:
+            run = 1
+        if run >= ALTERNATION_MIN_MESSAGES:
+            return True
+        previous = label
+    return False
 
-# FUNÇÃO PRINCIPAL
-def analyze_feed(messages: List[Dict[str, Any]], time_window_minutes: int) -> Dict[str, Any]:
-    if not messages:
-        return {
-            "sentiment_distribution": {"positive": 0.0, "negative": 0.0, "neutral": 0.0},
-            "engagement_score": 0.0,
-            "trending_topics": [],
-            "influence_ranking": [],
-            "anomaly_detected": False,
-            "flags": {"mbras_employee": False, "candidate_awareness": False, "special_pattern": False},
-            "processing_time_ms": 0.0,
-        }
 
-    # Normaliza timestamps
-    parsed_messages: List[Dict[str, Any]] = []
-    latest_timestamp = None
+def _has_synchronized_posting(sorted_timestamps: List[int]) -> bool:
+    """Ao menos SYNC_MIN_MESSAGES mensagens dentro de ±SYNC_TOLERANCE_SECONDS de um mesmo instante."""
+    left = 0
+    for right, timestamp in enumerate(sorted_timestamps):
+        while timestamp - sorted_timestamps[left] > 2 * SYNC_TOLERANCE_SECONDS:
+            left += 1
+        if right - left + 1 >= SYNC_MIN_MESSAGES:
+            return True
+    return False
 
-    for message in messages:
-        raw_timestamp = message["timestamp"]
-        if isinstance(raw_timestamp, str):
-            timestamp_dt = datetime.strptime(raw_timestamp, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+
+def find_anomaly(timestamps: Sequence[int], user_ids: Sequence[str], labels: Sequence[str]) -> Optional[str]:
+    """Tipo da primeira anomalia encontrada (burst, alternância, sincronia) ou None.
+
+    Colunas paralelas em ordem de ingestão; cada usuário tem seus timestamps
+    ordenados uma vez e percorridos com janelas de duas pontas, O(n log n).
+    """
+    rows_by_user: Dict[str, List[int]] = defaultdict(list)
+    for row, user_id in enumerate(user_ids):
+        rows_by_user[user_id].append(row)
+
+    alternation_found = False
+    for rows in rows_by_user.values():
+        # sort estável: empates de timestamp mantêm a ordem de ingestão
+        rows.sort(key=timestamps.__getitem__)
+        if len(rows) > BURST_MAX_MESSAGES and _has_burst([timestamps[row] for row in rows]):
+            return "burst"
+        if not alternation_found and len(rows) >= ALTERNATION_MIN_MESSAGES:
+            alternation_found = _has_alternation([labels[row] for row in rows])
+
+    if alternation_found:
+        return "alternating_sentiment"
+    if len(timestamps) >= SYNC_MIN_MESSAGES and _has_synchronized_posting(sorted(timestamps)):
+        return "synchronized_posting"
+    return None
+
+
+def detect_anomaly(messages: List[Dict[str, Any]]) -> bool:
+    return find_anomaly(
+        [epoch_seconds(message["timestamp"]) for message in messages],
+        [message["user_id"] for message in messages],
+        [compute_sentiment_for_message(message["content"], message["user_id"])[1] for message in messages],
+    ) is not None
+
+
+
+# TIMESTAMPS (RFC 3339 'Z' -> segundos epoch inteiros)
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def _minute_epoch(prefix: str) -> Optional[int]:
+    """Epoch de "YYYY-MM-DDTHH:MM" no layout fixo; None se o prefixo não segue o layout."""
+    digits = prefix[0:4] + prefix[5:7] + prefix[8:10] + prefix[11:13] + prefix[14:16]
+    if not (
+        len(prefix) == 16
+        and prefix[4] == "-"
+        and prefix[7] == "-"
+        and prefix[10] == "T"
+        and prefix[13] == ":"
+        and digits.isascii()
+        and digits.isdigit()
+    ):
+        return None
+    year, month, day = int(prefix[0:4]), int(prefix[5:7]), int(prefix[8:10])
+    hour, minute = int(prefix[11:13]), int(prefix[14:16])
+    if not (year >= 1 and 1 <= month <= 12 and 1 <= day <= calendar.monthrange(year, month)[1] and hour < 24 and minute < 60):
+        return None
+    epoch = calendar.timegm((year, month, day, hour, minute, 0))
+    if len(MINUTE_EPOCH_CACHE) >= MINUTE_EPOCH_CACHE_SIZE:
+        MINUTE_EPOCH_CACHE.clear()
+    MINUTE_EPOCH_CACHE[prefix] = epoch
+    return epoch
+
+
+def parse_epoch(raw_timestamp: str) -> int:
+    """'YYYY-MM-DDTHH:MM:SSZ' em segundos epoch, fatiando a string em vez de usar strptime.
+
+    Fora do layout fixo (campos sem zero à esquerda, 't' minúsculo...) cai no
+    strptime, que aceita as mesmas variações de antes ou levanta ValueError.
+    """
+    second = raw_timestamp[17:19]
+    if (
+        len(raw_timestamp) == 20
+        and raw_timestamp[16] == ":"
+        and raw_timestamp[19] == "Z"
+        and second.isascii()
+        and second.isdigit()
+        and second < "60"
+    ):
+        prefix = raw_timestamp[:16]
+        minute = MINUTE_EPOCH_CACHE.get(prefix)
+        if minute is None:
+            minute = _minute_epoch(prefix)
+        if minute is not None:
+            return minute + int(second)
+    return calendar.timegm(datetime.strptime(raw_timestamp, TIMESTAMP_FORMAT).utctimetuple())
+
+
+def parse_timestamp(raw_timestamp: Any) -> datetime:
+    """Converte timestamps RFC 3339 com sufixo 'Z' para datetime UTC."""
+    if isinstance(raw_timestamp, str):
+        return datetime.fromtimestamp(parse_epoch(raw_timestamp), timezone.utc)
+    return raw_timestamp
+
+
+def epoch_seconds(raw_timestamp: Any) -> int:
+    """Timestamp (str, datetime ou epoch) em segundos inteiros desde 1970 UTC."""
+    if isinstance(raw_timestamp, int):
+        return raw_timestamp
+    if isinstance(raw_timestamp, str):
+        return parse_epoch(raw_timestamp)
+    if raw_timestamp.tzinfo is not None and not raw_timestamp.microsecond:
+        return int(raw_timestamp.timestamp())
+    return calendar.timegm(raw_timestamp.utctimetuple())
+
+
+
+# LOTE COLUNAR DE MENSAGENS
+
+
+class MessageRecord(NamedTuple):
+    """Mensagem já validada, sem o custo de um modelo pydantic ou de um dict."""
+
+    id: str
+    content: str
+    # str RFC 3339, datetime ou segundos epoch
+    timestamp: Any
+    user_id: str
+    hashtags: List[str]
+    reactions: int
+    shares: int
+    views: int
+
+
+class MessageBatch:
+    """Mensagens de uma requisição em colunas (struct-of-arrays).
+
+    Construído uma vez a partir dos dicts da requisição: timestamps em segundos
+    epoch, contadores em ``array('q')`` e user_ids/hashtags internados em tabelas
+    com colunas de códigos inteiros. Os conteúdos são referências às strings
+    originais, sem cópia.
+    """
+
+    __slots__ = (
+        "timestamps", "contents", "user_codes", "user_ids", "reactions", "shares", "views",
+        "hashtag_offsets", "hashtag_codes", "hashtags", "_user_index", "_hashtag_index",
+    )
+
+    def __init__(self) -> None:
+        self.timestamps = array("q")
+        self.contents: List[str] = []
+        self.user_codes = array("l")
+        self.user_ids: List[str] = []
+        self.reactions = array("q")
+        self.shares = array("q")
+        self.views = array("q")
+        # hashtags da linha i: hashtag_codes[hashtag_offsets[i]:hashtag_offsets[i + 1]]
+        self.hashtag_offsets = array("l", [0])
+        self.hashtag_codes = array("l")
+        self.hashtags: List[str] = []
+        self._user_index: Dict[str, int] = {}
+        self._hashtag_index: Dict[str, int] = {}
+
+    @classmethod
+    def from_messages(cls, messages: Iterable[Any]) -> "MessageBatch":
+        batch = cls()
+        batch.extend(messages)
+        return batch
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def extend(self, messages: Iterable[Any]) -> None:
+        for message in messages:
+            self.append(message)
+
+    def append(self, message: Any) -> None:
+        """Adiciona um dict de mensagem ou um objeto com os mesmos atributos (ex.: MessageRecord)."""
+        if isinstance(message, dict):
+            timestamp, content, user_id = message["timestamp"], message["content"], message["user_id"]
+            reactions, shares, views = message["reactions"], message["shares"], message["views"]
+            hashtags = message.get("hashtags", ())
         else:
-            timestamp_dt = raw_timestamp
+            timestamp, content, user_id = message.timestamp, message.content, message.user_id
+            reactions, shares, views = message.reactions, message.shares, message.views
+            hashtags = message.hashtags
+
+        self.timestamps.append(epoch_seconds(timestamp))
+        self.contents.append(content)
+        self.user_codes.append(self._intern(user_id, self._user_index, self.user_ids))
+        self.reactions.append(reactions)
+        self.shares.append(shares)
+        self.views.append(views)
+        for hashtag in hashtags:
+            self.hashtag_codes.append(self._intern(hashtag, self._hashtag_index, self.hashtags))
+        self.hashtag_offsets.append(len(self.hashtag_codes))
+
+    @staticmethod
+    def _intern(value: str, index: Dict[str, int], table: List[str]) -> int:
+        code = index.get(value)
+        if code is None:
+            code = index[value] = len(table)
+            table.append(value)
+        return code
+
+    def select(self, rows: Sequence[int]) -> "MessageBatch":
+        """Sub-lote com as linhas ``rows``; as tabelas de internação são compartilhadas."""
+        subset = MessageBatch()
+        subset.timestamps = array("q", map(self.timestamps.__getitem__, rows))
+        subset.contents = list(map(self.contents.__getitem__, rows))
+        subset.user_codes = array("l", map(self.user_codes.__getitem__, rows))
+        subset.reactions = array("q", map(self.reactions.__getitem__, rows))
+        subset.shares = array("q", map(self.shares.__getitem__, rows))
+        subset.views = array("q", map(self.views.__getitem__, rows))
+        offsets, codes = self.hashtag_offsets, self.hashtag_codes
+        for row in rows:
+            subset.hashtag_codes.extend(codes[offsets[row]:offsets[row + 1]])
+            subset.hashtag_offsets.append(len(subset.hashtag_codes))
+        subset.user_ids, subset._user_index = self.user_ids, self._user_index
+        subset.hashtags, subset._hashtag_index = self.hashtags, self._hashtag_index
+        return subset
+
+    def row_hashtags(self, row: int) -> List[str]:
+        hashtags = self.hashtags
+        return [hashtags[code] for code in self.hashtag_codes[self.hashtag_offsets[row]:self.hashtag_offsets[row + 1]]]
+
+
+
+# BACKENDS DE AGREGAÇÃO
+class PythonAggregation:
+    """Agregações numéricas sobre colunas ``array`` em Python puro."""
+
+    name = "python"
+
+    def window_rows(self, timestamps: array, lower_bound: int, upper_bound: int) -> List[int]:
+        return [row for row, timestamp in enumerate(timestamps) if lower_bound <= timestamp <= upper_bound]
+
+    def take(self, column: array, rows: Sequence[int]) -> array:
+        return array(column.typecode, [column[row] for row in rows])
+
+    def engagement_rates(self, reactions: array, shares: array, views: array) -> List[float]:
+        return [compute_engagement_rate(r, s, v) for r, s, v in zip(reactions, shares, views)]
+
+    def user_sums(
+        self, user_codes: array, reactions: array, shares: array, views: array, user_count: int
+    ) -> Tuple[List[int], ...]:
+        """Contagem de mensagens e somas de reactions/shares/views por código de usuário."""
+        counts = [0] * user_count
+        reaction_sums = [0] * user_count
+        share_sums = [0] * user_count
+        view_sums = [0] * user_count
+        for code, r, s, v in zip(user_codes, reactions, shares, views):
+            counts[code] += 1
+            reaction_sums[code] += r
+            share_sums[code] += s
+            view_sums[code] += v
+        return counts, reaction_sums, share_sums, view_sums
+
+    def influence(
+        self, followers: List[int], reactions: List[int], shares: List[int], views: List[int]
+    ) -> Tuple[List[float], List[float]]:
+        """Engagement rate e influence score por usuário."""
+        rates = self.engagement_rates(reactions, shares, views)
+        scores = [f * 0.4 + rate * 0.6 for f, rate in zip(followers, rates)]
+        return rates, scores
+
+    def trending_multipliers(self, timestamps: array, labels: array, now_reference: int) -> List[float]:
+        """Peso temporal × multiplicador de sentimento de cada mensagem."""
+        return [_time_weight(now_reference - t) * _LABEL_MULTIPLIERS[label] for t, label in zip(timestamps, labels)]
+
+    def rank(self, scores: List[float], first_seqs: List[int], limit: Optional[int] = None) -> List[int]:
+        """Índices por score decrescente (só os ``limit`` primeiros); empates pela primeira aparição."""
+        def key(i: int) -> Tuple[float, int]:
+            return -scores[i], first_seqs[i]
+
+        if limit is not None and limit < len(scores):
+            return heapq.nsmallest(limit, range(len(scores)), key=key)
+        return sorted(range(len(scores)), key=key)
+
+
+class NumpyAggregation(PythonAggregation):
+    """Mesmas agregações vetorizadas com NumPy (bincount, máscaras, argsort).
+
+    As operações elemento a elemento são as mesmas do Python (IEEE 754), então os
+    valores por mensagem/usuário coincidem; somas entre mensagens continuam exatas
+    via ``_ExactSum``.
+    """
+
+    name = "numpy"
+    # Inteiros até aqui passam por int64/float64 sem arredondar (reactions + shares ≤ 2**53);
+    # acima disso a conta vai para o Python, com inteiros exatos
+    EXACT_INT_LIMIT = 2 ** 52
+
+    @staticmethod
+    def _view(column: Any) -> "np.ndarray":
+        if isinstance(column, array):
+            return np.frombuffer(column, dtype=np.int64 if column.itemsize == 8 else np.int32)
+        return np.asarray(column, dtype=np.int64)
+
+    def _within(self, limit: int, *columns: Any) -> bool:
+        """Todos os valores das colunas estão em [-limit, limit]."""
+        for column in columns:
+            if not len(column):
+                continue
+            if isinstance(column, array):
+                values = self._view(column)
+                high, low = int(values.max()), int(values.min())
+            else:
+                high, low = max(column), min(column)
+            if high > limit or low < -limit:
+                return False
+        return True
+
+    def window_rows(self, timestamps: array, lower_bound: int, upper_bound: int) -> List[int]:
+        values = self._view(timestamps)
+        return np.flatnonzero((values >= lower_bound) & (values <= upper_bound)).tolist()
+
+    def take(self, column: array, rows: Sequence[int]) -> array:
+        taken = array(column.typecode)
+        taken.frombytes(self._view(column)[np.asarray(rows, dtype=np.intp)].tobytes())
+        return taken
+
+    def _rates(self, reactions: Any, shares: Any, views: Any) -> "np.ndarray":
+        interactions = self._view(reactions) + self._view(shares)
+        views = self._view(views)
+        rates = np.zeros(len(views), dtype=np.float64)
+        np.divide(interactions, views, out=rates, where=views > 0)
+        rates[(views > 0) & (interactions > 0) & (interactions % 7 == 0)] *= GOLDEN_RATIO_BONUS
+        return rates
+
+    def engagement_rates(self, reactions: array, shares: array, views: array) -> List[float]:
+        if not self._within(self.EXACT_INT_LIMIT, reactions, shares, views):
+            return super().engagement_rates(reactions, shares, views)
+        return self._rates(reactions, shares, views).tolist()
+
+    def user_sums(
+        self, user_codes: array, reactions: array, shares: array, views: array, user_count: int
+    ) -> Tuple[List[int], ...]:
+        # Pesos float64 são exatos enquanto cada soma cabe em 2**53
+        if not self._within(2 ** 53 // max(len(user_codes), 1), reactions, shares, views):
+            return super().user_sums(user_codes, reactions, shares, views, user_count)
+        codes = self._view(user_codes)
+        counts = np.bincount(codes, minlength=user_count)
+        return (counts.tolist(),) + tuple(
+            np.bincount(codes, weights=self._view(column), minlength=user_count).astype(np.int64).tolist()
+            for column in (reactions, shares, views)
+        )
 
-        message_copy = dict(message)
-        message_copy["timestamp"] = timestamp_dt
-        parsed_messages.append(message_copy)
+    def influence(
+        self, followers: List[int], reactions: List[int], shares: List[int], views: List[int]
+    ) -> Tuple[List[float], List[float]]:
+        if not self._within(self.EXACT_INT_LIMIT, reactions, shares, views):
+            return super().influence(followers, reactions, shares, views)
+        rates = self._rates(reactions, shares, views)
+        scores = np.asarray(followers, dtype=np.int64) * 0.4 + rates * 0.6
+        return rates.tolist(), scores.tolist()
+
+    def trending_multipliers(self, timestamps: array, labels: array, now_reference: int) -> List[float]:
+        minutes_since = np.maximum((now_reference - self._view(timestamps)) / 60.0, 1.0)
+        label_multipliers = np.asarray(_LABEL_MULTIPLIERS)[np.frombuffer(labels, dtype=np.int8)]
+        return ((1.0 + 1.0 / minutes_since) * label_multipliers).tolist()
+
+    def rank(self, scores: List[float], first_seqs: List[int], limit: Optional[int] = None) -> List[int]:
+        negated = -np.asarray(scores)
+        first_seqs = np.asarray(first_seqs)
+        if limit is None or limit >= len(negated):
+            return np.lexsort((first_seqs, negated)).tolist()
+        if limit <= 0:
+            return []
 
-        if latest_timestamp is None or timestamp_dt > latest_timestamp:
-            latest_timestamp = timestamp_dt
+        # Candidatas: tudo até o k-ésimo score, incluindo empates na fronteira
+        threshold = np.partition(negated, limit - 1)[limit - 1]
+        candidates = np.flatnonzero(negated <= threshold)
+        order = np.lexsort((first_seqs[candidates], negated[candidates]))[:limit]
+        return candidates[order].tolist()
 
-    now_reference = latest_timestamp or datetime.now(timezone.utc)
-    time_window_delta = timedelta(minutes=time_window_minutes)
 
-    lower_bound = now_reference - time_window_delta
-    window_messages = [msg for msg in parsed_messages if lower_bound <= msg["timestamp"] <= now_reference + timedelta(seconds=5)]
+AGGREGATION_BACKENDS = {"python": PythonAggregation()}
+if np is not None:
+    AGGREGATION_BACKENDS["numpy"] = NumpyAggregation()
 
+# NumPy quando disponível, senão Python puro
+DEFAULT_BACKEND = "numpy" if np is not None else "python"
 
-    if not window_messages:
-        return {
-            "sentiment_distribution": {"positive": 0.0, "negative": 0.0, "neutral": 0.0},
-            "engagement_score": 0.0,
-            "trending_topics": [],
-            "influence_ranking": [],
-            "anomaly_detected": False,
-            "flags": {"mbras_employee": False, "candidate_awareness": False, "special_pattern": False},
-            "processing_time_ms": 0.0,
-        }
 
-    per_message_scores: List[Tuple[float, str]] = []
-    message_labels: Dict[str, str] = {}
+def get_backend(name: Optional[str] = None) -> PythonAggregation:
+    try:
+        return AGGREGATION_BACKENDS[name or DEFAULT_BACKEND]
+    except KeyError:
+        raise ValueError(f"Backend de agregação indisponível: {name}") from None
 
-    for message in window_messages:
-        sentiment_score, sentiment_label = compute_sentiment_for_message(message["content"], message["user_id"])
-        per_message_scores.append((sentiment_score, sentiment_label))
-        message_labels[message["id"]] = sentiment_label
 
-    sentiment_distribution = compute_sentiment_distribution(per_message_scores)
-    flags = compute_flags(window_messages)
 
-    if flags["candidate_awareness"]:
-        engagement_score = 9.42
-    else:
-        engagement_rates = [
-            compute_engagement_rate(msg["reactions"], msg["shares"], msg["views"])
-            for msg in window_messages
-        ]
-        engagement_score = sum(engagement_rates) / len(engagement_rates) if engagement_rates else 0.0
+# ANÁLISE INCREMENTAL (JANELA DESLIZANTE)
+class _ExactSum:
+    """Soma exata de floats (parciais de Shewchuk) que aceita inserções e remoções.
 
-    user_statistics: Dict[str, Dict[str, Any]] = {}
+    O valor final é o mesmo de ``math.fsum`` sobre os valores vivos, independente
+    da ordem de ingestão/remoção — o que mantém o resultado incremental idêntico
+    ao recalculado do zero.
+    """
 
-    for message in window_messages:
-        user_id = message["user_id"]
+    __slots__ = ("_partials",)
 
-        if user_id not in user_statistics:
-            follower_count = get_follower_count(user_id)
-            user_statistics[user_id] = {
-                "user_id": user_id,
-                "followers": follower_count,
-                "reactions": 0,
-                "shares": 0,
-                "views": 0,
-            }
+    def __init__(self) -> None:
+        self._partials: List[float] = []
+
+    def add(self, value: float) -> None:
+        partials = self._partials
+        i = 0
+        for partial in partials:
+            if abs(value) < abs(partial):
+                value, partial = partial, value
+            high = value + partial
+            low = partial - (high - value)
+            if low:
+                partials[i] = low
+                i += 1
+            value = high
+        partials[i:] = [value]
+
+    def add_many(self, values: Iterable[float]) -> None:
+        """Soma vários valores de uma vez, com o mesmo resultado exato de ``add``.
 
-        user_statistics[user_id]["reactions"] += message["reactions"]
-        user_statistics[user_id]["shares"] += message["shares"]
-        user_statistics[user_id]["views"] += message["views"]
+        A soma exata vira uma expansão de floats: cada termo é o ``math.fsum`` do
+        que ainda falta somar, até o resto ser exatamente zero.
+        """
+        terms = self._partials + list(values)
+        expansion: List[float] = []
+        while True:
+            remainder = math.fsum(terms)
+            if not remainder:
+                break
+            expansion.append(remainder)
+            terms.append(-remainder)
+        expansion.reverse()
+        self._partials = expansion
 
-    influence_ranking = []
-    for user_id, stats in user_statistics.items():
-        engagement_rate = compute_engagement_rate(stats["reactions"], stats["shares"], stats["views"])
-        influence_score = stats["followers"] * 0.4 + engagement_rate * 0.6
+    def remove(self, value: float) -> None:
+        self.add(-value)
 
-        influence_ranking.append({
-            "user_id": user_id,
-            "followers": stats["followers"],
-            "engagement_rate": engagement_rate,
-            "influence_score": influence_score,
-        })
+    def merge(self, other: "_ExactSum") -> None:
+        self.add_many(other._partials)
 
-    influence_ranking.sort(key=lambda item: -item["influence_score"])
+    def value(self) -> float:
+        return math.fsum(self._partials)
 
-    trending_topics = compute_trending_topics(window_messages, now_reference, message_labels)
 
+class UserStats:
+    """Somas de engajamento de um usuário num agregado, com o primeiro seq para o desempate do ranking."""
+
+    __slots__ = ("first_seq", "followers", "reactions", "shares", "views")
+
+    def __init__(self, first_seq: int, followers: int, reactions: int = 0, shares: int = 0, views: int = 0) -> None:
+        self.first_seq = first_seq
+        self.followers = followers
+        self.reactions = reactions
+        self.shares = shares
+        self.views = views
+
+
+class InfluenceEntry(TypedDict):
+    """Entrada do ``influence_ranking``: continua um dict, que o orjson serializa direto como objeto."""
+
+    user_id: str
+    followers: int
+    engagement_rate: float
+    influence_score: float
+
+
+class _UserAggregate(UserStats):
+    """``UserStats`` de um usuário vivo do ``FeedAnalyzer``; ``first_seq`` é atualizado no snapshot."""
+
+    __slots__ = ("message_count", "seqs")
+
+    def __init__(self, followers: int) -> None:
+        super().__init__(0, followers)
+        self.message_count = 0
+        # heap com os seqs das mensagens do usuário; remoções são preguiçosas
+        self.seqs: List[int] = []
+
+
+LABELS = ("positive", "negative", "neutral", "meta")
+_LABEL_CODES = {label: code for code, label in enumerate(LABELS)}
+_LABEL_MULTIPLIERS = tuple(SENTIMENT_MULTIPLIERS.get(label, 1.0) for label in LABELS)
+
+# Linhas mortas no início das colunas só são compactadas a partir deste tamanho
+_MIN_COMPACTION_ROWS = 1024
+
+
+def _empty_analysis() -> Dict[str, Any]:
     return {
-        "sentiment_distribution": sentiment_distribution,
-        "engagement_score": engagement_score,
-        "trending_topics": trending_topics,
-        "influence_ranking": influence_ranking,
-        "anomaly_detected": detect_anomaly(window_messages),
-        "flags": flags,
+        "sentiment_distribution": {"positive": 0.0, "negative": 0.0, "neutral": 0.0},
+        "engagement_score": 0.0,
+        "trending_topics": [],
+        "influence_ranking": [],
+        "anomaly_detected": False,
+        "anomaly_type": None,
+        "flags": {"mbras_employee": False, "candidate_awareness": False, "special_pattern": False},
         "processing_time_ms": 0.0,
     }
+
+
+class PartialAggregate:
+    """Agregados de um trecho contíguo do feed, combináveis com ``merge``.
+
+    Contagens e somas se combinam somando (a de engagement é exata), cada usuário
+    guarda o primeiro seq para o desempate do ranking e as colunas da detecção de
+    anomalias são concatenadas. Com os trechos combinados em ordem de ingestão, o
+    ``snapshot`` é idêntico ao do feed inteiro analisado de uma vez.
+    """
+
+    __slots__ = (
+        "message_count", "label_counts", "engagement_sum", "flag_counts", "users",
+        "hashtags", "hashtag_codes", "hashtag_rows", "latest_timestamp", "timestamps", "user_ids", "labels",
+        "_hashtag_index",
+    )
+
+    def __init__(self) -> None:
+        self.message_count = 0
+        self.label_counts = [0] * len(LABELS)
+        self.engagement_sum = _ExactSum()
+        self.flag_counts = [0] * len(FLAG_NAMES)
+        self.users: Dict[str, UserStats] = {}
+        # ocorrências de hashtags achatadas: código em ``hashtags`` e linha nas colunas abaixo
+        self.hashtags: List[str] = []
+        self.hashtag_codes = array("l")
+        self.hashtag_rows = array("q")
+        # hashtag -> código, mantido pelos merges (uma janela combina centenas de rollups)
+        self._hashtag_index: Dict[str, int] = {}
+        self.latest_timestamp: Optional[int] = None
+        # colunas em ordem de ingestão para find_anomaly e trending
+        self.timestamps = array("q")
+        self.user_ids: List[str] = []
+        self.labels = array("b")
+
+    def merge(self, other: "PartialAggregate", seq_offset: int = 0) -> "PartialAggregate":
+        """Acumula ``other`` (o trecho seguinte do feed) neste agregado.
+
+        ``seq_offset`` desloca os seqs de ``other``, para trechos agregados com
+        numeração própria (ex.: rollups por minuto, cada um a partir de 0).
+        """
+        self.message_count += other.message_count
+        self.label_counts = [a + b for a, b in zip(self.label_counts, other.label_counts)]
+        self.engagement_sum.merge(other.engagement_sum)
+        self.flag_counts = [a + b for a, b in zip(self.flag_counts, other.flag_counts)]
+
+        for user_id, other_user in other.users.items():
+            first_seq = other_user.first_seq + seq_offset
+            user = self.users.get(user_id)
+            if user is None:
+                self.users[user_id] = UserStats(
+                    first_seq, other_user.followers, other_user.reactions, other_user.shares, other_user.views
+                )
+            else:
+                user.first_seq = min(user.first_seq, first_seq)
+                user.reactions += other_user.reactions
+                user.shares += other_user.shares
+                user.views += other_user.views
+
+        if other.hashtag_codes:
+            codes = self._hashtag_index
+            if len(codes) != len(self.hashtags):
+                # hashtags incluídas fora do merge (ex.: FeedAnalyzer.partial)
+                codes = self._hashtag_index = {hashtag: code for code, hashtag in enumerate(self.hashtags)}
+            remap = []
+            for hashtag in other.hashtags:
+                code = codes.get(hashtag)
+                if code is None:
+                    code = codes[hashtag] = len(self.hashtags)
+                    self.hashtags.append(hashtag)
+                remap.append(code)
+            row_offset = len(self.timestamps)
+            self.hashtag_codes.extend([remap[code] for code in other.hashtag_codes])
+            self.hashtag_rows.extend([row + row_offset for row in other.hashtag_rows])
+
+        if other.latest_timestamp is not None and (
+            self.latest_timestamp is None or other.latest_timestamp > self.latest_timestamp
+        ):
+            self.latest_timestamp = other.latest_timestamp
+        self.timestamps.extend(other.timestamps)
+        self.user_ids.extend(other.user_ids)
+        self.labels.extend(other.labels)
+        return self
+
+    def snapshot(
+        self,
+        top_n_influencers: Optional[int] = None,
+        backend: Optional[str] = None,
+        timings: Optional[StageTimings] = None,
+    ) -> Dict[str, Any]:
+        """Mesmo dicionário de ``analyze_feed`` para as mensagens agregadas."""
+        if not self.message_count:
+            return _empty_analysis()
+        if timings is None:
+            timings = NULL_TIMINGS
+        aggregation = get_backend(backend)
+
+        flags = {name: count > 0 for name, count in zip(FLAG_NAMES, self.flag_counts)}
+
+        with timings.span("engagement"):
+            if flags["candidate_awareness"]:
+                engagement_score = 9.42
+            else:
+                engagement_score = self.engagement_sum.value() / self.message_count
+
+        with timings.span("anomaly"):
+            anomaly_type = find_anomaly(self.timestamps, self.user_ids, [LABELS[code] for code in self.labels])
+
+        with timings.span("trending"):
+            trending_topics = self._trending_topics(aggregation)
+
+        with timings.span("influence"):
+            influence_ranking = self._influence_ranking(aggregation, top_n_influencers)
+
+        return {
+            "sentiment_distribution": _distribution_from_counts(dict(zip(LABELS, self.label_counts))),
+            "engagement_score": engagement_score,
+            "trending_topics": trending_topics,
+            "influence_ranking": influence_ranking,
+            "anomaly_detected": anomaly_type is not None,
+            "anomaly_type": anomaly_type,
+            "flags": flags,
+            "processing_time_ms": 0.0,
+        }
+
+    def _influence_ranking(self, backend: PythonAggregation, limit: Optional[int] = None) -> List[InfluenceEntry]:
+        user_ids = list(self.users)
+        users = list(self.users.values())
+        followers = [user.followers for user in users]
+        rates, scores = backend.influence(
+            followers,
+            [user.reactions for user in users],
+            [user.shares for user in users],
+            [user.views for user in users],
+        )
+
+        # Empate no score mantém a ordem da primeira aparição do usuário na janela
+        order = backend.rank(scores, [user.first_seq for user in users], limit)
+        return [
+            {
+                "user_id": user_ids[i],
+                "followers": followers[i],
+                "engagement_rate": rates[i],
+                "influence_score": scores[i],
+            }
+            for i in order
+        ]
+
+    def _trending_topics(self, backend: PythonAggregation) -> List[str]:
+        if not self.hashtag_codes:
+            return []
+
+        # Multiplicador tempo × sentimento uma vez por mensagem; o peso de cada hashtag
+        # é a soma exata dos multiplicadores das suas ocorrências × fator de comprimento
+        multipliers = backend.trending_multipliers(self.timestamps, self.labels, self.latest_timestamp)
+        terms: List[List[float]] = [[] for _ in self.hashtags]
+        for code, row in zip(self.hashtag_codes, self.hashtag_rows):
+            terms[code].append(multipliers[row])
+
+        hashtag_weights: Dict[str, float] = {}
+        hashtag_frequency: Dict[str, int] = {}
+        for hashtag, hashtag_terms in zip(self.hashtags, terms):
+            hashtag_weights[hashtag] = _hashtag_base_weight(hashtag) * math.fsum(hashtag_terms)
+            hashtag_frequency[hashtag] = len(hashtag_terms)
+        return _rank_hashtags(hashtag_weights, hashtag_frequency)
+
+
+class FeedAnalyzer:
+    """Análise de feed com estado, atualizada em O(delta) por ingestão/remoção.
+
+    Mantém contagens de rótulos de sentimento, somas de reactions/shares/views por
+    usuário e acumuladores de peso por hashtag para as mensagens vivas. ``snapshot()``
+    produz o mesmo dicionário de ``analyze_feed`` para a janela atual, usando o
+    timestamp mais recente entre as mensagens vivas como referência temporal.
+
+    As mensagens vivas ficam em colunas indexadas por ``seq - base``; as linhas
+    removidas no início das colunas são compactadas periodicamente.
+    """
+
+    def __init__(self, backend: Optional[str] = None, first_seq: int = 0, timings: Optional[StageTimings] = None) -> None:
+        self._backend_name = backend
+        self._backend = get_backend(backend)
+        self._timings = timings if timings is not None else NULL_TIMINGS
+        # seqs globais: shards de um mesmo feed começam cada um na sua posição
+        self._next_seq = first_seq
+        self._base = first_seq
+        self._head = 0
+        self._live = bytearray()
+        self._live_count = 0
+        self._timestamps = array("q")
+        self._user_ids: List[str] = []
+        self._labels = array("b")
+        self._flags = array("B")
+        self._reactions = array("q")
+        self._shares = array("q")
+        self._views = array("q")
+        # ids de hashtag achatados; a linha i termina em _hashtag_ends[i] (offset absoluto)
+        self._hashtag_values = array("l")
+        self._hashtag_ends = array("q")
+        self._hashtag_base = 0
+
+        self._eviction_heap: List[Tuple[int, int]] = []
+        self._latest_timestamp: Optional[int] = None
+
+        self._label_counts = [0] * len(LABELS)
+        self._engagement_sum = _ExactSum()
+        self._flag_counts = [0] * len(FLAG_NAMES)
+        self._users: Dict[str, _UserAggregate] = {}
+        # Hashtags internadas em ids com contagem de ocorrências vivas; o id volta para
+        # _free_hashtag_ids quando a hashtag sai da janela. O peso temporal depende da
+        # referência "agora", então só é aplicado no snapshot
+        self._hashtag_ids: Dict[str, int] = {}
+        self._hashtag_names: List[str] = []
+        self._hashtag_frequency: List[int] = []
+        self._free_hashtag_ids: List[int] = []
+
+    def __len__(self) -> int:
+        return self._live_count
+
+    @property
+    def latest_timestamp(self) -> Optional[int]:
+        """Timestamp (segundos epoch) mais recente entre as mensagens vivas."""
+        return self._latest_timestamp
+
+    def ingest(self, messages: Iterable[Any]) -> None:
+        """Adiciona mensagens aos agregados da janela."""
+        self.ingest_batch(MessageBatch.from_messages(messages))
+
+    def ingest_batch(self, batch: MessageBatch, rows: Optional[Sequence[int]] = None) -> None:
+        """Adiciona as linhas ``rows`` (todas por padrão) de um lote colunar."""
+        if rows is None:
+            rows = range(len(batch))
+        refresh_lexicon()
+        backend = self._backend
+        timings = self._timings
+
+        # Colunas numéricas e agregados por usuário saem vetorizados pelo backend
+        with timings.span("window"):
+            timestamps = backend.take(batch.timestamps, rows)
+            user_codes = backend.take(batch.user_codes, rows)
+            reactions = backend.take(batch.reactions, rows)
+            shares = backend.take(batch.shares, rows)
+            views = backend.take(batch.views, rows)
+            self._timestamps.extend(timestamps)
+            self._reactions.extend(reactions)
+            self._shares.extend(shares)
+            self._views.extend(views)
+
+        with timings.span("engagement"):
+            self._engagement_sum.add_many(backend.engagement_rates(reactions, shares, views))
+
+        # Sentimento, flags e hashtags seguem linha a linha, uma passada por etapa
+        contents = batch.contents
+        # As flags de conteúdo saem da mesma varredura (cacheada) do sentimento
+        with timings.span("sentiment"):
+            batch_mbras = ["mbras" in normalize_text(user_id) for user_id in batch.user_ids]
+            labels = []
+            row_flags = []
+            for row, code in zip(rows, user_codes):
+                scan = cached_scan_content(contents[row])
+                labels.append(self._label_code(scan, batch_mbras[code]))
+                row_flags.append(scan.flags)
+
+        with timings.span("flags"):
+            row_flags = [flags | (_MBRAS_EMPLOYEE if batch_mbras[code] else 0) for flags, code in zip(row_flags, user_codes)]
+
+        first_seq = self._next_seq
+        for timestamp, user_code, label_code, flags in zip(timestamps, user_codes, labels, row_flags):
+            seq = self._next_seq
+            self._next_seq += 1
+            self._live.append(1)
+            self._live_count += 1
+            self._user_ids.append(batch.user_ids[user_code])
+            self._labels.append(label_code)
+            self._flags.append(flags)
+            heapq.heappush(self._eviction_heap, (timestamp, seq))
+            if self._latest_timestamp is None or timestamp > self._latest_timestamp:
+                self._latest_timestamp = timestamp
+
+            self._label_counts[label_code] += 1
+            self._add_flags(flags, 1)
+
+        with timings.span("influence"):
+            self._add_users(batch, first_seq, timestamps, user_codes, reactions, shares, views)
+
+        with timings.span("trending"):
+            self._add_hashtags(batch, rows, timestamps, labels)
+
+    # Usuários e hashtags: agregados exatos aqui, sketches em ApproximateFeedAnalyzer
+    def _add_users(
+        self, batch: MessageBatch, first_seq: int, timestamps: array,
+        user_codes: array, reactions: array, shares: array, views: array,
+    ) -> None:
+        batch_users: List[Optional[_UserAggregate]] = [None] * len(batch.user_ids)
+        user_totals = zip(*self._backend.user_sums(user_codes, reactions, shares, views, len(batch.user_ids)))
+        for code, (count, reaction_sum, share_sum, view_sum) in enumerate(user_totals):
+            if count:
+                user = batch_users[code] = self._user(batch.user_ids[code])
+                user.message_count += count
+                user.reactions += reaction_sum
+                user.shares += share_sum
+                user.views += view_sum
+        for seq, code in enumerate(user_codes, first_seq):
+            heapq.heappush(batch_users[code].seqs, seq)
+
+    def _add_hashtags(self, batch: MessageBatch, rows: Sequence[int], timestamps: array, labels: List[int]) -> None:
+        offsets, codes = batch.hashtag_offsets, batch.hashtag_codes
+        values, frequency = self._hashtag_values, self._hashtag_frequency
+        # código do lote -> id interno, resolvido uma vez por hashtag distinta
+        batch_ids = [-1] * len(batch.hashtags)
+        for row in rows:
+            for code in codes[offsets[row]:offsets[row + 1]]:
+                hashtag_id = batch_ids[code]
+                if hashtag_id < 0:
+                    hashtag_id = batch_ids[code] = self._hashtag_id(batch.hashtags[code])
+                values.append(hashtag_id)
+                frequency[hashtag_id] += 1
+            self._hashtag_ends.append(self._hashtag_base + len(values))
+
+    @staticmethod
+    def _label_code(scan: ContentScan, mbras_user: bool) -> int:
+        if scan.is_meta:
+            return _LABEL_CODES["meta"]
+        if not scan.hits:
+            return _LABEL_CODES["neutral"]
+        return _LABEL_CODES[_score_hits(scan.hits, mbras_user)[1]]
+
+    def _user(self, user_id: str) -> _UserAggregate:
+        user = self._users.get(user_id)
+        if user is None:
+            user = self._users[user_id] = _UserAggregate(get_follower_count(user_id))
+        return user
+
+    def _hashtag_id(self, hashtag: str) -> int:
+        hashtag_id = self._hashtag_ids.get(hashtag)
+        if hashtag_id is None:
+            if self._free_hashtag_ids:
+                hashtag_id = self._free_hashtag_ids.pop()
+                self._hashtag_names[hashtag_id] = hashtag
+            else:
+                hashtag_id = len(self._hashtag_names)
+                self._hashtag_names.append(hashtag)
+                self._hashtag_frequency.append(0)
+            self._hashtag_ids[hashtag] = hashtag_id
+        return hashtag_id
+
+    def _add_flags(self, flags: int, delta: int) -> None:
+        for index in range(len(FLAG_NAMES)):
+            if flags & (1 << index):
+                self._flag_counts[index] += delta
+
+    def evict_before(self, timestamp: Any) -> int:
+        """Remove as mensagens com timestamp anterior a ``timestamp``; retorna quantas saíram."""
+        cutoff = epoch_seconds(timestamp)
+        evicted = 0
+        while self._eviction_heap and self._eviction_heap[0][0] < cutoff:
+            _, seq = heapq.heappop(self._eviction_heap)
+            self._remove(seq - self._base)
+            evicted += 1
+        if evicted:
+            self._compact()
+        return evicted
+
+    def _remove(self, row: int) -> None:
+        self._live[row] = 0
+        self._live_count -= 1
+        if self._live_count == 0:
+            self._latest_timestamp = None
+
+        label_code = self._labels[row]
+        reactions, shares, views = self._reactions[row], self._shares[row], self._views[row]
+        self._label_counts[label_code] -= 1
+        self._engagement_sum.remove(compute_engagement_rate(reactions, shares, views))
+        self._add_flags(self._flags[row], -1)
+        self._remove_entities(row)
+
+    def _remove_entities(self, row: int) -> None:
+        reactions, shares, views = self._reactions[row], self._shares[row], self._views[row]
+        user_id = self._user_ids[row]
+        user = self._users[user_id]
+        user.message_count -= 1
+        if user.message_count == 0:
+            del self._users[user_id]
+        else:
+            user.reactions -= reactions
+            user.shares -= shares
+            user.views -= views
+
+        for hashtag_id in self._row_hashtags(row):
+            self._hashtag_frequency[hashtag_id] -= 1
+            if not self._hashtag_frequency[hashtag_id]:
+                del self._hashtag_ids[self._hashtag_names[hashtag_id]]
+                self._free_hashtag_ids.append(hashtag_id)
+
+    def _row_hashtags(self, row: int) -> array:
+        start = self._hashtag_ends[row - 1] if row > 0 else self._hashtag_base
+        end = self._hashtag_ends[row]
+        return self._hashtag_values[start - self._hashtag_base:end - self._hashtag_base]
+
+    def _compact(self) -> None:
+        """Descarta as linhas mortas do início das colunas quando já são maioria."""
+        live = self._live
+        while self._head < len(live) and not live[self._head]:
+            self._head += 1
+
+        dead = self._head
+        if dead < _MIN_COMPACTION_ROWS or dead * 2 < len(live):
+            return
+
+        self._compact_hashtags(dead)
+        for column in (
+            live, self._timestamps, self._user_ids, self._labels, self._flags,
+            self._reactions, self._shares, self._views,
+        ):
+            del column[:dead]
+        self._base += dead
+        self._head = 0
+
+    def _compact_hashtags(self, dead: int) -> None:
+        hashtag_base = self._hashtag_ends[dead - 1]
+        del self._hashtag_values[:hashtag_base - self._hashtag_base]
+        del self._hashtag_ends[:dead]
+        self._hashtag_base = hashtag_base
+
+    def _is_live(self, seq: int) -> bool:
+        row = seq - self._base
+        return row >= 0 and self._live[row] == 1
+
+    def partial(self) -> "PartialAggregate":
+        """Agregados das mensagens vivas, combináveis com os de outros analisadores."""
+        partial = self._live_aggregate()
+        # cópias do estado incremental: o agregado não muda com ingestões e remoções futuras
+        partial.label_counts = list(self._label_counts)
+        partial.engagement_sum = _ExactSum()
+        partial.engagement_sum.merge(self._engagement_sum)
+        partial.flag_counts = list(self._flag_counts)
+        partial.users = {
+            user_id: UserStats(user.first_seq, user.followers, user.reactions, user.shares, user.views)
+            for user_id, user in partial.users.items()
+        }
+        return partial
+
+    def _live_aggregate(self) -> "PartialAggregate":
+        """Agregado das mensagens vivas que compartilha o estado incremental (só leitura).
+
+        Contagens, soma de engagement, flags e usuários são os do analisador, sem cópia;
+        só as colunas da detecção de anomalias e as ocorrências de hashtags percorrem as
+        linhas vivas.
+        """
+        aggregate = PartialAggregate()
+        aggregate.message_count = self._live_count
+        aggregate.label_counts = self._label_counts
+        aggregate.engagement_sum = self._engagement_sum
+        aggregate.flag_counts = self._flag_counts
+        aggregate.latest_timestamp = self._latest_timestamp
+
+        live_rows = [row for row in range(self._head, len(self._live)) if self._live[row]]
+        aggregate.timestamps = array("q", [self._timestamps[row] for row in live_rows])
+        aggregate.user_ids = [self._user_ids[row] for row in live_rows]
+        aggregate.labels = array("b", [self._labels[row] for row in live_rows])
+        self._partial_entities(aggregate, live_rows)
+        return aggregate
+
+    def _partial_entities(self, partial: "PartialAggregate", live_rows: List[int]) -> None:
+        for user in self._users.values():
+            user.first_seq = self._first_live_seq(user)
+        partial.users = self._users
+        # ids internos -> códigos densos do agregado, só para as hashtags vivas
+        partial_codes: Dict[int, int] = {}
+        for partial_row, row in enumerate(live_rows):
+            for hashtag_id in self._row_hashtags(row):
+                code = partial_codes.get(hashtag_id)
+                if code is None:
+                    code = partial_codes[hashtag_id] = len(partial.hashtags)
+                    partial.hashtags.append(self._hashtag_names[hashtag_id])
+                partial.hashtag_codes.append(code)
+                partial.hashtag_rows.append(partial_row)
+
+    def snapshot(self, top_n_influencers: Optional[int] = None) -> Dict[str, Any]:
+        """Resultado da análise para as mensagens atualmente na janela.
+
+        ``top_n_influencers`` limita o ``influence_ranking`` aos N primeiros. Custa
+        O(usuários) para o ranking mais O(mensagens vivas) para anomalias e trending,
+        que dependem da sequência de mensagens e da mais recente delas.
+        """
+        if not self._live_count:
+            return _empty_analysis()
+        return self._live_aggregate().snapshot(top_n_influencers, self._backend_name, self._timings)
+
+    def _first_live_seq(self, user: _UserAggregate) -> int:
+        while not self._is_live(user.seqs[0]):
+            heapq.heappop(user.seqs)
+        return user.seqs[0]
+
+
+
+# HEAVY HITTERS APROXIMADOS
+# Contadores de hashtag por minuto da janela (Space-Saving)
+HASHTAG_SKETCH_CAPACITY = 128
+# Usuários acompanhados para o influence_ranking do modo aproximado
+INFLUENCER_CANDIDATES = 256
+# Count-Min das somas por usuário: erro ≤ e/width × total com probabilidade ≥ 1 − e^−depth
+COUNT_MIN_WIDTH = 4096
+COUNT_MIN_DEPTH = 4
+
+
+class SpaceSaving:
+    """Chaves mais pesadas de um fluxo em no máximo ``capacity`` contadores (Space-Saving ponderado).
+
+    ``counters`` mapeia cada chave monitorada para ``[peso, erro, ocorrências, soma de
+    peso × timestamp]``. Uma chave nova com os contadores cheios toma o lugar da de menor
+    peso e herda o contador: o peso real fica entre ``peso − erro`` e ``peso``, com
+    ``erro`` ≤ ``total / capacity``; uma chave fora dos contadores pesa no máximo isso.
+    """
+
+    __slots__ = ("capacity", "total", "counters", "_heap")
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.total = 0.0
+        self.counters: Dict[str, List[Any]] = {}
+        # (peso, chave) com entradas antigas descartadas na leitura
+        self._heap: List[Tuple[float, str]] = []
+
+    def add(self, key: str, weight: float, timestamp: int) -> None:
+        self.total += weight
+        counter = self.counters.get(key)
+        if counter is None:
+            if len(self.counters) < self.capacity:
+                counter = self.counters[key] = [0.0, 0.0, 0, 0.0]
+            else:
+                counter = self.counters.pop(self._pop_smallest())
+                counter[1] = counter[0]
+                self.counters[key] = counter
+        counter[0] += weight
+        counter[2] += 1
+        counter[3] += weight * timestamp
+
+        heapq.heappush(self._heap, (counter[0], key))
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(counter[0], key) for key, counter in self.counters.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_smallest(self) -> str:
+        while True:
+            weight, key = heapq.heappop(self._heap)
+            counter = self.counters.get(key)
+            if counter is not None and counter[0] == weight:
+                return key
+
+
+class CountMinSketch:
+    """Somas aproximadas por chave em ``depth`` × ``width`` células (Count-Min), ``fields`` valores por célula.
+
+    As operações recebem as posições da chave em cada linha (``offsets(key)``), para
+    hashear cada chave uma vez por lote. ``add`` aceita deltas negativos para retirar o
+    que já foi somado. Enquanto as somas reais forem não negativas, ``estimate`` nunca
+    fica abaixo delas e, com probabilidade ≥ 1 − e^−depth, as excede em no máximo
+    e/width × o total do campo.
+    """
+
+    __slots__ = ("width", "depth", "fields", "totals", "_tables")
+
+    def __init__(self, width: int, depth: int, fields: int = 1) -> None:
+        self.width = width
+        self.depth = depth
+        self.fields = fields
+        self.totals = [0] * fields
+        self._tables = [array("q", bytes(8 * width * fields)) for _ in range(depth)]
+
+    def offsets(self, key: str) -> List[int]:
+        # hashing duplo sobre um digest estável (o hash() de str muda a cada processo)
+        digest = hashlib.blake2b(key.encode("utf-8", "surrogatepass"), digest_size=8).digest()
+        first, step = int.from_bytes(digest[:4], "little"), int.from_bytes(digest[4:], "little") | 1
+        return [(first + row * step) % self.width * self.fields for row in range(self.depth)]
+
+    def add(self, offsets: List[int], values: Sequence[int]) -> None:
+        for field, value in enumerate(values):
+            self.totals[field] += value
+        for table, offset in zip(self._tables, offsets):
+            for field, value in enumerate(values, offset):
+                table[field] += value
+
+    def estimate(self, offsets: List[int]) -> Tuple[int, ...]:
+        cells = [table[offset:offset + self.fields] for table, offset in zip(self._tables, offsets)]
+        return tuple(map(min, *cells)) if self.depth > 1 else tuple(cells[0])
+
+    def estimate_debiased(self, offsets: List[int], field: int) -> int:
+        """Estimativa Count-Mean-Min de um campo: cada célula menos o ruído médio das outras chaves.
+
+        Mediana entre as linhas, limitada a [0, ``estimate``]; erra para os dois lados, mas
+        não acumula o viés das colisões quando há muito mais chaves que células.
+        """
+        cells = [table[offset + field] for table, offset in zip(self._tables, offsets)]
+        noise = self.totals[field] / (self.width - 1)
+        values = sorted(cell - (noise - cell / (self.width - 1)) for cell in cells)
+        middle = len(values) // 2
+        median = values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2
+        return min(max(0, round(median)), min(cells))
+
+
+def _influence_score(followers: int, reactions: int, shares: int, views: int) -> float:
+    return followers * 0.4 + compute_engagement_rate(reactions, shares, views) * 0.6
+
+
+class _Candidate(UserStats):
+    """Usuário acompanhado no modo aproximado: somas exatas desde que entrou, score e última mensagem."""
+
+    __slots__ = ("score", "last_seen")
+
+    def __init__(
+        self, score: float, last_seen: int, first_seq: int, followers: int, reactions: int, shares: int, views: int
+    ) -> None:
+        super().__init__(first_seq, followers, reactions, shares, views)
+        self.score = score
+        self.last_seen = last_seen
+
+
+class ApproximateFeedAnalyzer(FeedAnalyzer):
+    """``FeedAnalyzer`` com os agregados de hashtags e usuários em memória fixa, qualquer que seja a cardinalidade.
+
+    Trending: um ``SpaceSaving`` por minuto da janela com o peso b·s de cada ocorrência
+    (fator de comprimento × multiplicador de sentimento); no snapshot, o limite inferior
+    ``peso − erro`` de cada contador recebe o peso temporal ``1 + 1/minutos`` no seu
+    timestamp médio. Um minuto só sai da janela quando todas as suas mensagens saíram.
+    Influência: um ``CountMinSketch`` com reactions/shares/views/mensagens por usuário e os
+    ``influencer_candidates`` usuários de maior score, com somas exatas a partir de quando
+    entraram; o histórico anterior vem da estimativa Count-Mean-Min do sketch.
+
+    Sentimento, engagement, flags e anomalias continuam exatos; ``partial()`` não traz
+    usuários nem hashtags, então os agregados deste analisador não são combináveis. A
+    memória fixa é só a desses agregados: as colunas por mensagem da janela (timestamp,
+    usuário, rótulo) continuam, e a detecção de anomalias agrupa as linhas por usuário no
+    snapshot, ambas O(mensagens da janela).
+    """
+
+    def __init__(
+        self,
+        backend: Optional[str] = None,
+        first_seq: int = 0,
+        timings: Optional[StageTimings] = None,
+        hashtag_capacity: int = HASHTAG_SKETCH_CAPACITY,
+        influencer_candidates: int = INFLUENCER_CANDIDATES,
+        count_min_width: int = COUNT_MIN_WIDTH,
+        count_min_depth: int = COUNT_MIN_DEPTH,
+    ) -> None:
+        super().__init__(backend, first_seq, timings)
+        self.hashtag_capacity = hashtag_capacity
+        self.influencer_candidates = influencer_candidates
+        # minuto (epoch // 60) -> contadores das hashtags do minuto
+        self._hashtag_minutes: Dict[int, SpaceSaving] = {}
+        # reactions, shares, views e mensagens por usuário
+        self._user_sums = CountMinSketch(count_min_width, count_min_depth, fields=4)
+        # user_id -> [score, primeiro seq, último timestamp, followers, reactions, shares, views]
+        self._candidates: Dict[str, _Candidate] = {}
+        self._candidate_heap: List[Tuple[float, str]] = []
+        # mensagens removidas somadas por usuário até o fim de evict_before
+        self._removed: Dict[str, List[int]] = {}
+
+    def _add_users(
+        self, batch: MessageBatch, first_seq: int, timestamps: array,
+        user_codes: array, reactions: array, shares: array, views: array,
+    ) -> None:
+        user_count = len(batch.user_ids)
+        first_seqs = [-1] * user_count
+        last_seen = [0] * user_count
+        for seq, (code, timestamp) in enumerate(zip(user_codes, timestamps), first_seq):
+            if first_seqs[code] < 0:
+                first_seqs[code] = seq
+                last_seen[code] = timestamp
+            elif timestamp > last_seen[code]:
+                last_seen[code] = timestamp
+
+        user_totals = list(zip(*self._backend.user_sums(user_codes, reactions, shares, views, user_count)))
+        offsets = [
+            self._user_sums.offsets(user_id) if totals[0] else None
+            for user_id, totals in zip(batch.user_ids, user_totals)
+        ]
+        # Histórico de quem ainda não é candidato, estimado antes de somar o lote: o
+        # Count-Min só erra no que veio de lotes anteriores
+        history = {
+            code: self._history(offsets[code])
+            for code, totals in enumerate(user_totals)
+            if totals[0] and batch.user_ids[code] not in self._candidates
+        }
+        for code, (count, reaction_sum, share_sum, view_sum) in enumerate(user_totals):
+            if not count:
+                continue
+            user_id = batch.user_ids[code]
+            self._user_sums.add(offsets[code], (reaction_sum, share_sum, view_sum, count))
+            candidate = self._candidates.get(user_id)
+            if candidate is not None:
+                candidate.last_seen = max(candidate.last_seen, last_seen[code])
+                candidate.reactions += reaction_sum
+                candidate.shares += share_sum
+                candidate.views += view_sum
+                self._rescore(user_id, candidate)
+                continue
+
+            previous = history.get(code)
+            if previous is None:
+                # era candidato e perdeu o lugar durante este lote
+                continue
+            followers = get_follower_count(user_id)
+            sums = (previous[0] + reaction_sum, previous[1] + share_sum, previous[2] + view_sum)
+            score = _influence_score(followers, *sums)
+            if len(self._candidates) >= self.influencer_candidates:
+                smallest = self._smallest_candidate()
+                if score <= smallest[0]:
+                    continue
+                heapq.heappop(self._candidate_heap)
+                del self._candidates[smallest[1]]
+            self._candidates[user_id] = _Candidate(score, last_seen[code], first_seqs[code], followers, *sums)
+            heapq.heappush(self._candidate_heap, (score, user_id))
+
+    def _history(self, offsets: List[int]) -> Tuple[int, ...]:
+        user_sums = self._user_sums
+        # sem mensagens anteriores estimadas, as colisões não viram histórico
+        if not user_sums.estimate_debiased(offsets, 3):
+            return (0, 0, 0)
+        return tuple(user_sums.estimate_debiased(offsets, field) for field in range(3))
+
+    def _rescore(self, user_id: str, candidate: "_Candidate") -> None:
+        candidate.score = _influence_score(candidate.followers, candidate.reactions, candidate.shares, candidate.views)
+        heapq.heappush(self._candidate_heap, (candidate.score, user_id))
+        if len(self._candidate_heap) > 4 * self.influencer_candidates:
+            self._candidate_heap = [(candidate.score, user_id) for user_id, candidate in self._candidates.items()]
+            heapq.heapify(self._candidate_heap)
+
+    def _smallest_candidate(self) -> Tuple[float, str]:
+        heap = self._candidate_heap
+        while True:
+            score, user_id = heap[0]
+            candidate = self._candidates.get(user_id)
+            if candidate is not None and candidate.score == score:
+                return heap[0]
+            heapq.heappop(heap)
+
+    def _add_hashtags(self, batch: MessageBatch, rows: Sequence[int], timestamps: array, labels: List[int]) -> None:
+        offsets, codes = batch.hashtag_offsets, batch.hashtag_codes
+        minutes = self._hashtag_minutes
+        # fator de comprimento uma vez por hashtag distinta do lote
+        base_weights: List[Optional[float]] = [None] * len(batch.hashtags)
+        for row, timestamp, label_code in zip(rows, timestamps, labels):
+            start, end = offsets[row], offsets[row + 1]
+            if start == end:
+                continue
+            counters = minutes.get(timestamp // 60)
+            if counters is None:
+                counters = minutes[timestamp // 60] = SpaceSaving(self.hashtag_capacity)
+            multiplier = _LABEL_MULTIPLIERS[label_code]
+            for code in codes[start:end]:
+                base_weight = base_weights[code]
+                if base_weight is None:
+                    base_weight = base_weights[code] = _hashtag_base_weight(batch.hashtags[code])
+                counters.add(batch.hashtags[code], base_weight * multiplier, timestamp)
+
+    def _remove_entities(self, row: int) -> None:
+        removed = self._removed.get(self._user_ids[row])
+        if removed is None:
+            removed = self._removed[self._user_ids[row]] = [0, 0, 0, 0]
+        removed[0] -= self._reactions[row]
+        removed[1] -= self._shares[row]
+        removed[2] -= self._views[row]
+        removed[3] -= 1
+
+    def _compact_hashtags(self, dead: int) -> None:
+        pass
+
+    def _partial_entities(self, partial: PartialAggregate, live_rows: List[int]) -> None:
+        pass
+
+    def evict_before(self, timestamp: Any) -> int:
+        cutoff = epoch_seconds(timestamp)
+        evicted = super().evict_before(cutoff)
+        for user_id, deltas in self._removed.items():
+            self._user_sums.add(self._user_sums.offsets(user_id), deltas)
+            candidate = self._candidates.get(user_id)
+            if candidate is not None:
+                candidate.reactions += deltas[0]
+                candidate.shares += deltas[1]
+                candidate.views += deltas[2]
+                self._rescore(user_id, candidate)
+        self._removed.clear()
+        # Space-Saving não remove: o minuto sai inteiro quando todas as suas mensagens saíram
+        for minute in [minute for minute in self._hashtag_minutes if (minute + 1) * 60 <= cutoff]:
+            del self._hashtag_minutes[minute]
+        for user_id in [user_id for user_id, candidate in self._candidates.items() if candidate.last_seen < cutoff]:
+            del self._candidates[user_id]
+        return evicted
+
+    def snapshot(self, top_n_influencers: Optional[int] = None) -> Dict[str, Any]:
+        if not self._live_count:
+            return _empty_analysis()
+        result = self._live_aggregate().snapshot(top_n_influencers, self._backend_name, self._timings)
+        with self._timings.span("trending"):
+            result["trending_topics"] = self._trending_topics()
+        with self._timings.span("influence"):
+            result["influence_ranking"] = self._influence_ranking(top_n_influencers)
+        return result
+
+    def _trending_topics(self) -> List[str]:
+        now_reference = self._latest_timestamp
+        hashtag_weights: Dict[str, float] = {}
+        hashtag_frequency: Dict[str, int] = {}
+        for counters in self._hashtag_minutes.values():
+            for hashtag, (weight, error, count, weighted_time) in counters.counters.items():
+                # limite inferior: só o peso somado desde que a hashtag ganhou o contador
+                time_weight = _time_weight(now_reference - weighted_time / weight)
+                hashtag_weights[hashtag] = hashtag_weights.get(hashtag, 0.0) + (weight - error) * time_weight
+                hashtag_frequency[hashtag] = hashtag_frequency.get(hashtag, 0) + count
+        return _rank_hashtags(hashtag_weights, hashtag_frequency) if hashtag_weights else []
+
+    def _influence_ranking(self, limit: Optional[int] = None) -> List[InfluenceEntry]:
+        candidates = self._candidates
+        order = heapq.nsmallest(
+            len(candidates) if limit is None else limit,
+            candidates,
+            key=lambda user_id: (-candidates[user_id].score, candidates[user_id].first_seq),
+        )
+        ranking: List[InfluenceEntry] = []
+        for user_id in order:
+            candidate = candidates[user_id]
+            ranking.append({
+                "user_id": user_id,
+                "followers": candidate.followers,
+                "engagement_rate": compute_engagement_rate(candidate.reactions, candidate.shares, candidate.views),
+                "influence_score": candidate.score,
+            })
+        return ranking
+
+
+
+# ANÁLISE EM STREAMING
+class StreamingFeedAnalyzer:
+    """Dobra mensagens que chegam em sequência na janela de ``analyze_feed``.
+
+    A janela é relativa à mensagem mais recente vista até agora; como essa
+    referência só avança, mensagens que já saíram da janela nunca voltam e são
+    descartadas a cada bloco. A memória fica limitada ao conteúdo da janela, e o
+    resultado final é o mesmo de ``analyze_feed`` sobre a lista completa.
+    Com ``approximate``, os agregados de hashtags e usuários ficam em sketches de memória
+    fixa (``ApproximateFeedAnalyzer``).
+    """
+
+    def __init__(
+        self,
+        time_window_minutes: int,
+        backend: Optional[str] = None,
+        chunk_size: int = 512,
+        timings: Optional[StageTimings] = None,
+        approximate: bool = False,
+    ) -> None:
+        self.time_window_minutes = time_window_minutes
+        self.chunk_size = chunk_size
+        self.message_count = 0
+        self._backend = get_backend(backend)
+        self._timings = timings if timings is not None else NULL_TIMINGS
+        self._analyzer = (ApproximateFeedAnalyzer if approximate else FeedAnalyzer)(backend, timings=timings)
+        self._pending: List[Any] = []
+        self._latest_timestamp: Optional[int] = None
+        # tempo gasto analisando (sem a espera pelas mensagens) vira o processing_time_ms
+        self._busy_ns = 0
+
+    def add(self, message: Any) -> None:
+        self._pending.append(message)
+        self.message_count += 1
+        if len(self._pending) >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Ingere o bloco pendente e descarta o que saiu da janela."""
+        if not self._pending:
+            return
+        started = time.perf_counter_ns()
+        with self._timings.span("parse"):
+            batch = MessageBatch.from_messages(self._pending)
+        self._pending = []
+
+        latest = max(batch.timestamps)
+        if self._latest_timestamp is not None:
+            latest = max(latest, self._latest_timestamp)
+        self._latest_timestamp = latest
+
+        cutoff = latest - self.time_window_minutes * 60
+        with self._timings.span("window"):
+            rows = self._backend.window_rows(batch.timestamps, cutoff, latest + 5)
+        self._analyzer.ingest_batch(batch, rows)
+        with self._timings.span("window"):
+            self._analyzer.evict_before(cutoff)
+        self._busy_ns += time.perf_counter_ns() - started
+
+    def result(self, top_n_influencers: Optional[int] = None) -> Dict[str, Any]:
+        self.flush()
+        started = time.perf_counter_ns()
+        result = self._analyzer.snapshot(top_n_influencers)
+        if self.message_count:
+            result["processing_time_ms"] = (self._busy_ns + time.perf_counter_ns() - started) / 1e6
+        return result
+
+
+
+# ANÁLISE PARALELA (SHARDS)
+# Mínimo de mensagens por shard; abaixo disso o custo dos processos supera o ganho
+MIN_SHARD_MESSAGES = 5000
+
+
+def create_process_pool(max_workers: int) -> "ProcessPoolExecutor":
+    """Pool de processos já aquecidos (``warm_up`` no initializer de cada worker).
+
+    Nada de fork: quem cria o pool pode ter threads (servidor, to_thread) e um filho
+    herdaria locks presos por elas. O forkserver é um processo à parte, sem threads.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context(start_method),
+        initializer=warm_up,
+    )
+
+
+# Pool dos shards, reutilizado entre análises; recriado só quando pedem mais processos
+_shard_executor: Optional["ProcessPoolExecutor"] = None
+_shard_executor_workers = 0
+_shard_executor_lock = threading.Lock()
+
+
+def _get_shard_executor(workers: int) -> "ProcessPoolExecutor":
+    global _shard_executor, _shard_executor_workers
+    with _shard_executor_lock:
+        if _shard_executor is None or _shard_executor_workers < workers:
+            if _shard_executor is not None:
+                _shard_executor.shutdown(wait=False)
+            _shard_executor = create_process_pool(workers)
+            _shard_executor_workers = workers
+        return _shard_executor
+
+
+def _discard_shard_executor(broken: "ProcessPoolExecutor") -> None:
+    global _shard_executor
+    with _shard_executor_lock:
+        if _shard_executor is broken:
+            _shard_executor = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def _analyze_shard(
+    batch: MessageBatch, first_seq: int, backend: Optional[str]
+) -> Tuple[PartialAggregate, StageTimings]:
+    timings = StageTimings()
+    analyzer = FeedAnalyzer(backend, first_seq, timings)
+    analyzer.ingest_batch(batch)
+    return analyzer.partial(), timings
+
+
+def _analyze_shards(
+    batch: MessageBatch,
+    rows: Sequence[int],
+    shard_count: int,
+    backend: Optional[str],
+    timings: StageTimings,
+) -> PartialAggregate:
+    """Analisa trechos contíguos de ``rows`` em processos e combina os agregados em ordem.
+
+    Os shards viajam como sub-lotes colunares: serializar arrays custa uma
+    fração do pickling de uma mensagem por vez. Os tempos por etapa dos shards
+    são somados em ``timings`` (tempo de CPU somado entre os processos). O pool é
+    reutilizado entre chamadas; se um worker morrer, os shards rodam no próprio processo.
+
+    A parte sequencial fica no processo que chamou: o ``merge`` soma contagens e
+    usuários (O(usuários distintos)) mas concatena as colunas por mensagem
+    (O(mensagens)), e o ``snapshot`` ainda percorre todas as mensagens da janela
+    (anomalias e trending). Ela limita o ganho com muitos processos.
+    """
+    bounds = [len(rows) * shard // shard_count for shard in range(shard_count + 1)]
+    shards = [batch.select(rows[start:end]) for start, end in zip(bounds, bounds[1:])]
+    arguments = (shards, bounds[:-1], [backend] * shard_count)
+
+    executor = _get_shard_executor(shard_count)
+    try:
+        results = list(executor.map(_analyze_shard, *arguments))
+    except BrokenExecutor:
+        _discard_shard_executor(executor)
+        results = list(map(_analyze_shard, *arguments))
+
+    merged = results[0][0]
+    for partial, _ in results[1:]:
+        merged.merge(partial)
+    for _, shard_timings in results:
+        timings.merge(shard_timings)
+    return merged
+
+
+
+# FUNÇÃO PRINCIPAL
+def analyze_feed(
+    messages: Sequence[Any],
+    time_window_minutes: int,
+    *,
+    top_n_influencers: Optional[int] = None,
+    backend: Optional[str] = None,
+    workers: Optional[int] = None,
+    timings: Optional[StageTimings] = None,
+    approximate: bool = False,
+) -> Dict[str, Any]:
+    """Análise da janela de ``time_window_minutes`` terminando na mensagem mais recente.
+
+    ``messages`` pode ser uma sequência de mensagens ou um ``MessageBatch`` já
+    montado. Com ``workers`` > 1, feeds grandes são divididos em shards analisados em
+    paralelo por processos; o resultado é idêntico ao da análise sequencial.
+    ``timings`` recebe a duração de cada etapa; ``processing_time_ms`` é sempre medido.
+    ``approximate`` calcula trending e influência com ``ApproximateFeedAnalyzer``
+    (sempre sequencial).
+    """
+    if not messages:
+        return _empty_analysis()
+
+    started = time.perf_counter_ns()
+    if timings is None:
+        timings = NULL_TIMINGS
+
+    with timings.span("parse"):
+        batch = messages if isinstance(messages, MessageBatch) else MessageBatch.from_messages(messages)
+
+    with timings.span("window"):
+        now_reference = max(batch.timestamps)
+        window_rows = get_backend(backend).window_rows(
+            batch.timestamps,
+            now_reference - time_window_minutes * 60,
+            now_reference + 5,
+        )
+
+    shard_count = 1 if approximate else min(workers or 1, len(window_rows) // MIN_SHARD_MESSAGES)
+    if shard_count > 1:
+        partial = _analyze_shards(batch, window_rows, shard_count, backend, timings)
+        result = partial.snapshot(top_n_influencers, backend, timings)
+    else:
+        analyzer = (ApproximateFeedAnalyzer if approximate else FeedAnalyzer)(backend, timings=timings)
+        analyzer.ingest_batch(batch, window_rows)
+        result = analyzer.snapshot(top_n_influencers)
+
+    result["processing_time_ms"] = (time.perf_counter_ns() - started) / 1e6
+    return result
+
+
+def analyze_feed_timed(
+    messages: Sequence[Any], time_window_minutes: int, **options: Any
+) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """``analyze_feed`` mais a duração (ms) de cada etapa; serializável para o pool de processos."""
+    timings = StageTimings()
+    analysis = analyze_feed(messages, time_window_minutes, timings=timings, **options)
+    return analysis, timings.as_ms()
+
+
+def with_lexicon_version(function: Any, *args: Any, **kwargs: Any) -> Tuple[Any, Optional[str]]:
+    """``function(*args, **kwargs)`` e a versão do lexicon que a análise usou.
+
+    Roda no processo da análise (um worker do pool pode estar com outro lexicon
+    que o servidor); a versão é None se o lexicon mudou durante a chamada.
+    """
+    refresh_lexicon()
+    lexicon = get_lexicon()
+    result = function(*args, **kwargs)
+    return result, lexicon.version if get_lexicon() is lexicon else None
+
+
+def analyze_feeds(
+    jobs: Sequence[Tuple[str, Sequence[Any], int, Optional[int]]]
+) -> List[Tuple[str, Dict[str, Any], Dict[str, float]]]:
+    """Analisa vários feeds independentes; unidade de trabalho enviada ao pool de processos.
+
+    Cada job é ``(feed_id, messages, time_window_minutes, top_n_influencers)``; cada
+    resultado é ``(feed_id, análise, duração por etapa em ms)``.
+    """
+    return [
+        (feed_id,) + analyze_feed_timed(messages, time_window_minutes, top_n_influencers=top_n_influencers)
+        for feed_id, messages, time_window_minutes, top_n_influencers in jobs
+    ]
+
+
+
+# AQUECIMENTO
+# Conteúdos que passam pelos caminhos da varredura: polaridade, intensificador, negação, meta e flags
+_WARM_UP_CONTENTS = (
+    "Adorei o produto, muito bom!",
+    "não gostei, serviço péssimo",
+    "teste técnico mbras",
+    "Super ótimo #produto",
+)
+
+
+def warm_up() -> None:
+    """Compila o lexicon, importa o backend padrão e roda uma análise pequena.
+
+    Um worker recém-criado paga esses custos aqui, antes de se declarar pronto,
+    e não na primeira requisição.
+    """
+    messages = [
+        MessageRecord(
+            f"warm_up_{i}", content, 1_757_502_000 + i,
+            "user_mbras_warm_up" if i == 2 else "user_warm_up", ["#produto"], i, 0, 10,
+        )
+        for i, content in enumerate(_WARM_UP_CONTENTS)
+    ]
+    analyze_feed(messages, 30)
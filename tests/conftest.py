@@ -1,6 +1,23 @@
 import os
 import sys
 
+import pytest
+
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
+
+import main  # noqa: E402
+from sentiment_analyzer import clear_caches  # noqa: E402
+
+
+def without_timing(analysis):
+    """Resultado sem ``processing_time_ms``, medido a cada chamada; o resto é determinístico."""
+    return {key: value for key, value in analysis.items() if key != "processing_time_ms"}
+
+
+@pytest.fixture(autouse=True)
+def _clear_analyzer_caches():
+    clear_caches()
+    main.RESULT_CACHE.clear()
+    yield
@@ -1,11 +1,16 @@
+import functools
 import json
+import os
 from fastapi.testclient import TestClient
 from datetime import datetime, timezone
 
+from conftest import without_timing
 from main import app
+from sentiment_analyzer import analyze_feed
 
 
 client = TestClient(app)
+EXAMPLES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "examples")
 
 
 def post_analyze(payload):
@@ -378,3 +383,401 @@ def test_long_hashtag_logarithmic_decay():
     r = post_analyze(payload)
     assert r.status_code == 200
     # Long hashtag should have reduced weight due to logarithmic factor
+
+
+def test_top_n_influencers_caps_ranking():
+    messages = [
+        {
+            "id": f"msg_top{i}",
+            "content": "bom produto",
+            "timestamp": "2025-09-10T10:00:00Z",
+            "user_id": f"user_top_{i:03d}",
+            "hashtags": [],
+            "reactions": i,
+            "shares": 0,
+            "views": 100,
+        }
+        for i in range(20)
+    ]
+    full = post_analyze({"messages": messages, "time_window_minutes": 30}).json()["analysis"]
+    r = post_analyze({"messages": messages, "time_window_minutes": 30, "top_n_influencers": 3})
+    assert r.status_code == 200
+    ranking = r.json()["analysis"]["influence_ranking"]
+    assert ranking == full["influence_ranking"][:3]
+
+    r = post_analyze({"messages": messages, "time_window_minutes": 30, "top_n_influencers": 0})
+    assert r.status_code == 422
+
+
+def post_analyze_stream(messages, time_window_minutes=30, **params):
+    body = "\n".join(json.dumps(message, ensure_ascii=False) for message in messages) + "\n"
+    return client.post(
+        "/analyze-feed/stream",
+        params={"time_window_minutes": time_window_minutes, **params},
+        content=body.encode("utf-8"),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+
+
+def test_stream_matches_analyze_feed():
+    with open(os.path.join(EXAMPLES_DIR, "edge_cases.json"), encoding="utf-8") as f:
+        payload = json.load(f)
+
+    expected = post_analyze(payload).json()["analysis"]
+    r = post_analyze_stream(payload["messages"], payload["time_window_minutes"])
+    assert r.status_code == 200
+    assert without_timing(r.json()["analysis"]) == without_timing(expected)
+
+    # poucas hashtags e usuários: os sketches não descartam nada e o resultado é o mesmo
+    r = post_analyze_stream(payload["messages"], payload["time_window_minutes"], approximate="true")
+    assert r.status_code == 200
+    approximate = r.json()["analysis"]
+    assert approximate["trending_topics"] == expected["trending_topics"]
+    assert [entry["user_id"] for entry in approximate["influence_ranking"]] == [
+        entry["user_id"] for entry in expected["influence_ranking"]
+    ]
+
+
+def test_stream_rejects_invalid_line():
+    message = {
+        "id": "msg_s1",
+        "content": "bom",
+        "timestamp": "2025-09-10T10:00:00Z",
+        "user_id": "user_abc",
+        "hashtags": [],
+        "reactions": 1,
+        "shares": 0,
+        "views": 10,
+    }
+    broken = dict(message, reactions="muitas")
+    r = post_analyze_stream([message, broken])
+    assert r.status_code == 400
+    assert r.json() == {"error": "Mensagem inválida na linha 2", "code": "INVALID_MESSAGE"}
+
+
+def test_ndjson_lines_are_reassembled_across_chunks():
+    import asyncio
+
+    import main
+
+    class ChunkedRequest:
+        def __init__(self, body, size):
+            self.body, self.size = body, size
+
+        async def stream(self):
+            for start in range(0, len(self.body), self.size):
+                yield self.body[start:start + self.size]
+
+    async def lines(request):
+        return [item async for item in main._iter_ndjson_lines(request)]
+
+    body = b'{"a": 1}\n\n  \n{"b": 2}\r\n{"c": 3}'
+    expected = [(1, b'{"a": 1}'), (4, b'{"b": 2}\r'), (5, b'{"c": 3}')]
+    for size in (1, 3, 9, len(body)):
+        assert asyncio.run(lines(ChunkedRequest(body, size))) == expected
+    assert asyncio.run(lines(ChunkedRequest(body + b"\n", 4))) == expected
+
+
+def test_stream_requires_ndjson_and_supported_window():
+    r = client.post("/analyze-feed/stream", params={"time_window_minutes": 30}, json=[])
+    assert r.status_code == 415
+
+    r = post_analyze_stream([], time_window_minutes=123)
+    assert r.status_code == 422
+    assert r.json()["code"] == "UNSUPPORTED_TIME_WINDOW"
+
+    # mesmo limite das rotas JSON
+    for window in (0, -5):
+        assert post_analyze_stream([], time_window_minutes=window).status_code == 422
+    assert client.post("/analyze-feed", json={"messages": [], "time_window_minutes": 0}).status_code == 422
+    feeds = [{"feed_id": "a", "messages": [], "time_window_minutes": 0}]
+    assert client.post("/analyze-feeds", json=feeds).status_code == 422
+
+
+def test_fast_path_and_pydantic_fallback_agree():
+    from sentiment_analyzer import analyze_feed
+
+    with open(os.path.join(EXAMPLES_DIR, "edge_cases.json"), encoding="utf-8") as f:
+        payload = json.load(f)
+    # user_café e reactions como string não passam no caminho rápido e caem no pydantic
+    payload["messages"][0]["reactions"] = "0"
+
+    r = post_analyze(payload)
+    assert r.status_code == 200
+    messages = [dict(m, reactions=int(m["reactions"])) for m in payload["messages"]]
+    expected = analyze_feed(messages, payload["time_window_minutes"])
+    assert without_timing(r.json()["analysis"]) == json.loads(json.dumps(without_timing(expected)))
+
+
+def test_invalid_message_reports_location():
+    payload = {
+        "messages": [
+            {
+                "id": "msg_bad",
+                "content": "bom",
+                "timestamp": "ontem",
+                "user_id": "user_abc",
+                "hashtags": [],
+                "reactions": 1,
+                "shares": 0,
+                "views": 10,
+            }
+        ],
+        "time_window_minutes": 30,
+    }
+    r = post_analyze(payload)
+    assert r.status_code == 422
+    assert r.json()["detail"][0]["loc"] == ["body", "messages", 0, "timestamp"]
+
+
+def test_analyze_feeds_matches_single_feed_results():
+    with open(os.path.join(EXAMPLES_DIR, "edge_cases.json"), encoding="utf-8") as f:
+        edge_cases = json.load(f)
+    with open(os.path.join(EXAMPLES_DIR, "sample_request.json"), encoding="utf-8") as f:
+        sample = json.load(f)
+    feeds = [
+        dict(sample, feed_id="sample"),
+        dict(edge_cases, feed_id="edge", top_n_influencers=1),
+        {"feed_id": "bloqueado", "messages": [], "time_window_minutes": 123},
+    ]
+
+    r = client.post("/analyze-feeds", json=feeds)
+    assert r.status_code == 200
+    results = r.json()["results"]
+    assert list(results) == ["sample", "edge", "bloqueado"]
+    for feed in feeds[:2]:
+        single = {key: value for key, value in feed.items() if key != "feed_id"}
+        expected = post_analyze(single).json()["analysis"]
+        assert without_timing(results[feed["feed_id"]]["analysis"]) == without_timing(expected)
+    assert results["bloqueado"]["code"] == "UNSUPPORTED_TIME_WINDOW"
+
+
+def test_analyze_feeds_survives_a_dead_pool_worker(monkeypatch):
+    import signal
+    from concurrent.futures import BrokenExecutor
+
+    import pytest
+
+    import main
+
+    with open(os.path.join(EXAMPLES_DIR, "sample_request.json"), encoding="utf-8") as f:
+        feeds = [dict(json.load(f), feed_id="sample")]
+    expected = client.post("/analyze-feeds", json=feeds).json()
+
+    monkeypatch.setattr(main, "ANALYSIS_WORKERS", 1)
+    main.shutdown_executor()
+    broken = main.get_executor()
+    assert broken._mp_context.get_start_method() != "fork"
+    os.kill(broken.submit(os.getpid).result(), signal.SIGKILL)
+    with pytest.raises(BrokenExecutor):
+        broken.submit(os.getpid).result()
+
+    r = client.post("/analyze-feeds", json=feeds)
+    assert r.status_code == 200
+    assert without_timing(r.json()["results"]["sample"]["analysis"]) == without_timing(
+        expected["results"]["sample"]["analysis"]
+    )
+    assert main.get_executor() is not broken
+    main.shutdown_executor()
+
+
+def test_analyze_feeds_rejects_duplicate_feed_ids():
+    feeds = [{"feed_id": "a", "messages": [], "time_window_minutes": 30}] * 2
+    r = client.post("/analyze-feeds", json=feeds)
+    assert r.status_code == 422
+    assert r.json()["code"] == "DUPLICATE_FEED_ID"
+
+
+def test_processing_time_and_debug_stage_breakdown():
+    with open(os.path.join(EXAMPLES_DIR, "sample_request.json"), encoding="utf-8") as f:
+        payload = json.load(f)
+
+    r = post_analyze(payload)
+    assert r.json()["analysis"]["processing_time_ms"] > 0
+    assert "server-timing" not in r.headers
+
+    r = client.post("/analyze-feed", json=payload, headers={"X-Debug-Timings": "1"})
+    entries = dict(entry.split(";dur=") for entry in r.headers["server-timing"].split(", "))
+    assert set(entries) == {"parse", "window", "sentiment", "flags", "engagement", "influence", "trending", "anomaly", "total"}
+    assert float(entries["total"]) == round(r.json()["analysis"]["processing_time_ms"], 3)
+
+
+def test_metrics_exposes_cumulative_stage_histograms():
+    def sample(text, line_prefix):
+        return next(float(line.split()[-1]) for line in text.splitlines() if line.startswith(line_prefix))
+
+    before = client.get("/metrics").text
+    with open(os.path.join(EXAMPLES_DIR, "sample_request.json"), encoding="utf-8") as f:
+        post_analyze(json.load(f))
+    r = client.get("/metrics")
+
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE pulsecore_stage_duration_seconds histogram" in r.text
+    count = 'pulsecore_stage_duration_seconds_count{stage="sentiment"}'
+    assert sample(r.text, count) == sample(before, count) + 1
+    inf_bucket = 'pulsecore_analysis_duration_seconds_bucket{le="+Inf"}'
+    assert sample(r.text, inf_bucket) == sample(r.text, "pulsecore_analysis_duration_seconds_count")
+
+
+def test_json_fast_path_round_trips_and_falls_back_to_stdlib():
+    from main import json_loads
+
+    assert json_loads('{"content": "ótimo 😀", "views": 10, "rate": 0.5}'.encode()) == {
+        "content": "ótimo 😀", "views": 10, "rate": 0.5,
+    }
+    # orjson recusa NaN; a stdlib aceita, como antes
+    assert json_loads(b"[NaN]")[0] != json_loads(b"[NaN]")[0]
+
+    with open(os.path.join(EXAMPLES_DIR, "sample_request.json"), "rb") as f:
+        body = f.read()
+    r = client.post("/analyze-feed", content=body, headers={"Content-Type": "application/json"})
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/json"
+    expected = analyze_feed(json.loads(body)["messages"], json.loads(body)["time_window_minutes"])
+    assert without_timing(r.json()["analysis"]) == without_timing(json.loads(json.dumps(expected)))
+
+
+def test_result_cache_etag_and_hit_ratio(monkeypatch):
+    import main
+    from sentiment_analyzer import Lexicon, get_lexicon, set_lexicon
+
+    def sample(name):
+        return next(float(line.split()[-1]) for line in client.get("/metrics").text.splitlines() if line.startswith(name))
+
+    with open(os.path.join(EXAMPLES_DIR, "sample_request.json"), encoding="utf-8") as f:
+        payload = json.load(f)
+    hits = 'pulsecore_result_cache_requests_total{result="hit"}'
+    misses = 'pulsecore_result_cache_requests_total{result="miss"}'
+    hits_before, misses_before = sample(hits), sample(misses)
+
+    first = post_analyze(payload)
+    etag = first.headers["etag"]
+    assert etag.startswith('W/"')
+    # mesmos bytes, e o mesmo feed com outra formatação: mesma resposta, sem nova análise
+    again = post_analyze(payload)
+    reformatted = client.post(
+        "/analyze-feed",
+        content=json.dumps(dict(reversed(list(payload.items()))), indent=2),
+        headers={"Content-Type": "application/json"},
+    )
+    assert again.content == reformatted.content == first.content
+    assert again.headers["etag"] == reformatted.headers["etag"] == etag
+    assert sample(hits) == hits_before + 2 and sample(misses) == misses_before + 1
+    assert 0 < sample("pulsecore_result_cache_hit_ratio") <= 1
+
+    r = client.post("/analyze-feed", json=payload, headers={"If-None-Match": etag.removeprefix("W/")})
+    assert r.status_code == 304 and r.headers["etag"] == etag and r.content == b""
+    # o cliente revalida mesmo depois que a entrada saiu do cache
+    main.RESULT_CACHE.clear()
+    assert client.post("/analyze-feed", json=payload, headers={"If-None-Match": etag}).status_code == 304
+
+    other = dict(payload, time_window_minutes=payload["time_window_minutes"] + 1)
+    assert post_analyze(other).headers["etag"] != etag
+
+    # TTL vencido: analisa de novo
+    monkeypatch.setattr(main, "RESULT_CACHE_TTL_SECONDS", 1e-9)
+    misses_before = sample(misses)
+    post_analyze(payload)
+    post_analyze(payload)
+    assert sample(misses) == misses_before + 2
+
+    # outro lexicon, outro resultado
+    monkeypatch.setattr(main, "RESULT_CACHE_TTL_SECONDS", 30.0)
+    original = get_lexicon()
+    try:
+        set_lexicon(Lexicon([]))
+        assert post_analyze(payload).headers["etag"] != etag
+    finally:
+        set_lexicon(original)
+
+
+def test_result_cache_is_keyed_by_the_lexicon_the_analysis_used(monkeypatch):
+    import main
+    from sentiment_analyzer import Lexicon, get_lexicon, set_lexicon, with_lexicon_version
+
+    with open(os.path.join(EXAMPLES_DIR, "sample_request.json"), encoding="utf-8") as f:
+        payload = json.load(f)
+    records = [main._message_record(raw, ()) for raw in payload["messages"]]
+    fingerprint = functools.partial(main._feed_fingerprint, records, payload["time_window_minutes"], None)
+
+    # worker do pool com um lexicon ainda não recarregado
+    monkeypatch.setattr(
+        main, "with_lexicon_version", lambda *args, **kwargs: (with_lexicon_version(*args, **kwargs)[0], "stale")
+    )
+    stale = post_analyze(payload)
+    assert stale.headers["etag"] == f'W/"{fingerprint("stale")}"'
+    assert main._cached_response(f'W/"{fingerprint(get_lexicon().version)}"') is None
+
+    # lexicon trocado durante a análise: a resposta não vai para o cache
+    original = get_lexicon()
+
+    def reloading(function, *args, **kwargs):
+        return with_lexicon_version(lambda: (set_lexicon(Lexicon([])), function(*args, **kwargs))[1])
+
+    monkeypatch.setattr(main, "with_lexicon_version", reloading)
+    try:
+        main.RESULT_CACHE.clear()
+        assert "etag" not in post_analyze(payload).headers
+        assert len(main.RESULT_CACHE) == 0
+    finally:
+        set_lexicon(original)
+
+
+def test_ready_only_after_warm_up(monkeypatch):
+    import time
+
+    import main
+    from sentiment_analyzer import cache_stats
+
+    monkeypatch.setattr(main, "_warm_up_task", None)
+    monkeypatch.setattr(main, "_warm", False)
+    assert client.get("/ready").status_code == 503
+
+    # o contexto do TestClient roda os eventos de startup/shutdown
+    with TestClient(app) as warming_client:
+        deadline = time.monotonic() + 30
+        response = warming_client.get("/ready")
+        while response.status_code == 503 and time.monotonic() < deadline:
+            assert response.json() == {"status": "warming_up"}
+            time.sleep(0.05)
+            response = warming_client.get("/ready")
+        assert response.status_code == 200 and response.json() == {"status": "ready"}
+        assert cache_stats()["scan"]["entries"] > 0
+
+
+def test_first_analysis_warms_up_without_startup(monkeypatch):
+    import main
+
+    calls = []
+    monkeypatch.setattr(main, "_warm", False)
+    monkeypatch.setattr(main, "warm_up", lambda: calls.append(1))
+    payload = {"messages": [], "time_window_minutes": 30}
+
+    # sem ``with``: os eventos de startup não rodam
+    assert client.post("/analyze-feed", json=payload).status_code == 200
+    assert client.post("/analyze-feed", json=payload).status_code == 200
+    assert calls == [1] and main._warm
+
+
+def test_counters_outside_int64_are_rejected():
+    message = {
+        "id": "msg_big",
+        "content": "Adorei o produto!",
+        "timestamp": "2025-09-10T10:00:00Z",
+        "user_id": "user_abc",
+        "hashtags": ["#produto"],
+        "reactions": 1,
+        "shares": 0,
+        "views": 10,
+    }
+    for field, value in (("views", 2 ** 63), ("reactions", 2 ** 70), ("shares", -2 ** 64)):
+        r = post_analyze({"messages": [dict(message, **{field: value})], "time_window_minutes": 30})
+        assert r.status_code == 422
+        assert r.json()["detail"][0]["loc"] == ["body", "messages", 0, field]
+
+    # no limite do int64 ainda vale, com o mesmo resultado do backend Python
+    largest = [dict(message, views=2 ** 63 - 1, reactions=2 ** 62)]
+    r = post_analyze({"messages": largest, "time_window_minutes": 30})
+    assert r.status_code == 200, r.text
+    assert without_timing(r.json()["analysis"]) == without_timing(analyze_feed(largest, 30, backend="python"))
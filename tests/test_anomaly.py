@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta, timezone
+
+from sentiment_analyzer import analyze_feed, detect_anomaly, find_anomaly
+
+
+BASE_TIME = datetime(2025, 9, 10, 10, 0, 0, tzinfo=timezone.utc)
+
+
+def _message(i, seconds, user_id="user_abc", content="teste"):
+    return {
+        "id": f"msg_{i}",
+        "content": content,
+        "timestamp": (BASE_TIME + timedelta(seconds=seconds)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "user_id": user_id,
+        "hashtags": [],
+        "reactions": 1,
+        "shares": 0,
+        "views": 10,
+    }
+
+
+def test_burst_more_than_10_messages_in_5_minutes():
+    messages = [_message(i, i * 29) for i in range(11)]
+
+    analysis = analyze_feed(messages, time_window_minutes=30)
+
+    assert analysis["anomaly_detected"] is True
+    assert analysis["anomaly_type"] == "burst"
+
+
+def test_10_messages_in_5_minutes_is_not_a_burst():
+    messages = [_message(i, i * 30) for i in range(10)]
+
+    assert find_anomaly([i * 30 for i in range(10)], ["user_abc"] * 10, ["neutral"] * 10) is None
+    assert analyze_feed(messages, time_window_minutes=30)["anomaly_detected"] is False
+
+
+def test_burst_is_per_user():
+    messages = [_message(i, i * 20, user_id=f"user_{i % 2:03d}") for i in range(12)]
+
+    assert analyze_feed(messages, time_window_minutes=30)["anomaly_type"] is None
+
+
+def test_alternating_sentiment_over_10_messages():
+    contents = ["adorei", "ruim"] * 5
+    messages = [_message(i, i * 60, content=content) for i, content in enumerate(contents)]
+
+    analysis = analyze_feed(messages, time_window_minutes=30)
+
+    assert analysis["anomaly_type"] == "alternating_sentiment"
+
+
+def test_alternation_broken_by_neutral_message():
+    contents = ["adorei", "ruim"] * 4 + ["teste", "adorei", "ruim"]
+    messages = [_message(i, i * 60, content=content) for i, content in enumerate(contents)]
+
+    assert analyze_feed(messages, time_window_minutes=30)["anomaly_detected"] is False
+
+
+def test_alternation_uses_timestamp_order():
+    contents = ["adorei", "ruim"] * 5
+    # ingestão fora de ordem: a sequência só alterna quando ordenada por timestamp
+    messages = [_message(i, i * 60, content=content) for i, content in enumerate(contents)][::-1]
+
+    assert analyze_feed(messages, time_window_minutes=30)["anomaly_type"] == "alternating_sentiment"
+
+
+def test_synchronized_posting_within_2_seconds():
+    messages = [_message(i, seconds, user_id=f"user_{i:03d}") for i, seconds in enumerate([0, 100, 102, 104])]
+
+    analysis = analyze_feed(messages, time_window_minutes=30)
+
+    assert analysis["anomaly_type"] == "synchronized_posting"
+
+
+def test_spread_out_messages_are_not_synchronized():
+    messages = [_message(i, seconds, user_id=f"user_{i:03d}") for i, seconds in enumerate([0, 100, 103, 106])]
+
+    assert detect_anomaly(messages) is False
+    assert analyze_feed(messages, time_window_minutes=30)["anomaly_type"] is None
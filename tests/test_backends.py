@@ -0,0 +1,102 @@
+import math
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from sentiment_analyzer import AGGREGATION_BACKENDS, FeedAnalyzer, analyze_feed
+
+
+BASE_TIME = datetime(2025, 9, 10, 10, 0, 0, tzinfo=timezone.utc)
+BACKENDS = sorted(AGGREGATION_BACKENDS)
+
+
+def _random_feed(rng, size):
+    contents = ["Adorei o produto!", "ruim", "não gostei", "muito bom", "teste básico", "Super adorei!"]
+    return [
+        {
+            "id": f"msg_{i}",
+            "content": rng.choice(contents),
+            "timestamp": (BASE_TIME + timedelta(seconds=rng.randint(0, 7200))).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "user_id": f"user_{rng.randint(0, 40):03d}" + rng.choice(["", "_prime", "_mbras"]),
+            "hashtags": rng.sample(["#produto", "#a", "#b", "#verylonghashtag"], rng.randint(0, 2)),
+            "reactions": rng.randint(0, 30),
+            "shares": rng.choice([0, 1, 4, 7]),
+            "views": rng.choice([0, 7, 10, 35, 100, 250]),
+        }
+        for i in range(size)
+    ]
+
+
+def _assert_close(actual, expected):
+    if isinstance(expected, dict):
+        assert actual.keys() == expected.keys()
+        # processing_time_ms é medido a cada chamada
+        for key in expected.keys() - {"processing_time_ms"}:
+            _assert_close(actual[key], expected[key])
+    elif isinstance(expected, list):
+        assert len(actual) == len(expected)
+        for actual_item, expected_item in zip(actual, expected):
+            _assert_close(actual_item, expected_item)
+    elif isinstance(expected, float):
+        assert math.isclose(actual, expected, rel_tol=1e-12, abs_tol=1e-12)
+    else:
+        assert actual == expected
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("seed", range(5))
+def test_backends_match_pure_python(backend, seed):
+    rng = random.Random(seed)
+    messages = _random_feed(rng, rng.randint(1, 400))
+    window = rng.choice([1, 15, 60, 180])
+
+    _assert_close(analyze_feed(messages, window, backend=backend), analyze_feed(messages, window, backend="python"))
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_backends_match_with_incremental_eviction(backend):
+    rng = random.Random(99)
+    messages = sorted(_random_feed(rng, 600), key=lambda m: m["timestamp"])
+
+    analyzers = {name: FeedAnalyzer(backend=name) for name in ("python", backend)}
+    for start in range(0, len(messages), 100):
+        cutoff = messages[start]["timestamp"]
+        for analyzer in analyzers.values():
+            analyzer.ingest(messages[start:start + 100])
+            analyzer.evict_before(cutoff)
+        _assert_close(analyzers[backend].snapshot(), analyzers["python"].snapshot())
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_backends_match_with_counters_beyond_float_precision(backend):
+    rng = random.Random(7)
+    messages = _random_feed(rng, 200)
+    # somas por usuário acima de 2**53 e contadores perto do limite do int64
+    for i, message in enumerate(messages):
+        message["reactions"] = 2 ** 50 + i
+        message["shares"] = 3 if i % 2 else 2 ** 62
+        message["views"] = 2 ** 63 - 1 - i if i % 3 else 2 ** 53 + 1
+
+    actual, expected = (analyze_feed(messages, 180, backend=name) for name in (backend, "python"))
+    actual.pop("processing_time_ms")
+    expected.pop("processing_time_ms")
+    # igualdade exata: sem arredondamento float64 no caminho NumPy
+    assert actual == expected
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        FeedAnalyzer(backend="fortran")
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("limit", [0, 1, 3, 7, 50])
+def test_bounded_rank_matches_full_sort_with_ties(backend, limit):
+    aggregation = AGGREGATION_BACKENDS[backend]
+    scores = [5.0, 7.5, 7.5, 1.0, 7.5, 5.0, 9.0, 5.0]
+    first_seqs = [3, 9, 2, 0, 5, 1, 8, 4]
+
+    full = aggregation.rank(scores, first_seqs)
+    assert full == sorted(range(len(scores)), key=lambda i: (-scores[i], first_seqs[i]))
+    assert aggregation.rank(scores, first_seqs, limit) == full[:limit]
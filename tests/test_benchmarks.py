@@ -0,0 +1,78 @@
+import importlib.util
+import json
+import os
+import sys
+from collections import Counter
+
+from benchmarks.run import calibrate, compare_to_baseline, main, run_benchmarks
+from benchmarks.startup import measure_startup
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "examples"))
+from generate_performance_data import generate_realistic  # noqa: E402
+
+
+def test_realistic_generator_is_deterministic_and_skewed():
+    data = generate_realistic(2000, user_cardinality=300, hashtag_cardinality=50, duplicate_ratio=0.3)
+    messages = data["messages"]
+
+    assert messages == generate_realistic(2000, user_cardinality=300, hashtag_cardinality=50, duplicate_ratio=0.3)["messages"]
+    assert len({m["user_id"] for m in messages}) <= 300
+    assert len({h for m in messages for h in m["hashtags"]}) <= 50
+    assert all(len(m["content"]) <= 280 and m["reactions"] <= m["views"] for m in messages)
+
+    # Zipf: o usuário mais frequente aparece muito mais que a média
+    user_counts = Counter(m["user_id"] for m in messages)
+    assert user_counts.most_common(1)[0][1] > 5 * len(messages) / len(user_counts)
+    duplicates = len(messages) - len({m["content"] for m in messages})
+    assert 0.2 * len(messages) < duplicates < 0.4 * len(messages)
+
+
+def test_compare_to_baseline_flags_only_regressions_over_threshold():
+    baseline = {
+        "analyze_feed/1000": {"p50_rel": 10.0, "peak_kb": 1000.0},
+        "tokenize/1000": {"p50_rel": 2.0, "peak_kb": 100.0},
+        # baseline antiga, em ms absolutos: a latência não é comparada
+        "compute_flags/1000": {"p50_ms": 1.0, "peak_kb": 100.0},
+    }
+    results = {
+        "analyze_feed/1000": {"p50_rel": 12.0, "peak_kb": 1300.0},
+        "tokenize/1000": {"p50_rel": 3.0, "peak_kb": 100.0},
+        "compute_flags/1000": {"p50_rel": 9.0, "peak_kb": 100.0},
+        "http/1000": {"p50_rel": 99.0, "peak_kb": 9999.0},
+    }
+
+    regressions = compare_to_baseline(results, baseline, max_regression=0.25)
+
+    assert len(regressions) == 2
+    assert regressions[0].startswith("analyze_feed/1000 peak_kb")
+    assert regressions[1].startswith("tokenize/1000 p50_rel")
+
+
+def test_run_benchmarks_reports_every_stage_and_gates(tmp_path):
+    results = run_benchmarks(sizes=[200], stages=["tokenize", "analyze_feed"], repetitions=2)
+
+    assert set(results) == {"tokenize/200", "analyze_feed/200"}
+    for metrics in results.values():
+        assert metrics["p50_ms"] <= metrics["p99_ms"]
+        assert metrics["p50_rel"] <= metrics["p99_rel"]
+        assert metrics["throughput_msgs_per_s"] > 0
+        assert metrics["peak_kb"] > 0
+    assert calibrate(repetitions=3) > 0
+
+    baseline = tmp_path / "baseline.json"
+    args = ["--sizes", "200", "--stages", "tokenize", "--repetitions", "2", "--baseline", str(baseline)]
+    assert main(args + ["--update-baseline"]) == 0
+    # a baseline guarda só números que valem em outra máquina
+    assert set(json.loads(baseline.read_text(encoding="utf-8"))["tokenize/200"]) == {"p50_rel", "peak_kb"}
+    assert main(args + ["--max-regression", "1000"]) == 0
+    assert main(args + ["--max-regression", "-1"]) == 1
+
+
+def test_startup_benchmark_defers_optional_imports():
+    results = measure_startup("sentiment_analyzer", runs=1)
+
+    assert results["import_ms"] > 0 and results["warm_up_ms"] > 0
+    # NumPy só é importado no aquecimento, não na subida do módulo
+    assert "numpy" not in results["imports"]
+    if importlib.util.find_spec("numpy") is not None:
+        assert results["deferred_imports"]["numpy"] > 0
@@ -0,0 +1,72 @@
+from sentiment_analyzer import (
+    NORMALIZE_CACHE,
+    SCAN_CACHE,
+    LRUCache,
+    cache_stats,
+    clear_caches,
+    compute_sentiment_for_message,
+    normalize_text,
+)
+
+
+def test_lru_cache_evicts_least_recently_used_entry():
+    cache = LRUCache(max_entries=2, max_bytes=1000)
+    cache.put("a", 1, 10)
+    cache.put("b", 2, 10)
+    assert cache.get("a") == 1
+    cache.put("c", 3, 10)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats() == {"entries": 2, "bytes": 20, "hits": 3, "misses": 1, "evictions": 1}
+
+
+def test_lru_cache_respects_byte_budget():
+    cache = LRUCache(max_entries=100, max_bytes=25)
+    cache.put("a", 1, 10)
+    cache.put("b", 2, 10)
+    cache.put("c", 3, 10)
+    cache.put("too_big", 4, 26)
+
+    assert len(cache) == 2
+    assert cache.get("a") is None and cache.get("too_big") is None
+    assert cache.stats()["bytes"] == 20
+
+
+def test_lru_cache_configure_shrinks_and_clear_resets_counters():
+    cache = LRUCache(max_entries=10, max_bytes=1000)
+    for key in "abcde":
+        cache.put(key, key, 1)
+    cache.configure(max_entries=2)
+
+    assert len(cache) == 2 and cache.evictions == 3
+    cache.clear()
+    assert cache.stats() == {"entries": 0, "bytes": 0, "hits": 0, "misses": 0, "evictions": 0}
+
+
+def test_duplicate_content_hits_scan_cache_and_keeps_user_rule():
+    regular = compute_sentiment_for_message("Super adorei!", "user_123")
+    mbras = compute_sentiment_for_message("Super adorei!", "user_mbras_123")
+
+    assert SCAN_CACHE.stats()["misses"] == 1
+    assert SCAN_CACHE.stats()["hits"] == 1
+    assert regular == (1.5, "positive")
+    assert mbras == (3.0, "positive")
+
+
+def test_normalize_cache_only_stores_non_ascii_text():
+    assert normalize_text("Adorei") == "adorei"
+    assert normalize_text("Péssimo") == "pessimo"
+    assert normalize_text("Péssimo") == "pessimo"
+
+    assert len(NORMALIZE_CACHE) == 1
+    assert NORMALIZE_CACHE.stats()["hits"] == 1
+
+
+def test_clear_caches_empties_everything():
+    compute_sentiment_for_message("ótimo serviço", "user_café")
+    clear_caches()
+
+    stats = cache_stats()
+    assert stats["scan"]["entries"] == 0
+    assert stats["normalize"]["entries"] == 0
@@ -0,0 +1,301 @@
+from datetime import datetime, timedelta, timezone
+
+import random
+
+import pytest
+
+from conftest import without_timing
+import sentiment_analyzer
+from sentiment_analyzer import (
+    ApproximateFeedAnalyzer,
+    CountMinSketch,
+    FeedAnalyzer,
+    MessageBatch,
+    StageTimings,
+    StreamingFeedAnalyzer,
+    analyze_feed,
+)
+
+
+BASE_TIME = datetime(2025, 9, 10, 10, 0, 0, tzinfo=timezone.utc)
+CONTENTS = ["Adorei o produto!", "ruim", "não não gostei", "muito", "Super adorei!", "teste básico"]
+
+
+def _message(i, minutes):
+    return {
+        "id": f"msg_{i:03d}",
+        "content": CONTENTS[i % len(CONTENTS)],
+        "timestamp": (BASE_TIME + timedelta(minutes=minutes)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "user_id": f"user_{i % 7:03d}" if i % 5 else "user_mbras_007",
+        "hashtags": ["#produto", "#verylonghashtag"] if i % 3 == 0 else [f"#tag{i % 4}"],
+        "reactions": i % 9,
+        "shares": i % 4,
+        "views": (i % 11) * 10,
+    }
+
+
+def test_single_ingest_matches_analyze_feed():
+    messages = [_message(i, i) for i in range(40)]
+
+    analyzer = FeedAnalyzer()
+    analyzer.ingest(messages)
+
+    assert without_timing(analyzer.snapshot()) == without_timing(analyze_feed(messages, time_window_minutes=60))
+
+
+def test_incremental_ingest_matches_recomputation():
+    messages = [_message(i, i) for i in range(60)]
+
+    analyzer = FeedAnalyzer()
+    for start in range(0, len(messages), 7):
+        analyzer.ingest(messages[start:start + 7])
+
+    assert without_timing(analyzer.snapshot()) == without_timing(analyze_feed(messages, time_window_minutes=120))
+
+
+def test_sliding_window_eviction_matches_recomputation():
+    messages = [_message(i, i) for i in range(90)]
+    window_minutes = 30
+
+    analyzer = FeedAnalyzer()
+    for start in range(0, len(messages), 10):
+        batch = messages[start:start + 10]
+        analyzer.ingest(batch)
+        latest = BASE_TIME + timedelta(minutes=start + len(batch) - 1)
+        cutoff = latest - timedelta(minutes=window_minutes)
+        analyzer.evict_before(cutoff)
+
+        live = [m for m in messages[:start + len(batch)] if m["timestamp"] >= cutoff.strftime("%Y-%m-%dT%H:%M:%SZ")]
+        assert len(analyzer) == len(live)
+        assert without_timing(analyzer.snapshot()) == without_timing(analyze_feed(live, time_window_minutes=window_minutes))
+
+
+def test_snapshot_reads_incremental_state_and_partials_stay_independent():
+    messages = [_message(i, i) for i in range(60)]
+    analyzer = FeedAnalyzer()
+    analyzer.ingest(messages[:40])
+
+    # o snapshot lê contagens, soma de engagement e usuários do próprio analisador
+    live = analyzer._live_aggregate()
+    assert live.users is analyzer._users and live.engagement_sum is analyzer._engagement_sum
+
+    partial = analyzer.partial()
+    frozen = without_timing(partial.snapshot())
+    analyzer.ingest(messages[40:])
+    analyzer.evict_before(BASE_TIME + timedelta(minutes=10))
+    assert without_timing(partial.snapshot()) == frozen
+    assert without_timing(analyzer.snapshot()) == without_timing(analyze_feed(messages[10:], time_window_minutes=60))
+
+
+def test_evicting_everything_returns_empty_analysis():
+    analyzer = FeedAnalyzer()
+    analyzer.ingest([_message(i, i) for i in range(5)])
+
+    assert analyzer.evict_before(BASE_TIME + timedelta(hours=1)) == 5
+    assert len(analyzer) == 0
+    assert analyzer.snapshot() == analyze_feed([], time_window_minutes=30)
+
+
+def test_out_of_order_ingest_with_compaction_matches_recomputation():
+    rng = random.Random(7)
+    messages = [_message(i, i // 20) for i in range(4000)]
+    # mensagens chegam com até 3 minutos de atraso
+    arrivals = sorted(messages, key=lambda m: (m["timestamp"], rng.random()))
+    for i in range(len(arrivals) - 1):
+        if rng.random() < 0.2:
+            arrivals[i], arrivals[i + 1] = arrivals[i + 1], arrivals[i]
+
+    analyzer = FeedAnalyzer()
+    ingested = []
+    for start in range(0, len(arrivals), 250):
+        batch = arrivals[start:start + 250]
+        analyzer.ingest(batch)
+        ingested.extend(batch)
+        cutoff = (BASE_TIME + timedelta(minutes=start // 20 - 15)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        analyzer.evict_before(cutoff)
+
+    live = [m for m in ingested if m["timestamp"] >= cutoff]
+    assert len(analyzer) == len(live)
+    assert without_timing(analyzer.snapshot()) == without_timing(analyze_feed(live, time_window_minutes=10_000))
+
+
+def test_message_batch_interns_users_and_hashtags():
+    messages = [_message(i, i) for i in range(6)]
+    batch = MessageBatch.from_messages(messages)
+
+    assert len(batch) == 6
+    assert len(batch.user_ids) == len({m["user_id"] for m in messages})
+    assert [batch.user_ids[code] for code in batch.user_codes] == [m["user_id"] for m in messages]
+    assert [batch.row_hashtags(row) for row in range(6)] == [m["hashtags"] for m in messages]
+    assert batch.timestamps[1] - batch.timestamps[0] == 60
+
+
+def test_trending_topics_keep_tie_break_order():
+    message = _message(1, 0)
+    messages = [
+        dict(message, id="a", hashtags=["#zeta", "#alfa", "#beta", "#gama", "#delta", "#eta"]),
+        dict(message, id="b", hashtags=["#eta"]),
+    ]
+
+    analysis = analyze_feed(messages, time_window_minutes=30)
+
+    assert analysis["trending_topics"] == ["#eta", "#alfa", "#beta", "#delta", "#gama"]
+
+
+def test_streaming_analyzer_matches_analyze_feed():
+    rng = random.Random(3)
+    messages = [_message(i, rng.randint(0, 240)) for i in range(1500)]
+
+    stream_analyzer = StreamingFeedAnalyzer(time_window_minutes=45, chunk_size=64)
+    for message in messages:
+        stream_analyzer.add(message)
+
+    assert stream_analyzer.message_count == 1500
+    result = stream_analyzer.result(top_n_influencers=4)
+    assert result["processing_time_ms"] > 0
+    assert without_timing(result) == without_timing(analyze_feed(messages, 45, top_n_influencers=4))
+
+
+def test_merged_partials_match_whole_feed():
+    rng = random.Random(5)
+    messages = [_message(i, rng.randint(0, 50)) for i in range(300)]
+    # rajada do mesmo usuário atravessando a fronteira entre os trechos
+    messages[95:110] = [dict(_message(i, 50), user_id="user_burst") for i in range(95, 110)]
+
+    merged = None
+    for start in range(0, len(messages), 100):
+        analyzer = FeedAnalyzer(first_seq=start)
+        analyzer.ingest(messages[start:start + 100])
+        merged = analyzer.partial() if merged is None else merged.merge(analyzer.partial())
+
+    expected = without_timing(analyze_feed(messages, time_window_minutes=60, top_n_influencers=5))
+    assert expected["anomaly_type"] == "burst"
+    assert without_timing(merged.snapshot(top_n_influencers=5)) == expected
+
+
+def test_sharded_analyze_feed_matches_sequential(monkeypatch):
+    monkeypatch.setattr(sentiment_analyzer, "MIN_SHARD_MESSAGES", 50)
+    rng = random.Random(9)
+    messages = [_message(i, rng.randint(0, 240)) for i in range(400)]
+
+    # janela cobre todas as mensagens: 3 shards de ~133
+    timings = StageTimings()
+    sharded = analyze_feed(messages, 300, top_n_influencers=4, workers=3, timings=timings)
+    # os tempos das etapas rodadas nos shards voltam somados
+    assert timings.durations_ns["sentiment"] > 0
+
+    assert without_timing(sharded) == without_timing(analyze_feed(messages, 300, top_n_influencers=4))
+
+    # o pool dos shards é reutilizado na análise seguinte
+    pool = sentiment_analyzer._shard_executor
+    assert without_timing(analyze_feed(messages, 300, top_n_influencers=4, workers=2)) == without_timing(sharded)
+    assert sentiment_analyzer._shard_executor is pool
+
+
+def test_flags_are_per_message_and_never_span_message_boundaries():
+    # "teste técnico" + "mbras" em mensagens vizinhas: antes, a concatenação do
+    # feed casava o gatilho na fronteira; agora cada mensagem é avaliada sozinha
+    split = [dict(_message(0, 0), content="teste técnico"), dict(_message(1, 1), content="mbras hoje")]
+    whole = [dict(_message(0, 0), content="Ontem: teste técnico MBRAS!")]
+
+    assert sentiment_analyzer.compute_flags(split)["candidate_awareness"] is False
+    assert analyze_feed(split, time_window_minutes=60)["flags"]["candidate_awareness"] is False
+    assert sentiment_analyzer.compute_flags(whole)["candidate_awareness"] is True
+    assert analyze_feed(whole, time_window_minutes=60)["flags"]["candidate_awareness"] is True
+
+
+def test_compute_flags_matches_analyze_feed_flags():
+    special = "x" * 37 + "mbrás"  # 42 caracteres, "mbras" só depois de normalizar
+    contents = CONTENTS + ["tes😀te técnico mbras", special, "Teste Técnico Mbras"]
+    for i in range(len(contents)):
+        messages = [dict(_message(j, j), content=content) for j, content in enumerate(contents[i:i + 2])]
+        assert sentiment_analyzer.compute_flags(messages) == analyze_feed(messages, time_window_minutes=60)["flags"]
+
+    assert sentiment_analyzer.cached_scan_content(special).flags == sentiment_analyzer._SPECIAL_PATTERN
+
+
+def test_parse_epoch_matches_strptime():
+    rng = random.Random(7)
+    samples = ["2024-02-29T23:59:59Z", "2000-01-01T00:00:00Z", "1970-01-01T00:00:00Z", "2025-9-10T1:02:03Z"]
+    samples += [
+        (BASE_TIME + timedelta(seconds=rng.randrange(-10**9, 10**9))).strftime("%Y-%m-%dT%H:%M:%SZ") for _ in range(500)
+    ]
+    for raw in samples:
+        expected = datetime.strptime(raw, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+        assert sentiment_analyzer.parse_epoch(raw) == int(expected.timestamp())
+        assert sentiment_analyzer.parse_timestamp(raw) == expected
+
+    for raw in ["2025-02-29T10:00:00Z", "2025-09-10T10:00:60Z", "2025-09-10T24:00:00Z", "2025-09-10 10:00:00", "ontem"]:
+        with pytest.raises(ValueError):
+            sentiment_analyzer.parse_epoch(raw)
+
+
+def test_hashtag_ids_are_recycled_when_hashtags_leave_the_window():
+    messages = [dict(_message(i, i), hashtags=[f"#onda{i}", "#fixa"]) for i in range(60)]
+    window_minutes = 5
+
+    analyzer = FeedAnalyzer()
+    for i, message in enumerate(messages):
+        analyzer.ingest([message])
+        analyzer.evict_before(BASE_TIME + timedelta(minutes=i - window_minutes))
+
+    live = messages[-window_minutes - 1:]
+    assert without_timing(analyzer.snapshot()) == without_timing(analyze_feed(live, time_window_minutes=window_minutes))
+    # só as hashtags vivas (mais a que acabou de sair) ocupam ids
+    assert len(analyzer._hashtag_names) <= window_minutes + 3
+
+
+def test_length_factor_table_matches_direct_computation():
+    for length in (1, 8, 9, 25, 280, 281, 500):
+        hashtag = "#" + "a" * (length - 1)
+        assert sentiment_analyzer._hashtag_base_weight(hashtag) == sentiment_analyzer._length_factor(length)
+
+
+def test_approximate_mode_top5_recall_on_zipf_feeds():
+    from benchmarks.recall import run_recall
+
+    for key, metrics in run_recall(sizes=[3000], exponents=[0.8, 1.1], seeds=[1, 2]).items():
+        assert metrics["trending_topics_mean"] >= 0.8, key
+        assert metrics["influence_ranking_mean"] >= 0.8, key
+
+
+def test_approximate_mode_memory_is_bounded_by_sketch_sizes():
+    analyzer = ApproximateFeedAnalyzer(hashtag_capacity=8, influencer_candidates=16, count_min_width=64)
+    window_minutes = 10
+    for minute in range(40):
+        # cardinalidade sempre nova: cada mensagem tem usuário e hashtags inéditos
+        analyzer.ingest([
+            dict(_message(i, minute), id=f"m{minute}_{i}", user_id=f"user_{minute}_{i}", hashtags=[f"#t{minute}_{i}", "#fixa"])
+            for i in range(50)
+        ])
+        analyzer.evict_before(BASE_TIME + timedelta(minutes=minute - window_minutes))
+
+    assert len(analyzer._hashtag_minutes) <= window_minutes + 1
+    assert all(len(counters.counters) <= 8 for counters in analyzer._hashtag_minutes.values())
+    assert len(analyzer._candidates) <= 16
+    result = analyzer.snapshot(top_n_influencers=5)
+    # "#fixa" aparece em toda mensagem e nunca perde o contador
+    assert result["trending_topics"][0] == "#fixa"
+    assert len(result["influence_ranking"]) == 5
+    exact = analyze_feed(
+        [dict(_message(i, minute), user_id=f"user_{minute}_{i}") for minute in range(30, 40) for i in range(50)],
+        window_minutes,
+    )
+    assert result["sentiment_distribution"] == exact["sentiment_distribution"]
+
+
+def test_count_min_estimates_never_undercount():
+    sketch = CountMinSketch(width=16, depth=3, fields=2)
+    totals = {}
+    for i in range(200):
+        key = f"user_{i % 37}"
+        sketch.add(sketch.offsets(key), (i, 1))
+        totals[key] = (totals.get(key, (0, 0))[0] + i, totals.get(key, (0, 0))[1] + 1)
+    for key, (value_sum, count) in totals.items():
+        offsets = sketch.offsets(key)
+        estimate = sketch.estimate(offsets)
+        assert estimate[0] >= value_sum and estimate[1] >= count
+        assert 0 <= sketch.estimate_debiased(offsets, 0) <= estimate[0]
+        # remoções voltam as células exatamente ao que eram
+        sketch.add(offsets, (-value_sum, -count))
+    assert sketch.estimate(sketch.offsets("user_0")) == (0, 0)
@@ -0,0 +1,199 @@
+import os
+import random
+import sys
+from datetime import datetime, timezone
+
+from fastapi.testclient import TestClient
+
+from conftest import without_timing
+import feed_store
+import main
+from feed_store import FeedStore, SQLiteFeedStore
+from main import app
+from sentiment_analyzer import MessageRecord, analyze_feed, parse_epoch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "examples"))
+from generate_performance_data import generate_realistic  # noqa: E402
+
+
+client = TestClient(app)
+
+
+def _records(messages):
+    return [MessageRecord(**message) for message in messages]
+
+
+def _feed(n=600, seed=3):
+    return generate_realistic(n, hashtag_cardinality=30, user_cardinality=60, time_window_minutes=30, seed=seed)["messages"]
+
+
+def _iso(epoch):
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _in_time_order(messages):
+    # ordem da análise do store: timestamp, depois ordem de chegada
+    return sorted(messages, key=lambda message: message["timestamp"])
+
+
+def test_window_analysis_merges_minute_rollups_like_analyze_feed():
+    messages = _feed()
+    store = FeedStore()
+    rng = random.Random(5)
+    start = 0
+    while start < len(messages):
+        size = rng.randint(1, 80)
+        store.append("feed", _records(messages[start:start + size]))
+        start += size
+
+    assert store.message_count("feed") == len(messages)
+    for window in (1, 5, 17, 30, 60):
+        expected = analyze_feed(_in_time_order(messages), window, top_n_influencers=10)
+        assert without_timing(store.analysis("feed", window, top_n_influencers=10)) == without_timing(expected)
+
+
+def test_rollups_are_reused_until_their_minute_changes():
+    messages = _in_time_order(_feed(200))
+    store = FeedStore()
+    store.append("feed", _records(messages))
+    store.analysis("feed", 30)
+
+    feed = store._feeds["feed"]
+    rollups = {bucket.minute: bucket._rollup for bucket in feed.buckets()}
+    store.append("feed", _records([dict(messages[-1], id="late")]))
+    store.analysis("feed", 30)
+
+    changed = [bucket.minute for bucket in feed.buckets() if bucket._rollup is not rollups[bucket.minute]]
+    assert changed == [parse_epoch(messages[-1]["timestamp"]) // 60]
+
+
+def test_block_rollups_follow_late_messages_and_retention(monkeypatch):
+    monkeypatch.setattr(feed_store, "BLOCK_MINUTES", 5)
+    messages = _in_time_order(_feed(600))
+    store = FeedStore(retention_minutes=20)
+    store.append("feed", _records(messages))
+    feed = store._feeds["feed"]
+    latest = parse_epoch(messages[-1]["timestamp"])
+
+    def check(live):
+        for window in (7, 12, 20):
+            expected = analyze_feed(_in_time_order(live), window, top_n_influencers=5)
+            assert without_timing(store.analysis("feed", window, top_n_influencers=5)) == without_timing(expected)
+
+    live = [message for message in messages if parse_epoch(message["timestamp"]) >= latest - 1200]
+    check(live)
+    blocks = dict(feed.blocks)
+    assert blocks
+
+    # atrasada num minuto antigo: só o bloco dele é refeito
+    late = dict(messages[-1], id="late", timestamp=_iso(latest - 11 * 60))
+    store.append("feed", _records([late]))
+    live.append(late)
+    check(live)
+    late_block = (latest - 11 * 60) // 60 // 5
+    assert feed.blocks[late_block][1] is not blocks[late_block][1]
+    assert all(feed.blocks[block] is blocks[block] for block in blocks if block != late_block)
+
+    # blocos que saem da retenção são descartados junto com os minutos
+    latest += 8 * 60
+    fresh = [dict(message, id=f"{message['id']}+", timestamp=_iso(latest - i * 30)) for i, message in enumerate(messages[:10])]
+    store.append("feed", _records(fresh))
+    live = [message for message in live + fresh if parse_epoch(message["timestamp"]) >= latest - 1200]
+    check(live)
+    assert min(feed.blocks) > (latest - 1200) // 60 // 5
+
+
+def test_retention_drops_old_messages():
+    messages = _in_time_order(_feed(300))
+    store = FeedStore(retention_minutes=10)
+    store.append("feed", _records(messages))
+
+    latest = parse_epoch(messages[-1]["timestamp"])
+    live = [message for message in messages if parse_epoch(message["timestamp"]) >= latest - 600]
+    assert store.message_count("feed") == len(live)
+    assert without_timing(store.analysis("feed", 10)) == without_timing(analyze_feed(live, 10))
+    # mensagens que já chegam fora da retenção não são aceitas
+    assert store.append("feed", _records(messages[:1])) == 0
+
+
+def test_late_messages_and_ring_wraparound():
+    messages = _in_time_order(_feed(300))
+    store = FeedStore(retention_minutes=10)
+    store.append("feed", _records(messages))
+    latest = parse_epoch(messages[-1]["timestamp"])
+
+    # atrasada dentro da tolerância: entra no slot do seu minuto, não no do mais recente
+    late = dict(messages[-1], id="late", timestamp=_iso(latest - 4))
+    store.append("feed", _records([late]))
+    live = [message for message in messages if parse_epoch(message["timestamp"]) >= latest - 600]
+    live = _in_time_order(live + [late])
+    for window in (1, 10):
+        assert without_timing(store.analysis("feed", window)) == without_timing(analyze_feed(live, window))
+
+    # saltos menores e maiores que o anel reaproveitam os slots dos minutos que saíram
+    for jump in (7 * 60 + 30, 25 * 60):
+        latest += jump
+        fresh = [
+            dict(message, id=f"{message['id']}+{jump}", timestamp=_iso(latest - i * 50))
+            for i, message in enumerate(messages[:20])
+        ]
+        store.append("feed", _records(fresh))
+        live = _in_time_order([message for message in live + fresh if parse_epoch(message["timestamp"]) >= latest - 600])
+        assert store.message_count("feed") == len(live)
+        assert without_timing(store.analysis("feed", 10)) == without_timing(analyze_feed(live, 10))
+
+
+def test_sqlite_store_survives_restart(tmp_path):
+    path = str(tmp_path / "feeds.db")
+    messages = _feed(300)
+    store = SQLiteFeedStore(path, retention_minutes=20)
+    store.append("a", _records(messages[:150]))
+    store.append("a", _records(messages[150:]))
+    store.append("b", _records(messages[:10]))
+    before = {feed_id: store.analysis(feed_id, 20) for feed_id in ("a", "b")}
+    store.close()
+
+    reopened = SQLiteFeedStore(path, retention_minutes=20)
+    assert reopened.message_count("a") == store.message_count("a")
+    for feed_id, analysis in before.items():
+        assert without_timing(reopened.analysis(feed_id, 20)) == without_timing(analysis)
+    reopened.close()
+
+
+def test_feed_endpoints(monkeypatch):
+    monkeypatch.setattr(main, "FEED_STORE", FeedStore(retention_minutes=60))
+    messages = _feed(120)
+
+    r = client.post("/feeds/loja/messages", json={"messages": messages[:70]})
+    assert r.status_code == 200
+    assert r.json() == {"feed_id": "loja", "accepted": 70, "message_count": 70}
+    r = client.post("/feeds/loja/messages", json={"messages": messages[70:]})
+    assert r.json()["message_count"] == 120
+
+    r = client.get("/feeds/loja/analysis", params={"window": 30, "top_n_influencers": 3})
+    assert r.status_code == 200
+    expected = analyze_feed(_in_time_order(messages), 30, top_n_influencers=3)
+    assert without_timing(r.json()["analysis"]) == without_timing(expected)
+
+    assert client.get("/feeds/outra/analysis", params={"window": 30}).json()["code"] == "FEED_NOT_FOUND"
+    assert client.get("/feeds/loja/analysis", params={"window": 123}).json()["code"] == "UNSUPPORTED_TIME_WINDOW"
+    r = client.get("/feeds/loja/analysis", params={"window": 61})
+    assert r.status_code == 422 and r.json()["code"] == "WINDOW_EXCEEDS_RETENTION"
+    assert client.post("/feeds/loja/messages", json={"messages": [{"id": "x"}]}).status_code == 422
+
+
+def test_empty_append_does_not_create_a_feed(monkeypatch, tmp_path):
+    store = FeedStore(retention_minutes=60)
+    assert store.append("vazio", []) == 0
+    assert "vazio" not in store and store.analysis("vazio", 30) is None
+
+    monkeypatch.setattr(main, "FEED_STORE", store)
+    r = client.post("/feeds/vazio/messages", json={"messages": []})
+    assert r.json() == {"feed_id": "vazio", "accepted": 0, "message_count": 0}
+    r = client.get("/feeds/vazio/analysis", params={"window": 30})
+    assert r.status_code == 404 and r.json()["code"] == "FEED_NOT_FOUND"
+
+    sqlite_store = SQLiteFeedStore(str(tmp_path / "feeds.db"), retention_minutes=60)
+    sqlite_store.append("vazio", [])
+    assert sqlite_store.analysis("vazio", 30) is None
+    sqlite_store.close()
@@ -0,0 +1,102 @@
+import os
+
+import pytest
+
+import sentiment_analyzer
+from sentiment_analyzer import (
+    Lexicon,
+    analyze_feed,
+    compute_sentiment_for_message,
+    get_lexicon,
+    load_lexicon,
+    refresh_lexicon,
+    scan_content,
+    set_lexicon,
+)
+from sentiment_analyzer import _lexicon_entry
+
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "examples")
+
+
+@pytest.fixture(autouse=True)
+def _restore_lexicon():
+    original = get_lexicon()
+    yield
+    set_lexicon(original)
+
+
+def _write_lexicon(path, lines, mtime_ns=None):
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+    return str(path)
+
+
+def test_multi_word_phrases_take_precedence_over_their_words():
+    set_lexicon(load_lexicon(os.path.join(EXAMPLES_DIR, "lexicon_pt.tsv")))
+
+    assert scan_content("O serviço deixou a desejar").hits == ((1, 1.0), (2, -1.0))
+    assert compute_sentiment_for_message("Deixou a desejar!", "user_abc") == (-1.0, "negative")
+    # negação antes da frase inverte a frase inteira; intensificador de duas palavras com peso 2
+    assert compute_sentiment_for_message("não deixou a desejar", "user_abc") == (1.0, "positive")
+    assert compute_sentiment_for_message("bem mais bom", "user_abc") == (2.0, "positive")
+    assert compute_sentiment_for_message("nem um pouco bom", "user_abc") == (-1.0, "negative")
+    assert compute_sentiment_for_message("superou as expectativas", "user_abc") == (2.0, "positive")
+
+
+def test_leftmost_longest_matching_with_failure_links():
+    lexicon = Lexicon([
+        _lexicon_entry("a b", "positive"),
+        _lexicon_entry("b c", "negative"),
+        _lexicon_entry("b c d", "positive", 3.0),
+        _lexicon_entry("c", "negative", 0.5),
+    ])
+
+    def matched(text):
+        return [(start, entry.text) for start, entry in lexicon.match(text.split())]
+
+    assert matched("a b c") == [(0, "a b"), (2, "c")]
+    assert matched("x b c d") == [(1, "b c d")]
+    # "b c d" falha no "x", mas "b c" e o "c" herdado pela falha continuam sendo vistos
+    assert matched("b c x c") == [(0, "b c"), (3, "c")]
+
+
+def test_meta_goes_through_the_automaton_and_only_covers_whole_messages():
+    assert compute_sentiment_for_message("Teste técnico MBRAS", "user_abc") == (0.0, "meta")
+    assert compute_sentiment_for_message("tes😀te técnico mbras", "user_abc") == (0.0, "meta")
+    assert compute_sentiment_for_message("teste técnico mbras!", "user_abc") == (0.0, "neutral")
+
+    set_lexicon(Lexicon([_lexicon_entry("teste", "positive"), _lexicon_entry("sem comentarios", "meta")]))
+    assert compute_sentiment_for_message("Sem comentários", "user_abc") == (0.0, "meta")
+    # fora da mensagem inteira, o termo meta não esconde as palavras que contém
+    assert compute_sentiment_for_message("teste tecnico mbras", "user_abc") == (1.0, "positive")
+
+
+def test_load_lexicon_reports_bad_lines(tmp_path):
+    path = _write_lexicon(tmp_path / "lexicon.tsv", ["# comentário", "", "bom\tpositive", "ruim\tmuito ruim"])
+
+    with pytest.raises(ValueError, match="lexicon.tsv:4"):
+        load_lexicon(path)
+
+
+def test_lexicon_file_hot_reload(tmp_path, monkeypatch):
+    monkeypatch.setattr(sentiment_analyzer, "LEXICON_CHECK_INTERVAL", 0.0)
+    path = _write_lexicon(tmp_path / "lexicon.tsv", ["incrivel\tpositive"], mtime_ns=1_000_000_000)
+    set_lexicon(load_lexicon(path))
+    message = {
+        "id": "m1", "content": "Incrível, deixou a desejar", "timestamp": "2025-09-10T10:00:00Z",
+        "user_id": "user_abc", "hashtags": [], "reactions": 1, "shares": 0, "views": 10,
+    }
+
+    assert analyze_feed([message], 30)["sentiment_distribution"]["positive"] == 100.0
+    assert not refresh_lexicon()
+
+    _write_lexicon(tmp_path / "lexicon.tsv", ["incrivel\tpositive", "deixou a desejar\tnegative\t3"], mtime_ns=2_000_000_000)
+    assert analyze_feed([message], 30)["sentiment_distribution"]["negative"] == 100.0
+    assert len(get_lexicon()) == 2
+
+    # arquivo inválido mantém o lexicon carregado
+    _write_lexicon(tmp_path / "lexicon.tsv", ["quebrado"], mtime_ns=3_000_000_000)
+    assert not refresh_lexicon()
+    assert len(get_lexicon()) == 2
@@ -1,11 +1,28 @@
 import json
+from typing import List
 import os
+import sys
 import time
+import tracemalloc
 from pathlib import Path
 from datetime import datetime, timedelta, timezone
+from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
-from main import app
+from main import AnalyzeRequest, Message, app
+from sentiment_analyzer import (
+    NULL_TIMINGS,
+    MessageBatch,
+    MessageRecord,
+    StageTimings,
+    analyze_feed,
+    epoch_seconds,
+    find_anomaly,
+    warm_up,
+)
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "examples"))
+from generate_performance_data import generate_realistic  # noqa: E402
 
 
 client = TestClient(app)
@@ -40,10 +57,181 @@ def test_performance_under_200ms():
     else:
         payload = _gen_dataset(1000)
 
-    t0 = time.perf_counter()
-    r = client.post("/analyze-feed", json=payload)
-    dt = (time.perf_counter() - t0) * 1000
+    # Como atrás de um balanceador: o worker só recebe tráfego depois do /ready
+    with TestClient(app) as ready_client:
+        while ready_client.get("/ready").json()["status"] == "warming_up":
+            time.sleep(0.01)
+        assert ready_client.get("/ready").status_code == 200
+        t0 = time.perf_counter()
+        r = ready_client.post("/analyze-feed", json=payload)
+        dt = (time.perf_counter() - t0) * 1000
     assert r.status_code == 200
     # Target < 200ms for 1000 messages
     assert dt < 200.0, f"Took {dt:.2f} ms"
 
+
+def test_memory_under_20mb_for_10k_messages():
+    if os.getenv("RUN_PERF", "0") != "1":
+        import pytest
+        pytest.skip("Set RUN_PERF=1 to enable performance test")
+
+    payload = _gen_dataset(10_000)
+
+    tracemalloc.start()
+    try:
+        batch = MessageBatch.from_messages(payload["messages"])
+        _, batch_peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        analyze_feed(payload["messages"], payload["time_window_minutes"])
+        _, analyze_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert len(batch) == 10_000
+    # Alvo do README: <= 20MB para 10k mensagens; o lote colunar fica bem abaixo
+    assert batch_peak < 2 * 1024 * 1024, f"MessageBatch: {batch_peak / 1e6:.2f} MB"
+    assert analyze_peak < 20 * 1024 * 1024, f"analyze_feed: {analyze_peak / 1e6:.2f} MB"
+
+
+def test_peak_memory_per_10k_messages_with_distinct_users():
+    # Memória não depende da velocidade da máquina: roda sempre, sem RUN_PERF.
+    # Pior caso: um usuário por mensagem (10k UserStats e 10k entradas no ranking)
+    messages = generate_realistic(10_000)["messages"]
+    records = [_record(dict(message, user_id=f"user_{i:07d}")) for i, message in enumerate(messages)]
+    warm_up()
+
+    tracemalloc.start()
+    try:
+        analysis = analyze_feed(records, 30)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert len(analysis["influence_ranking"]) > 9_000
+    assert peak < 20 * 1024 * 1024, f"pico {peak / 1e6:.2f} MB"
+
+
+def test_anomaly_detection_scales_n_log_n():
+    if os.getenv("RUN_PERF", "0") != "1":
+        import pytest
+        pytest.skip("Set RUN_PERF=1 to enable performance test")
+
+    timings = {}
+    for n in (1_000, 100_000):
+        # Pior caso: nenhuma anomalia, então todas as verificações rodam até o fim
+        timestamps = [i * 3 for i in range(n)]
+        user_ids = [f"user_{i % (n // 10):06d}" for i in range(n)]
+        labels = ["positive" if i % 3 else "neutral" for i in range(n)]
+
+        t0 = time.perf_counter()
+        assert find_anomaly(timestamps, user_ids, labels) is None
+        timings[n] = (time.perf_counter() - t0) * 1000
+
+    # Uma fração pequena do orçamento de 200ms para 1000 mensagens
+    assert timings[1_000] < 20.0, f"1k: {timings[1_000]:.2f} ms"
+    assert timings[100_000] < 2000.0, f"100k: {timings[100_000]:.2f} ms"
+
+
+class _LegacyAnalyzeRequest(AnalyzeRequest):
+    messages: List[Message]
+
+
+legacy_app = FastAPI()
+
+
+@legacy_app.post("/analyze-feed")
+async def _legacy_analyze_feed_endpoint(request: _LegacyAnalyzeRequest):
+    # Caminho antigo: modelos pydantic -> dict -> cópia dentro do analyze_feed
+    messages = [m.model_dump() if hasattr(m, "model_dump") else m.dict() for m in request.messages]
+    return {"analysis": analyze_feed(messages, request.time_window_minutes)}
+
+
+def _median_latency_ms(test_client, body, runs=15):
+    headers = {"Content-Type": "application/json"}
+    test_client.post("/analyze-feed", content=body, headers=headers)
+    timings = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        r = test_client.post("/analyze-feed", content=body, headers=headers)
+        timings.append((time.perf_counter() - t0) * 1000)
+        assert r.status_code == 200
+    return sorted(timings)[runs // 2]
+
+
+def test_fast_path_validation_beats_model_round_trip():
+    if os.getenv("RUN_PERF", "0") != "1":
+        import pytest
+        pytest.skip("Set RUN_PERF=1 to enable performance test")
+
+    body = json.dumps(_gen_dataset(1000))
+    legacy_client = TestClient(legacy_app)
+    fast, legacy = (c.post("/analyze-feed", content=body).json()["analysis"] for c in (client, legacy_client))
+    assert fast.pop("processing_time_ms") > 0 and legacy.pop("processing_time_ms") > 0
+    assert fast == legacy
+
+    before = _median_latency_ms(legacy_client, body)
+    after = _median_latency_ms(client, body)
+    assert after < before, f"model round-trip {before:.1f} ms, fast path {after:.1f} ms"
+
+
+def _record(m):
+    return MessageRecord(
+        m["id"], m["content"], epoch_seconds(m["timestamp"]), m["user_id"],
+        m["hashtags"], m["reactions"], m["shares"], m["views"],
+    )
+
+
+def _records(n):
+    return [_record(m) for m in _gen_dataset(n)["messages"]]
+
+
+def test_sharded_analyze_feed_scaling():
+    if os.getenv("RUN_PERF", "0") != "1":
+        import pytest
+        pytest.skip("Set RUN_PERF=1 to enable performance test")
+
+    # PERF_SHARD_SIZES=10000,100000,1000000 inclui o feed de 1M mensagens
+    sizes = [int(n) for n in os.getenv("PERF_SHARD_SIZES", "10000,100000").split(",")]
+    workers = 4
+    for n in sizes:
+        records = _records(n)
+        timings = {}
+        results = {}
+        for mode in (1, workers):
+            t0 = time.perf_counter()
+            results[mode] = analyze_feed(records, 30, workers=mode)
+            timings[mode] = time.perf_counter() - t0
+        speedup = timings[1] / timings[workers]
+
+        results[workers].pop("processing_time_ms")
+        results[1].pop("processing_time_ms")
+        assert results[workers] == results[1]
+        if n >= 100_000 and (os.cpu_count() or 1) >= workers:
+            assert speedup > 2.0, f"{n} msgs: 1 worker {timings[1]:.2f} s, {workers} workers {timings[workers]:.2f} s"
+
+
+def _span_cost_ns(timings, spans=100_000):
+    t0 = time.perf_counter_ns()
+    for _ in range(spans):
+        with timings.span("sentiment"):
+            pass
+    return (time.perf_counter_ns() - t0) / spans
+
+
+def test_stage_instrumentation_overhead_under_one_percent():
+    if os.getenv("RUN_PERF", "0") != "1":
+        import pytest
+        pytest.skip("Set RUN_PERF=1 to enable performance test")
+
+    messages = _gen_dataset(1000)["messages"]
+    analyze_feed(messages, 30)
+    t0 = time.perf_counter_ns()
+    analyze_feed(messages, 30)
+    analysis_ns = time.perf_counter_ns() - t0
+
+    # Spans abertos numa análise de um lote: ~2 por etapa, com folga
+    spans_per_analysis = 2 * len(StageTimings().durations_ns)
+    disabled = spans_per_analysis * _span_cost_ns(NULL_TIMINGS) / analysis_ns
+    enabled = spans_per_analysis * _span_cost_ns(StageTimings()) / analysis_ns
+    assert disabled < 0.01, f"desligada {disabled:.4%}"
+    assert enabled < 0.01, f"ligada {enabled:.4%}"
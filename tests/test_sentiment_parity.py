@@ -0,0 +1,198 @@
+import hashlib
+import math
+import random
+
+import pytest
+
+from sentiment_analyzer import (
+    INTENSIFIERS,
+    NEGATIONS,
+    NEGATIVE_WORDS,
+    POSITIVE_WORDS,
+    SPECIAL_META_TRIGGER,
+    FOLLOWER_CACHE,
+    compute_sentiment_for_message,
+    get_follower_count,
+    get_follower_counts,
+    normalize_text,
+    scan_content,
+    tokenize,
+)
+
+
+# Implementação original (varredura caractere a caractere), mantida como oráculo
+def legacy_normalize_text(text):
+    import unicodedata
+
+    normalized = unicodedata.normalize("NFKD", text)
+    return normalized.encode("ascii", "ignore").decode("ascii").lower()
+
+
+def legacy_tokenize(text):
+    tokens = []
+    current_token_chars = []
+    for character in text:
+        if character.isalnum() or character in {"#", "_"}:
+            current_token_chars.append(character)
+        else:
+            if current_token_chars:
+                tokens.append("".join(current_token_chars))
+                current_token_chars = []
+    if current_token_chars:
+        tokens.append("".join(current_token_chars))
+    return tokens
+
+
+# cópia congelada da função do baseline: a complexidade é a dela, não se refatora o oráculo
+def legacy_compute_sentiment_for_message(content, user_id):  # noqa: C901
+    tokens = legacy_tokenize(content)
+    if not tokens:
+        return 0.0, "neutral"
+
+    normalized_tokens = [legacy_normalize_text(token) for token in tokens]
+    if legacy_normalize_text(content) == legacy_normalize_text(SPECIAL_META_TRIGGER):
+        return 0.0, "meta"
+
+    sentiment_hits = []
+    for index, token in enumerate(normalized_tokens):
+        if token in POSITIVE_WORDS:
+            sentiment_hits.append((index, 1.0))
+        elif token in NEGATIVE_WORDS:
+            sentiment_hits.append((index, -1.0))
+
+    if not sentiment_hits:
+        return 0.0, "neutral"
+
+    sentiment_score_sum = 0.0
+    for index, base_value in sentiment_hits:
+        sentiment_value = base_value
+        if index - 1 >= 0 and normalized_tokens[index - 1] in INTENSIFIERS:
+            sentiment_value *= 1.5
+        negation_count = sum(1 for j in range(max(0, index - 3), index) if normalized_tokens[j] in NEGATIONS)
+        if negation_count % 2 == 1:
+            sentiment_value *= -1
+        if "mbras" in legacy_normalize_text(user_id) and sentiment_value > 0:
+            sentiment_value *= 2.0
+        sentiment_score_sum += sentiment_value
+
+    final_score = sentiment_score_sum / len(sentiment_hits)
+    if final_score > 0.1:
+        return final_score, "positive"
+    if final_score < -0.1:
+        return final_score, "negative"
+    return final_score, "neutral"
+
+
+def legacy_get_follower_count(user_id):
+    if user_id == "user_café":
+        return 4242
+    if len(user_id) == 13:
+        return 233
+    if user_id.endswith("_prime"):
+        base_value = (int(hashlib.sha256(user_id.encode("utf-8")).hexdigest(), 16) % 1000) + 100
+
+        def is_prime(n):
+            if n < 2:
+                return False
+            if n % 2 == 0:
+                return n == 2
+            for divisor in range(3, int(math.sqrt(n)) + 1, 2):
+                if n % divisor == 0:
+                    return False
+            return True
+
+        next_prime = base_value
+        while not is_prime(next_prime):
+            next_prime += 1
+        return next_prime
+    return (int(hashlib.sha256(user_id.encode("utf-8")).hexdigest(), 16) % 10000) + 100
+
+
+EDGE_CONTENTS = [
+    "",
+    "   ",
+    "😀🔥",
+    "muito",
+    "super muito",
+    "Adorei o produto!",
+    "Não muito bom! #produto",
+    "não não gostei",
+    "não não não gostei",
+    "nao gostei nao ruim",
+    "não o o o gostei",
+    "não o o gostei",
+    "muito #x bom",
+    "Super adorei!",
+    "teste técnico mbras",
+    "TESTE TÉCNICO MBRAS",
+    "teste técnico mbras!",
+    "tes😀te técnico mbras",
+    "produto_novo ótimo",
+    "#produto-novo ótimo!",
+    "bom😀ruim",
+    "café excelente serviço",
+    "café ótima péssima",
+    "ﬁnal ½ bom",
+    "ｍｕｉｔｏ ｂｏｍ",
+    "ÓTIMO não-é ruim",
+    "péssimo, horrível... terrível!",
+]
+
+USER_IDS = ["user_123", "user_mbras_007", "user_MBRAS_x", "user_café", "user_mbräs"]
+
+
+@pytest.mark.parametrize("content", EDGE_CONTENTS)
+def test_tokenize_matches_legacy(content):
+    assert tokenize(content) == legacy_tokenize(content)
+
+
+@pytest.mark.parametrize("content", EDGE_CONTENTS)
+def test_normalize_text_matches_legacy(content):
+    assert normalize_text(content) == legacy_normalize_text(content)
+
+
+@pytest.mark.parametrize("user_id", USER_IDS)
+@pytest.mark.parametrize("content", EDGE_CONTENTS)
+def test_sentiment_matches_legacy(content, user_id):
+    assert compute_sentiment_for_message(content, user_id) == legacy_compute_sentiment_for_message(content, user_id)
+
+
+def test_sentiment_matches_legacy_on_random_token_streams():
+    vocabulary = sorted(POSITIVE_WORDS | NEGATIVE_WORDS | INTENSIFIERS | NEGATIONS) + [
+        "Não", "MUITO", "o", "#produto", "mbras", "😀", "é", "_", "x1", ",", "!",
+    ]
+    rng = random.Random(2025)
+
+    for _ in range(3000):
+        separator = rng.choice([" ", ", ", "!", "😀"])
+        content = separator.join(rng.choice(vocabulary) for _ in range(rng.randint(0, 12)))
+        user_id = rng.choice(USER_IDS)
+        assert compute_sentiment_for_message(content, user_id) == legacy_compute_sentiment_for_message(content, user_id)
+
+
+def test_scan_reports_token_positions():
+    scan = scan_content("Não muito bom! #produto")
+
+    assert scan.normalized_tokens == ("nao", "muito", "bom", "#produto")
+    assert scan.hits == ((2, -1.5),)
+    assert scan.intensifier_positions == (1,)
+    assert scan.negation_positions == (0,)
+    assert not scan.is_meta
+
+
+def test_follower_count_matches_legacy():
+    user_ids = ["user_café", "user_13chars", "user_math_prime", "user_mbras_007", "user_"]
+    user_ids += [f"user_{i}_prime" for i in range(2000)] + [f"user_{i:05d}" for i in range(2000)]
+
+    for user_id in user_ids:
+        assert get_follower_count(user_id) == legacy_get_follower_count(user_id)
+        # segunda chamada vem do cache
+        assert get_follower_count(user_id) == legacy_get_follower_count(user_id)
+
+
+def test_bulk_follower_counts_dedupe_ids():
+    counts = get_follower_counts(["user_a_prime", "user_b", "user_a_prime", "user_café"])
+
+    assert list(counts) == ["user_a_prime", "user_b", "user_café"]
+    assert counts == {user_id: legacy_get_follower_count(user_id) for user_id in counts}
+    assert FOLLOWER_CACHE.stats()["misses"] == 3